@@ -10,7 +10,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import tools from tools.py (NO circular import)
-from tools import search_samsung_manuals_rag, check_safety, create_service_ticket, get_current_time
+from tools import asearch_samsung_manuals_rag, check_safety, create_service_ticket, get_current_time
 
 # Import all sub-agents
 from agents.symptom_extractor import create_symptom_extractor_agent
@@ -427,7 +427,7 @@ Context flows from one agent to the next in strict sequential order.
 Accuracy score determines the path: high accuracy = troubleshooting, low accuracy = service.
 """,
         tools=[
-            search_samsung_manuals_rag,
+            asearch_samsung_manuals_rag,
             check_safety,
             create_service_ticket,
             get_current_time
@@ -12,7 +12,7 @@ from google.adk.agents import Agent
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from tools import search_samsung_manuals_rag
+from tools import asearch_samsung_manuals_rag
 
 
 def create_rag_retrieval_agent() -> Agent:
@@ -21,7 +21,7 @@ def create_rag_retrieval_agent() -> Agent:
 
     Role: Retrieve precise troubleshooting steps from Samsung manual using RAG.
     Technology: Custom RAG (Document AI + LlamaIndex + OpenAI + Qdrant)
-    Tools: search_samsung_manuals_rag
+    Tools: asearch_samsung_manuals_rag
     Output: Retrieved context with similarity scores
     """
 
@@ -44,7 +44,7 @@ You use a custom RAG pipeline with:
 
 ## Your Tool
 
-**search_samsung_manuals_rag(query, top_k, user_model, user_brand, appliance_type, min_similarity)**
+**asearch_samsung_manuals_rag(query, top_k, user_model, user_brand, appliance_type, min_similarity)**
 - Embeds query using OpenAI
 - Searches Qdrant for similar chunks
 - **Returns accuracy score** that measures how well the solution will solve the problem
@@ -66,7 +66,7 @@ Given structured symptoms from symptom_extractor:
 
 1. **Extract Appliance Info**: Get brand, model, type from symptom extractor output
 2. **Formulate Effective Query**: Create clear, specific search queries
-3. **Call search_samsung_manuals_rag**: Use the tool with ALL parameters
+3. **Call asearch_samsung_manuals_rag**: Use the tool with ALL parameters
    - REQUIRED: Pass user_model, user_brand, appliance_type
    - These are needed for accuracy scoring!
 4. **Extract Accuracy Score**: Get accuracy_score from results
@@ -210,7 +210,7 @@ Return ONLY valid JSON:
 
 ## Handling Accuracy Scores
 
-**After calling search_samsung_manuals_rag:**
+**After calling asearch_samsung_manuals_rag:**
 
 1. **Extract accuracy_score from results** - It's automatically calculated by the tool
 2. **Check for errors:**
@@ -238,7 +238,7 @@ Return ONLY valid JSON:
 
 ## Error Handling
 
-If search_samsung_manuals_rag returns error:
+If asearch_samsung_manuals_rag returns error:
 ```json
 {
   "rag_results": {
@@ -253,7 +253,7 @@ If search_samsung_manuals_rag returns error:
 
 Search the manual now using RAG pipeline.
 """,
-        tools=[search_samsung_manuals_rag]
+        tools=[asearch_samsung_manuals_rag]
     )
 
     return rag_retrieval_agent
@@ -4,23 +4,69 @@ RAG Pipeline for Fridge Troubleshooting
 Components:
 - document_processor: Extract text from PDFs using Document AI
 - chunking: Split documents using LlamaIndex
-- embedding: Create embeddings using OpenAI
-- vector_store: Store and retrieve from Qdrant
+- embedding: Create embeddings using OpenAI (Embedder protocol + backend factory)
+- local_embedding: Offline CPU embedding backends
+- embedding_cache: Persistent cache of computed embeddings
+- async_embedding: Concurrent, rate-limit aware batch embedding
+- batching: Token-budget packing of embedding requests
+- vector_store: Store and retrieve from Qdrant (+ backend factory)
+- local_store: In-process exact-search backend over a memory-mapped matrix
+- sparse: Hashed BM25 term vectors for hybrid (dense + sparse) search
+- bm25_index: In-process BM25 index (degraded mode and rank fusion)
+- catalog: Model-number trie and error-code lookup over ingested manuals
+- result_cache: TTL/LRU cache of retrieval responses, invalidated by ingestion
+- semantic_cache: Near-duplicate query cache matched by embedding similarity
+- diversify: Duplicate-chunk removal and MMR ordering of search results
+- query_batcher: Coalesce concurrent query embeddings into one API call
 - retriever: Query the RAG system
+- clients: Process-wide shared sync + asyncio clients and retriever (warmup/shutdown hooks)
 """
 
 from .document_processor import DocumentProcessor
 from .chunking import chunk_documents, LlamaIndexChunker
-from .embedding import OpenAIEmbedder, embed_chunks
-from .vector_store import QdrantStore
+from .embedding import Embedder, OpenAIEmbedder, create_embedder, embed_chunks
+from .local_embedding import HashingEmbedder, SentenceTransformerEmbedder
+from .embedding_cache import EmbeddingCache
+from .async_embedding import ConcurrentEmbeddingEngine
+from .batching import TokenBudgetBatcher
+from .vector_store import QdrantStore, create_vector_store
+from .local_store import LocalVectorStore
+from .sparse import SparseEncoder
+from .bm25_index import BM25Index
+from .catalog import ManualCatalog
+from .result_cache import ResultCache, bump_generation
+from .semantic_cache import SemanticCache
+from .query_batcher import QueryEmbeddingBatcher
 from .retriever import RAGRetriever
+from .clients import get_retriever, get_catalog, warmup, shutdown, ashutdown
 
 __all__ = [
     'DocumentProcessor',
     'chunk_documents',
     'LlamaIndexChunker',
+    'Embedder',
     'OpenAIEmbedder',
+    'create_embedder',
+    'HashingEmbedder',
+    'SentenceTransformerEmbedder',
     'embed_chunks',
+    'EmbeddingCache',
+    'ConcurrentEmbeddingEngine',
+    'TokenBudgetBatcher',
     'QdrantStore',
-    'RAGRetriever'
+    'create_vector_store',
+    'LocalVectorStore',
+    'SparseEncoder',
+    'BM25Index',
+    'ManualCatalog',
+    'ResultCache',
+    'bump_generation',
+    'SemanticCache',
+    'QueryEmbeddingBatcher',
+    'RAGRetriever',
+    'get_retriever',
+    'get_catalog',
+    'warmup',
+    'shutdown',
+    'ashutdown'
 ]
@@ -0,0 +1,417 @@
+"""
+Concurrent Batch Embedding
+
+Asyncio engine that keeps several embedding batches in flight at once and
+adapts its concurrency to OpenAI rate-limit feedback (429 responses and
+x-ratelimit-* headers).
+"""
+
+import re
+import base64
+import random
+import asyncio
+import weakref
+import threading
+import numpy as np
+from typing import List, Dict, Optional, Callable, Any, Tuple
+from openai import (
+    AsyncOpenAI,
+    RateLimitError,
+    BadRequestError,
+    AuthenticationError,
+    PermissionDeniedError,
+    NotFoundError
+)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize the rows of a float32 matrix in place.
+
+    Args:
+        matrix: Array of shape (n, dim)
+
+    Returns:
+        The same array
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def decode_embeddings(data: List[Any], normalize: bool = False) -> np.ndarray:
+    """
+    Decode an embeddings response into a contiguous float32 matrix.
+
+    Accepts both base64-encoded vectors (encoding_format="base64") and
+    plain float lists.
+
+    Args:
+        data: response.data from an embeddings call
+        normalize: Re-normalize rows to unit length (for reduced dimensions)
+
+    Returns:
+        Array of shape (len(data), dim) in request order
+    """
+    rows = sorted(data, key=lambda d: d.index)
+    if not rows:
+        return np.empty((0, 0), dtype=np.float32)
+
+    if isinstance(rows[0].embedding, str):
+        first = np.frombuffer(base64.b64decode(rows[0].embedding), dtype=np.float32)
+        matrix = np.empty((len(rows), first.shape[0]), dtype=np.float32)
+        matrix[0] = first
+        for i, row in enumerate(rows[1:], 1):
+            matrix[i] = np.frombuffer(base64.b64decode(row.embedding), dtype=np.float32)
+    else:
+        matrix = np.asarray([row.embedding for row in rows], dtype=np.float32)
+
+    return normalize_rows(matrix) if normalize else matrix
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse an OpenAI reset/retry duration header into seconds.
+
+    Handles plain seconds ("1.5") and Go-style durations ("6m0s", "20ms").
+
+    Args:
+        value: Header value
+
+    Returns:
+        Duration in seconds, or None if it cannot be parsed
+    """
+    if not value:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    if not parts:
+        return None
+
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limiter: grow concurrency on success, halve it on rate limiting"""
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        initial_concurrency: Optional[int] = None,
+        min_concurrency: int = 1,
+        headroom: float = 0.1
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            max_concurrency: Upper bound on in-flight requests
+            initial_concurrency: Starting limit (default: half of max)
+            min_concurrency: Lower bound on in-flight requests
+            headroom: Stop growing when the remaining request/token budget
+                      reported by the API drops below this fraction
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = initial_concurrency or max(self.min_concurrency, self.max_concurrency // 2)
+        self.headroom = headroom
+
+        self.in_flight = 0
+        self.rate_limited = 0
+        self._successes_at_limit = 0
+        self._resume_at = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        """Wait for a free slot (and for any rate-limit cool-down to pass)"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            async with self._condition:
+                delay = self._resume_at - loop.time()
+                if delay <= 0:
+                    if self.in_flight < self.limit:
+                        self.in_flight += 1
+                        return
+                    await self._condition.wait()
+                    continue
+
+            await asyncio.sleep(delay)
+
+    async def release(self):
+        """Return a slot"""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    async def on_success(self, headers: Optional[Dict[str, str]] = None):
+        """
+        Record a successful request and grow the limit additively.
+
+        Args:
+            headers: Response headers (used to read remaining rate-limit budget)
+        """
+        async with self._condition:
+            if headers and self._near_limit(headers):
+                self._successes_at_limit = 0
+                return
+
+            self._successes_at_limit += 1
+            if self._successes_at_limit >= self.limit and self.limit < self.max_concurrency:
+                self.limit += 1
+                self._successes_at_limit = 0
+                self._condition.notify_all()
+
+    async def on_rate_limited(self, retry_after: Optional[float] = None):
+        """
+        Record a 429 response: halve the limit and pause new requests.
+
+        Args:
+            retry_after: Seconds to wait as advertised by the API
+        """
+        loop = asyncio.get_running_loop()
+
+        async with self._condition:
+            self.rate_limited += 1
+            self.limit = max(self.min_concurrency, self.limit // 2)
+            self._successes_at_limit = 0
+
+            # Jitter avoids all waiting batches retrying in the same instant
+            pause = (retry_after if retry_after is not None else 1.0) * (1 + random.random() * 0.2)
+            self._resume_at = max(self._resume_at, loop.time() + pause)
+
+    def _near_limit(self, headers: Dict[str, str]) -> bool:
+        """Check whether the x-ratelimit-remaining-* headers are below headroom"""
+        for kind in ("requests", "tokens"):
+            try:
+                limit = float(headers.get(f"x-ratelimit-limit-{kind}", 0))
+                remaining = float(headers.get(f"x-ratelimit-remaining-{kind}", limit))
+            except (TypeError, ValueError):
+                continue
+            if limit and remaining / limit < self.headroom:
+                return True
+        return False
+
+
+class ConcurrentEmbeddingEngine:
+    """Embed batches of texts with several OpenAI requests in flight"""
+
+    def __init__(
+        self,
+        model: str,
+        embedding_dim: int,
+        dimensions: Optional[int] = None,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 8,
+        max_rate_limit_retries: int = 8,
+        max_retries: int = 3,
+        backoff_base: float = 1.0
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            model: Embedding model
+            embedding_dim: Vector dimension (sizes the placeholder rows of dropped texts)
+            dimensions: Reduced output dimension requested from the API (None = full size)
+            api_key: OpenAI API key
+            max_concurrency: Maximum number of batches in flight
+            max_rate_limit_retries: Give up on a batch after this many 429s
+            max_retries: Retries for transient errors before a batch is split
+            backoff_base: Initial backoff in seconds (doubled on every retry)
+        """
+        self.model = model
+        self.embedding_dim = embedding_dim
+        self.dimensions = dimensions
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.last_stats: Dict = {}
+        self.last_failures: List[Dict] = []
+        self._usage_tokens = 0
+        self._failures: List[Dict] = []
+
+        # One client per event loop (httpx connections belong to the loop that
+        # opened them); embed_batches always runs on the engine's own loop
+        self._clients = weakref.WeakKeyDictionary()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    def _client(self) -> AsyncOpenAI:
+        """Get the client of the running event loop, created on first use"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            # Retries are handled in _request so that 429s feed the limiter
+            client = self._clients[loop] = AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        return client
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the engine's event loop, started on a daemon thread on first use"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="embedding-engine", daemon=True).start()
+            return self._loop
+
+    async def aembed_batches(
+        self,
+        batches: List[List[str]],
+        on_batch_done: Optional[Callable[[int, int], None]] = None
+    ) -> List[np.ndarray]:
+        """
+        Embed batches concurrently, preserving input order.
+
+        Args:
+            batches: List of text batches (one API request each)
+            on_batch_done: Optional callback(batch_index, batch_len) for progress
+
+        Returns:
+            One float32 matrix per batch, aligned with the input batches
+            (NaN rows for texts that could not be embedded; see last_failures)
+        """
+        limiter = AdaptiveConcurrencyLimiter(max_concurrency=self.max_concurrency)
+        self._usage_tokens = 0
+        self._failures = []
+        results: List[np.ndarray] = [None] * len(batches)
+        client = self._client()
+
+        async def run(index: int, batch: List[str]):
+            results[index] = await self._embed_batch(client, limiter, index, batch)
+            if on_batch_done:
+                on_batch_done(index, len(batch))
+
+        await asyncio.gather(*(run(i, batch) for i, batch in enumerate(batches)))
+
+        self.last_stats = {
+            "batches": len(batches),
+            "final_concurrency": limiter.limit,
+            "rate_limited": limiter.rate_limited,
+            "tokens": self._usage_tokens,
+            "dropped": len(self._failures)
+        }
+        self.last_failures = self._failures
+        return results
+
+    def embed_batches(
+        self,
+        batches: List[List[str]],
+        on_batch_done: Optional[Callable[[int, int], None]] = None
+    ) -> List[np.ndarray]:
+        """
+        Synchronous wrapper around aembed_batches.
+
+        Runs on the engine's event loop thread, so it works from plain
+        scripts and from inside a running event loop (e.g. the ADK server),
+        and every call reuses the same client and its connections.
+        """
+        future = asyncio.run_coroutine_threadsafe(self.aembed_batches(batches, on_batch_done), self._event_loop())
+        return future.result()
+
+    async def _embed_batch(
+        self,
+        client: AsyncOpenAI,
+        limiter: AdaptiveConcurrencyLimiter,
+        index: int,
+        batch: List[str],
+        offset: int = 0
+    ) -> np.ndarray:
+        """
+        Embed one batch; if it keeps failing, split it in half and recurse
+        so that only the texts that are really bad end up dropped.
+        """
+        embeddings, error, splittable = await self._request(client, limiter, batch)
+        if embeddings is not None:
+            return embeddings
+
+        if len(batch) == 1 or not splittable:
+            for position in range(offset, offset + len(batch)):
+                self._failures.append({"batch": index, "position": position, "error": error})
+            print(f"✗ Dropping {len(batch)} text(s) from batch {index + 1}: {error}")
+            return np.full((len(batch), self.embedding_dim), np.nan, dtype=np.float32)
+
+        mid = len(batch) // 2
+        print(f"  Splitting batch {index + 1} ({len(batch)} texts) after error: {error}")
+        left, right = await asyncio.gather(
+            self._embed_batch(client, limiter, index, batch[:mid], offset),
+            self._embed_batch(client, limiter, index, batch[mid:], offset + mid)
+        )
+        return np.concatenate([left, right])
+
+    async def _request(
+        self,
+        client: AsyncOpenAI,
+        limiter: AdaptiveConcurrencyLimiter,
+        batch: List[str]
+    ) -> Tuple[Optional[np.ndarray], Optional[str], bool]:
+        """
+        Send one embeddings request with retries.
+
+        Rate limits back off through the limiter; transient errors are retried
+        with exponential backoff; invalid input fails immediately.
+
+        Returns:
+            (embeddings or None, error message, whether splitting may help)
+        """
+        attempts = 0
+        rate_limited = 0
+
+        while True:
+            await limiter.acquire()
+            try:
+                raw = await client.embeddings.with_raw_response.create(
+                    model=self.model,
+                    input=batch,
+                    encoding_format="base64",
+                    **({"dimensions": self.dimensions} if self.dimensions else {})
+                )
+            except RateLimitError as e:
+                await limiter.release()
+                rate_limited += 1
+                if rate_limited > self.max_rate_limit_retries:
+                    return None, f"rate limited {rate_limited} times", False
+
+                headers = e.response.headers if e.response is not None else {}
+                retry_after = (
+                    parse_reset_duration(headers.get("retry-after"))
+                    or parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+                    or parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+                )
+                await limiter.on_rate_limited(retry_after)
+                continue
+            except (AuthenticationError, PermissionDeniedError, NotFoundError) as e:
+                # Every request would fail the same way - do not bisect
+                await limiter.release()
+                return None, str(e), False
+            except BadRequestError as e:
+                # Deterministic for this input - retrying is pointless, splitting is not
+                await limiter.release()
+                return None, str(e), True
+            except Exception as e:
+                await limiter.release()
+                attempts += 1
+                if attempts > self.max_retries:
+                    return None, str(e), True
+
+                delay = self.backoff_base * 2 ** (attempts - 1) * (1 + random.random() * 0.2)
+                await asyncio.sleep(delay)
+                continue
+
+            await limiter.release()
+            await limiter.on_success(raw.headers)
+
+            response = raw.parse()
+            if len(response.data) != len(batch):
+                return None, f"expected {len(batch)} embeddings, got {len(response.data)}", True
+
+            if response.usage is not None:
+                self._usage_tokens += response.usage.total_tokens
+            return decode_embeddings(response.data, normalize=bool(self.dimensions)), None, True
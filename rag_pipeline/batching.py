@@ -0,0 +1,157 @@
+"""
+Token-Budget Batching for Embedding Requests
+
+Pack texts into embedding requests by local token count instead of a
+fixed number of texts, so short chunks share requests and long chunks
+never push a request over the API's token limits.
+"""
+
+import os
+from typing import List, Dict, Optional
+from dotenv import load_dotenv
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a conservative character estimate
+    tiktoken = None
+
+load_dotenv()
+
+
+class TokenCounter:
+    """Count tokens locally with tiktoken (or a character-based estimate)"""
+
+    def __init__(self, model: str = "text-embedding-3-small"):
+        """
+        Initialize token counter.
+
+        Args:
+            model: Embedding model whose tokenizer should be used
+        """
+        self.model = model
+        self.encoding = None
+
+        if tiktoken is not None:
+            try:
+                try:
+                    self.encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    self.encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # tiktoken downloads its BPE files on first use; offline hosts fall back
+                print(f"⚠️ tiktoken unavailable ({e.__class__.__name__}), estimating tokens from characters")
+
+    def count(self, text: str) -> int:
+        """
+        Count tokens in a text.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Number of tokens (estimated as ~3 characters per token without tiktoken)
+        """
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return len(text) // 3 + 1
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Truncate a text to at most max_tokens tokens.
+
+        Args:
+            text: Input text
+            max_tokens: Token limit
+
+        Returns:
+            Truncated text
+        """
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return self.encoding.decode(tokens[:max_tokens])
+        return text[:max_tokens * 3]
+
+
+class TokenBudgetBatcher:
+    """Greedily pack texts into requests bounded by token and item budgets"""
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        max_tokens: Optional[int] = None,
+        max_items: Optional[int] = None,
+        max_input_tokens: int = 8191
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            model: Embedding model (selects the tokenizer)
+            max_tokens: Token budget per request (default: EMBEDDING_MAX_BATCH_TOKENS or 100000)
+            max_items: Maximum texts per request (default: EMBEDDING_MAX_BATCH_ITEMS or 512)
+            max_input_tokens: Per-text limit of the embedding model; longer texts are truncated
+        """
+        self.max_tokens = max_tokens or int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", "100000"))
+        self.max_items = max_items or int(os.getenv("EMBEDDING_MAX_BATCH_ITEMS", "512"))
+        self.max_input_tokens = min(max_input_tokens, self.max_tokens)
+        self.counter = TokenCounter(model)
+
+    def pack(self, texts: List[str]) -> List[Dict]:
+        """
+        Pack texts into request batches, preserving input order.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List of batches, each a dict with 'indices' (positions in texts),
+            'texts' (possibly truncated) and 'tokens' (local token count)
+        """
+        batches = []
+        current = {"indices": [], "texts": [], "tokens": 0}
+
+        for i, text in enumerate(texts):
+            tokens = self.counter.count(text)
+
+            if tokens > self.max_input_tokens:
+                print(f"⚠️ Text {i} has {tokens} tokens, truncating to {self.max_input_tokens}")
+                text = self.counter.truncate(text, self.max_input_tokens)
+                tokens = self.max_input_tokens
+
+            if current["indices"] and (
+                current["tokens"] + tokens > self.max_tokens
+                or len(current["indices"]) >= self.max_items
+            ):
+                batches.append(current)
+                current = {"indices": [], "texts": [], "tokens": 0}
+
+            current["indices"].append(i)
+            current["texts"].append(text)
+            current["tokens"] += tokens
+
+        if current["indices"]:
+            batches.append(current)
+
+        return batches
+
+    def get_batch_stats(self, batches: List[Dict]) -> Dict:
+        """
+        Get statistics about packed batches.
+
+        Args:
+            batches: Output of pack()
+
+        Returns:
+            Dictionary with request and token statistics
+        """
+        tokens = [b["tokens"] for b in batches]
+
+        return {
+            "requests": len(batches),
+            "texts": sum(len(b["indices"]) for b in batches),
+            "total_tokens": sum(tokens),
+            "avg_tokens_per_request": sum(tokens) / len(tokens) if tokens else 0,
+            "max_tokens_per_request": max(tokens) if tokens else 0,
+            "token_budget": self.max_tokens,
+            "item_budget": self.max_items
+        }
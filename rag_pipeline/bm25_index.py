@@ -0,0 +1,373 @@
+"""
+In-Process BM25 Index
+
+Lexical index over chunk text, used by RAGRetriever when the embedding API
+is slow or down (degraded mode) and as a second ranking to fuse with dense
+results (reciprocal rank fusion):
+- Terms come from rag_pipeline.sparse (same tokenization, hashing and
+  model-number prefix terms as the hybrid Qdrant sparse vectors)
+- postings.npz: sorted term hashes, CSR postings (row, tf) and per-term IDF
+- docs.jsonl: one {"id", "text", "metadata"} record per row, so results
+  can be returned without Qdrant
+- Built during ingestion and saved under LEXICAL_INDEX_PATH/<collection>
+"""
+
+import os
+import json
+import time
+import threading
+from collections import Counter
+from typing import List, Dict, Iterable, Optional, Sequence, Union
+import numpy as np
+from dotenv import load_dotenv
+
+from .sparse import SparseEncoder, tokenize, term_index
+
+load_dotenv()
+
+
+class BM25Index:
+    """BM25 index over chunks with hashed-term postings"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        collection_name: Optional[str] = None,
+        k1: float = 1.2,
+        b: float = 0.75
+    ):
+        """
+        Initialize index (loading it if it was saved before).
+
+        Args:
+            path: Base directory (default: LEXICAL_INDEX_PATH or ./data/lexical)
+            collection_name: Collection the index mirrors (default: QDRANT_COLLECTION_NAME or fridge_manuals)
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+        """
+        self.path = path or os.getenv("LEXICAL_INDEX_PATH", "./data/lexical")
+        self.collection_name = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "fridge_manuals")
+        self.k1 = k1
+        self.b = b
+        self.encoder = SparseEncoder(k1=k1, b=b)
+
+        self.index_dir = os.path.join(self.path, self.collection_name)
+        self.postings_path = os.path.join(self.index_dir, "postings.npz")
+        self.docs_path = os.path.join(self.index_dir, "docs.jsonl")
+
+        self._lock = threading.Lock()
+        self._rows: Dict = {}
+        self._ids: List = []
+        self._texts: List[str] = []
+        self._metadata: List[Dict] = []
+        self._dirty = False
+        self._bitmaps: Dict[str, Dict] = {}
+
+        self._terms = np.zeros(0, dtype=np.uint32)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings = np.zeros(0, dtype=np.int32)
+        self._tfs = np.zeros(0, dtype=np.float32)
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._length_norm = np.zeros(0, dtype=np.float32)
+
+        if os.path.exists(self.postings_path):
+            self._load()
+
+    @classmethod
+    def load_if_exists(cls, **kwargs) -> Optional["BM25Index"]:
+        """
+        Load a saved index.
+
+        Args:
+            **kwargs: Passed to the constructor (path, collection_name, ...)
+
+        Returns:
+            The index, or None when none has been saved for the collection
+        """
+        index = cls(**kwargs)
+        return index if os.path.exists(index.postings_path) else None
+
+    @classmethod
+    def from_vector_store(cls, vector_store, batch_size: int = 256, **kwargs) -> "BM25Index":
+        """
+        Build an index from the points of an existing collection.
+
+        Args:
+            vector_store: QdrantStore or LocalVectorStore with iter_points()
+            batch_size: Points read per request
+            **kwargs: Passed to the constructor (path, k1, b, ...)
+
+        Returns:
+            Built (not yet saved) index
+        """
+        kwargs.setdefault("collection_name", vector_store.collection_name)
+        index = cls(**kwargs)
+        index.add_documents(vector_store.iter_points(batch_size=batch_size, with_vectors=False))
+        index.build()
+        return index
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _load(self):
+        """Read postings and documents"""
+        with np.load(self.postings_path) as data:
+            self._terms = data["terms"]
+            self._offsets = data["offsets"]
+            self._postings = data["postings"]
+            self._tfs = data["tfs"]
+            self._idf = data["idf"]
+            self._length_norm = data["length_norm"]
+
+        self._ids, self._texts, self._metadata = [], [], []
+        with open(self.docs_path) as f:
+            for line in f:
+                record = json.loads(line)
+                self._ids.append(record["id"])
+                self._texts.append(record["text"])
+                self._metadata.append(record["metadata"])
+
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._bitmaps = {}
+        self._dirty = False
+
+    def add_documents(self, documents: Iterable[Dict]) -> int:
+        """
+        Add or replace documents (by 'id'); call build() or save() afterwards.
+
+        Args:
+            documents: Iterable of dicts with 'id', 'text' and 'metadata'
+                       (chunk records, or add_documents/iter_points dicts)
+
+        Returns:
+            Number of documents added or replaced
+        """
+        count = 0
+        with self._lock:
+            for doc in documents:
+                metadata = dict(doc.get("metadata", {}))
+                row = self._rows.get(doc["id"])
+                if row is None:
+                    self._rows[doc["id"]] = len(self._ids)
+                    self._ids.append(doc["id"])
+                    self._texts.append(doc["text"])
+                    self._metadata.append(metadata)
+                else:
+                    self._texts[row] = doc["text"]
+                    self._metadata[row] = metadata
+                count += 1
+            self._dirty = self._dirty or count > 0
+        return count
+
+    def delete_stale_manual(self, source: str, file_hash: str) -> int:
+        """
+        Remove the chunks of earlier versions of a re-ingested manual;
+        call build() or save() afterwards.
+
+        Args:
+            source: Manual source (GCS URI) shared by all its versions
+            file_hash: Hash of the current version; its chunks are kept
+
+        Returns:
+            Number of chunks removed
+        """
+        with self._lock:
+            keep = [
+                row for row, metadata in enumerate(self._metadata)
+                if not (metadata.get("source") == source and metadata.get("file_hash") != file_hash)
+            ]
+            removed = len(self._ids) - len(keep)
+            if removed:
+                self._ids = [self._ids[row] for row in keep]
+                self._texts = [self._texts[row] for row in keep]
+                self._metadata = [self._metadata[row] for row in keep]
+                self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+                self._dirty = True
+        return removed
+
+    def build(self):
+        """(Re)build postings from all documents"""
+        start = time.perf_counter()
+        term_hashes, rows, tfs = [], [], []
+        lengths = np.zeros(len(self._ids), dtype=np.float32)
+
+        for row, (text, metadata) in enumerate(zip(self._texts, self._metadata)):
+            # Model numbers live in metadata; index them like the hybrid sparse vectors do
+            model_number = metadata.get("model_number") or metadata.get("model", "")
+            indexed = f"{text} {model_number}"
+            lengths[row] = len(tokenize(indexed))
+            counts = Counter(term_index(term) for term in self.encoder.terms(indexed))
+            term_hashes.extend(counts.keys())
+            rows.extend([row] * len(counts))
+            tfs.extend(counts.values())
+
+        term_hashes = np.asarray(term_hashes, dtype=np.uint32)
+        rows = np.asarray(rows, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+
+        order = np.lexsort((rows, term_hashes))
+        term_hashes, rows, tfs = term_hashes[order], rows[order], tfs[order]
+
+        terms, starts, doc_freqs = np.unique(term_hashes, return_index=True, return_counts=True)
+        num_docs = max(len(self._ids), 1)
+        avg_length = float(lengths.mean()) if len(lengths) else 1.0
+
+        with self._lock:
+            self._terms = terms
+            self._offsets = np.append(starts, len(term_hashes)).astype(np.int64)
+            self._postings = rows
+            self._tfs = tfs
+            self._idf = np.log1p((num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+            self._length_norm = (self.k1 * (1 - self.b + self.b * lengths / max(avg_length, 1.0))).astype(np.float32)
+            self._bitmaps = {}
+            self._dirty = False
+
+        print(f"✓ Built BM25 index: {len(self._ids)} chunks, {len(terms)} terms "
+              f"in {time.perf_counter() - start:.1f}s")
+
+    def save(self):
+        """Build if needed and write postings + documents (atomically)"""
+        if self._dirty:
+            self.build()
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_postings = self.postings_path + ".tmp.npz"
+        tmp_docs = self.docs_path + ".tmp"
+
+        np.savez_compressed(
+            tmp_postings,
+            terms=self._terms,
+            offsets=self._offsets,
+            postings=self._postings,
+            tfs=self._tfs,
+            idf=self._idf,
+            length_norm=self._length_norm
+        )
+        with open(tmp_docs, "w") as f:
+            for doc_id, text, metadata in zip(self._ids, self._texts, self._metadata):
+                f.write(json.dumps({"id": doc_id, "text": text, "metadata": metadata}) + "\n")
+
+        os.replace(tmp_docs, self.docs_path)
+        os.replace(tmp_postings, self.postings_path)
+
+        size_mb = os.path.getsize(self.postings_path) / 1e6
+        print(f"✓ Saved BM25 index to {self.index_dir} ({size_mb:.1f} MB postings)")
+
+    def _filter_mask(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        """Boolean row mask for exact-match metadata filters (None = no filter)"""
+        if not filters:
+            return None
+
+        mask = np.ones(len(self._ids), dtype=bool)
+        for field, value in filters.items():
+            bitmaps = self._bitmaps.get(field)
+            if bitmaps is None:
+                bitmaps = self._bitmaps[field] = {}
+                for row, metadata in enumerate(self._metadata):
+                    key = metadata.get(field)
+                    if key not in bitmaps:
+                        bitmaps[key] = np.zeros(len(self._ids), dtype=bool)
+                    bitmaps[key][row] = True
+            bitmap = bitmaps.get(value)
+            if bitmap is None:
+                return np.zeros(len(self._ids), dtype=bool)
+            mask &= bitmap
+        return mask
+
+    def search(self, query: str, top_k: int = 5, filters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Rank chunks by BM25 score.
+
+        Args:
+            query: Query text
+            top_k: Number of results to return
+            filters: Optional metadata filters (exact match on every field)
+
+        Returns:
+            Results in the vector store format. 'score' is the BM25 score
+            divided by the best score the query could reach (0-1);
+            'bm25_score' is the raw score.
+        """
+        if self._dirty:
+            self.build()
+        if not len(self._ids):
+            return []
+
+        hashes = np.unique(np.asarray(
+            [term_index(term) for term in self.encoder.terms(query)],
+            dtype=np.uint32
+        ))
+        positions = np.searchsorted(self._terms, hashes)
+        in_range = positions < len(self._terms)
+        positions, hashes = positions[in_range], hashes[in_range]
+        positions = positions[self._terms[positions] == hashes]
+        if not len(positions):
+            return []
+
+        scores = np.zeros(len(self._ids), dtype=np.float32)
+        for p in positions:
+            start, end = self._offsets[p], self._offsets[p + 1]
+            rows = self._postings[start:end]
+            tfs = self._tfs[start:end]
+            scores[rows] += self._idf[p] * tfs * (self.k1 + 1) / (tfs + self._length_norm[rows])
+
+        mask = self._filter_mask(filters)
+        if mask is not None:
+            scores[~mask] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        if not len(candidates):
+            return []
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        best_possible = float(np.sum(self._idf[positions]) * (self.k1 + 1))
+        return [
+            {
+                "id": self._ids[row],
+                "score": float(scores[row]) / best_possible,
+                "bm25_score": float(scores[row]),
+                "text": self._texts[row],
+                "metadata": dict(self._metadata[row])
+            }
+            for row in candidates
+        ]
+
+    def search_batch(
+        self,
+        queries: Sequence[str],
+        top_k: int = 5,
+        filters: Optional[Union[Dict, Sequence[Optional[Dict]]]] = None
+    ) -> List[List[Dict]]:
+        """
+        Rank chunks for several queries.
+
+        Args:
+            queries: Query texts
+            top_k: Number of results per query
+            filters: Metadata filters shared by all queries, or one per query
+
+        Returns:
+            One result list per query, in the same format as search()
+        """
+        if filters is None or isinstance(filters, dict):
+            filters = [filters] * len(queries)
+        if len(filters) != len(queries):
+            raise ValueError("filters must be a dict or one entry per query")
+        return [self.search(query, top_k, query_filters) for query, query_filters in zip(queries, filters)]
+
+    def get_info(self) -> Dict:
+        """
+        Get index stats.
+
+        Returns:
+            Dictionary with document/term counts and file location
+        """
+        return {
+            "collection": self.collection_name,
+            "documents": len(self._ids),
+            "terms": int(len(self._terms)),
+            "postings": int(len(self._postings)),
+            "path": self.index_dir
+        }
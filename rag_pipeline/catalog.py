@@ -0,0 +1,418 @@
+"""
+Manual Catalog
+
+Exact lookup of model numbers and error codes, built during ingestion:
+- Maps each manual to its brand, appliance type, model number and chunk IDs
+- Model numbers are normalized (upper case, no whitespace) into a prefix
+  trie; '*' / '**' wildcards (RS28A5F61**) make the model a prefix that
+  matches any completion (RS28A5F61SR)
+- Error codes found in chunk text ("error C-10", "code 4C") map to the
+  manuals and chunks that mention them
+- Saved as JSON under CATALOG_PATH/<collection>.json and loaded once at
+  startup, so resolving a model is a local lookup instead of an embedding
+  call plus a vector search
+"""
+
+import os
+import re
+import json
+from collections import Counter
+from typing import List, Dict, Iterable, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CATALOG_FORMAT_VERSION = 1
+
+# Shortest model prefix that is treated as identifying a model family
+MIN_MODEL_PREFIX = 6
+
+# Error codes: "C-10", "4C", "OE", "dE"... only taken from sentences that
+# talk about errors/codes, or right before/after "error"/"code"
+CODE_CONTEXT = re.compile(r"\b(?:error|code|fault)s?\b", re.IGNORECASE)
+CODE_PATTERN = re.compile(r"\b([A-Z]{1,3}-?\d{1,3}[A-Z]?|\d{1,2}[A-Z]{1,2})\b")
+CODE_AFTER_KEYWORD = re.compile(r"\b(?i:error|code)\s*(?i:code)?\s*[:\"'“]?\s*([A-Za-z]{1,3}-?\d{0,3}[A-Za-z]?)\b")
+CODE_BEFORE_KEYWORD = re.compile(r"\b([A-Za-z]{2,3}\d?)\s+(?i:error|code)\b")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def looks_like_code(code: str) -> bool:
+    """Whether a word next to "error"/"code" is a code (OE, dE, C-10) rather than prose"""
+    if any(c.isdigit() for c in code):
+        return True
+    # Letter-only codes are short and upper case, allowing a lower-case first letter (dE, nF)
+    return len(code) >= 2 and code[1:].isupper() and code.upper() not in {"OK", "ON", "NO", "IS", "IN", "OR"}
+
+
+def normalize_model(model: str) -> Tuple[str, bool]:
+    """
+    Normalize a model number.
+
+    Args:
+        model: Model number as written (may contain '*' wildcards)
+
+    Returns:
+        (key, wildcard): upper-case key without whitespace and wildcards,
+        and whether the model had wildcards
+    """
+    model = (model or "").upper()
+    return re.sub(r"[\s*]", "", model), "*" in model
+
+
+def normalize_code(code: str) -> str:
+    """Normalize an error code ("c-10", "C 10" -> "C10")"""
+    return re.sub(r"[\s\-]", "", (code or "").upper())
+
+
+def extract_error_codes(text: str) -> List[str]:
+    """
+    Find error codes mentioned in text.
+
+    Args:
+        text: Chunk text
+
+    Returns:
+        Error codes as written (deduplicated, in order of appearance)
+    """
+    codes = []
+    for sentence in SENTENCE_SPLIT.split(text):
+        if not CODE_CONTEXT.search(sentence):
+            continue
+        codes.extend(CODE_PATTERN.findall(sentence))
+        codes.extend(
+            code
+            for pattern in (CODE_AFTER_KEYWORD, CODE_BEFORE_KEYWORD)
+            for code in pattern.findall(sentence)
+            if looks_like_code(code)
+        )
+
+    seen = set()
+    unique = []
+    for code in codes:
+        key = normalize_code(code)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(code.upper())
+    return unique
+
+
+class ManualCatalog:
+    """Model-number trie and error-code map over ingested manuals"""
+
+    def __init__(self, path: Optional[str] = None, collection_name: Optional[str] = None):
+        """
+        Initialize catalog (loading it if it was saved before).
+
+        Args:
+            path: Base directory (default: CATALOG_PATH or ./data/catalog)
+            collection_name: Collection the catalog describes (default: QDRANT_COLLECTION_NAME or fridge_manuals)
+        """
+        self.path = path or os.getenv("CATALOG_PATH", "./data/catalog")
+        self.collection_name = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "fridge_manuals")
+        self.catalog_path = os.path.join(self.path, f"{self.collection_name}.json")
+
+        # source -> {"model", "brand", "appliance_type", "chunk_ids"}
+        self.manuals: Dict[str, Dict] = {}
+        # normalized code -> {"code", "chunks": {source: [chunk_ids]}}
+        self.error_codes: Dict[str, Dict] = {}
+
+        self._trie: Dict = {}
+        self._dirty = False
+
+        if os.path.exists(self.catalog_path):
+            self._load()
+
+    @classmethod
+    def load_if_exists(cls, **kwargs) -> Optional["ManualCatalog"]:
+        """
+        Load a saved catalog.
+
+        Args:
+            **kwargs: Passed to the constructor (path, collection_name)
+
+        Returns:
+            The catalog, or None when none has been saved for the collection
+        """
+        catalog = cls(**kwargs)
+        return catalog if os.path.exists(catalog.catalog_path) else None
+
+    @classmethod
+    def from_vector_store(cls, vector_store, batch_size: int = 256, **kwargs) -> "ManualCatalog":
+        """
+        Build a catalog from the payloads of an existing collection.
+
+        Args:
+            vector_store: QdrantStore or LocalVectorStore with iter_points()
+            batch_size: Points read per request
+            **kwargs: Passed to the constructor (path)
+
+        Returns:
+            Built (not yet saved) catalog
+        """
+        kwargs.setdefault("collection_name", vector_store.collection_name)
+        catalog = cls(**kwargs)
+        catalog.add_documents(vector_store.iter_points(batch_size=batch_size, with_vectors=False))
+        return catalog
+
+    def _load(self):
+        """Read the catalog file and rebuild the trie"""
+        with open(self.catalog_path) as f:
+            data = json.load(f)
+
+        if data.get("version") != CATALOG_FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog format: {data.get('version')}")
+
+        self.manuals = data["manuals"]
+        self.error_codes = data["error_codes"]
+        self._build_trie()
+        self._dirty = False
+
+    def add_documents(self, documents: Iterable[Dict]) -> int:
+        """
+        Add chunks to the catalog.
+
+        A chunk with a different file_hash than the manual recorded for its
+        source starts a new version of that manual: the chunk IDs and error
+        code references of the earlier version are dropped.
+
+        Args:
+            documents: Iterable of dicts with 'id', 'text' and 'metadata'
+                       (chunk records, or add_documents/iter_points dicts)
+
+        Returns:
+            Number of chunks added
+        """
+        count = 0
+        for doc in documents:
+            metadata = doc.get("metadata", {})
+            source = metadata.get("source") or metadata.get("filename") or "unknown"
+            chunk_id = doc["id"]
+
+            manual = self.manuals.get(source)
+            file_hash = metadata.get("file_hash")
+            if manual is not None and file_hash and manual.get("file_hash") != file_hash:
+                self._drop_manual(source)
+                manual = None
+            if manual is None:
+                manual = self.manuals[source] = {
+                    # Points ingested before model_number/appliance_type only carry model/product_type
+                    "model": metadata.get("model_number") or metadata.get("model") or "",
+                    "brand": metadata.get("brand") or "",
+                    "appliance_type": (metadata.get("appliance_type") or metadata.get("product_type") or "").lower(),
+                    "file_hash": file_hash,
+                    "chunk_ids": []
+                }
+            if chunk_id not in manual["chunk_ids"]:
+                manual["chunk_ids"].append(chunk_id)
+
+            for code in extract_error_codes(doc.get("text", "")):
+                entry = self.error_codes.setdefault(normalize_code(code), {"code": code, "chunks": {}})
+                chunk_ids = entry["chunks"].setdefault(source, [])
+                if chunk_id not in chunk_ids:
+                    chunk_ids.append(chunk_id)
+
+            count += 1
+
+        self._dirty = self._dirty or count > 0
+        return count
+
+    def _drop_manual(self, source: str):
+        """Forget a manual and its error code references"""
+        del self.manuals[source]
+        for code in list(self.error_codes):
+            chunks = self.error_codes[code]["chunks"]
+            chunks.pop(source, None)
+            if not chunks:
+                del self.error_codes[code]
+        self._dirty = True
+
+    def _build_trie(self):
+        """Index manuals by normalized model number"""
+        self._trie = {}
+        for source, manual in self.manuals.items():
+            key, wildcard = normalize_model(manual["model"])
+            if not key:
+                continue
+            node = self._trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node.setdefault("", []).append((source, wildcard))
+        self._dirty = False
+
+    def save(self):
+        """Write the catalog (atomically)"""
+        if self._dirty:
+            self._build_trie()
+
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = self.catalog_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "version": CATALOG_FORMAT_VERSION,
+                "collection": self.collection_name,
+                "manuals": self.manuals,
+                "error_codes": self.error_codes
+            }, f)
+        os.replace(tmp_path, self.catalog_path)
+
+        print(f"✓ Saved catalog to {self.catalog_path} "
+              f"({len(self.manuals)} manuals, {len(self.error_codes)} error codes)")
+
+    @staticmethod
+    def _subtree(node: Dict) -> List[Tuple[str, bool]]:
+        """All (source, wildcard) entries at or below a trie node"""
+        entries = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for char, child in current.items():
+                if char == "":
+                    entries.extend(child)
+                else:
+                    stack.append(child)
+        return entries
+
+    def _match_model(self, key: str) -> Tuple[List[str], Optional[str]]:
+        """
+        Find manuals for a normalized model key.
+
+        Match order:
+        1. exact: same model
+        2. prefix: a catalog model is a prefix of the key and is a wildcard
+           model or at least MIN_MODEL_PREFIX long (longest wins)
+        3. partial: the key is a prefix of catalog models, or shares a prefix
+           of at least 80% of the shorter model (and MIN_MODEL_PREFIX chars)
+
+        Returns:
+            (sources, match type); ([], None) when nothing matches
+        """
+        if self._dirty:
+            self._build_trie()
+
+        node = self._trie
+        depth = 0
+        on_path = []
+        for char in key:
+            if "" in node:
+                on_path.append((depth, node[""]))
+            child = node.get(char)
+            if child is None:
+                break
+            node = child
+            depth += 1
+
+        if depth == len(key) and "" in node:
+            return [source for source, _ in node[""]], "exact"
+
+        for prefix_length, entries in reversed(on_path):
+            sources = [source for source, wildcard in entries if wildcard or prefix_length >= MIN_MODEL_PREFIX]
+            if sources:
+                return sources, "prefix"
+
+        if depth >= MIN_MODEL_PREFIX:
+            sources = []
+            for source, _ in self._subtree(node):
+                model_key, _ = normalize_model(self.manuals[source]["model"])
+                if depth >= 0.8 * min(len(key), len(model_key)):
+                    sources.append(source)
+            if sources:
+                return sources, "partial"
+
+        return [], None
+
+    def lookup_model(self, model: str, brand: Optional[str] = None) -> Optional[Dict]:
+        """
+        Resolve a model number to its manuals.
+
+        Args:
+            model: Model number as given by the user (wildcards allowed)
+            brand: Prefer manuals of this brand when several match; not a
+                   filter (a model only listed under another brand still resolves)
+
+        Returns:
+            Dict with model, brand, appliance_type (most common among the
+            matched manuals), sources, chunk_ids and match
+            ('exact' | 'prefix' | 'partial'), or None if unknown
+        """
+        key, _ = normalize_model(model)
+        if not key:
+            return None
+
+        sources, match = self._match_model(key)
+        if not sources:
+            return None
+
+        if brand:
+            same_brand = [s for s in sources if self.manuals[s]["brand"].lower() == brand.lower()]
+            sources = same_brand or sources
+
+        manuals = [self.manuals[s] for s in sources]
+        types = Counter(m["appliance_type"] for m in manuals if m["appliance_type"])
+
+        return {
+            "model": manuals[0]["model"],
+            "brand": manuals[0]["brand"],
+            "appliance_type": types.most_common(1)[0][0] if types else None,
+            "sources": sources,
+            "chunk_ids": [chunk_id for m in manuals for chunk_id in m["chunk_ids"]],
+            "match": match
+        }
+
+    def lookup_error_code(
+        self,
+        code: str,
+        model: Optional[str] = None,
+        brand: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Find the manuals and chunks that mention an error code.
+
+        Args:
+            code: Error code ("C-10", "c10", ...)
+            model: Only manuals of this model (resolved like lookup_model)
+            brand: Only manuals of this brand
+
+        Returns:
+            One dict per manual with code, source, model, brand,
+            appliance_type and chunk_ids
+        """
+        entry = self.error_codes.get(normalize_code(code))
+        if entry is None:
+            return []
+
+        allowed = None
+        if model:
+            resolved = self.lookup_model(model, brand)
+            allowed = set(resolved["sources"]) if resolved else set()
+
+        results = []
+        for source, chunk_ids in entry["chunks"].items():
+            manual = self.manuals.get(source, {})
+            if allowed is not None and source not in allowed:
+                continue
+            if brand and manual.get("brand", "").lower() != brand.lower():
+                continue
+            results.append({
+                "code": entry["code"],
+                "source": source,
+                "model": manual.get("model"),
+                "brand": manual.get("brand"),
+                "appliance_type": manual.get("appliance_type"),
+                "chunk_ids": chunk_ids
+            })
+        return results
+
+    def get_info(self) -> Dict:
+        """
+        Get catalog stats.
+
+        Returns:
+            Dictionary with manual, model and error code counts
+        """
+        return {
+            "collection": self.collection_name,
+            "manuals": len(self.manuals),
+            "models": len({normalize_model(m["model"])[0] for m in self.manuals.values()} - {""}),
+            "error_codes": len(self.error_codes),
+            "path": self.catalog_path
+        }
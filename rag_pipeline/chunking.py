@@ -4,11 +4,34 @@ Document Chunking using LlamaIndex
 Split documents into semantic chunks for embedding and retrieval.
 """
 
-from typing import List, Dict, Optional
+import uuid
+import hashlib
+from typing import List, Dict, Iterable, Iterator, Optional
 from llama_index.core import Document
 from llama_index.core.node_parser import SentenceSplitter
 from llama_index.core.schema import TextNode
 
+# Namespace for deterministic chunk point IDs (never change: existing IDs depend on it)
+CHUNK_ID_NAMESPACE = uuid.UUID("6f3a2d4e-8b1c-5e7f-9a0b-2c4d6e8f1a3b")
+
+
+def chunk_point_id(document_key: str, chunk_index: int, chunking_config: str) -> str:
+    """
+    Deterministic point ID for a chunk.
+
+    The same file chunked with the same settings always yields the same IDs,
+    so re-ingestion overwrites points instead of duplicating them.
+
+    Args:
+        document_key: File hash (or another stable identity of the document)
+        chunk_index: Ordinal of the chunk within the document
+        chunking_config: Chunker settings (see LlamaIndexChunker.chunking_config)
+
+    Returns:
+        UUID string
+    """
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{document_key}|{chunking_config}|{chunk_index}"))
+
 
 class LlamaIndexChunker:
     """Chunk documents using LlamaIndex SentenceSplitter"""
@@ -30,6 +53,9 @@ class LlamaIndexChunker:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
 
+        # Part of every chunk ID: changing the settings yields a new set of points
+        self.chunking_config = f"sentence:{chunk_size}:{chunk_overlap}:{separator!r}"
+
         # Initialize LlamaIndex sentence splitter
         self.splitter = SentenceSplitter(
             chunk_size=chunk_size,
@@ -76,8 +102,33 @@ class LlamaIndexChunker:
         Returns:
             List of TextNode objects
         """
-        all_nodes = []
+        all_nodes = list(self.iter_chunks(documents))
+
+        print(f"✓ Created {len(all_nodes)} chunks from {len(documents)} documents")
+
+        return all_nodes
+
+    def iter_chunks(
+        self,
+        documents: Iterable[Dict[str, any]]
+    ) -> Iterator[TextNode]:
+        """
+        Chunk documents lazily, one document at a time.
+
+        Use with a document generator to keep only one manual's text in
+        memory during streaming ingestion.
+
+        Each chunk gets a deterministic ID (see chunk_point_id) from the
+        document's file_hash metadata (or a hash of its text), its ordinal
+        and the chunking config; file_hash and chunk_index are added to the
+        chunk metadata.
+
+        Args:
+            documents: Iterable of document dictionaries with 'text' and 'metadata'
 
+        Yields:
+            TextNode objects
+        """
         for doc in documents:
             text = doc.get("text", "")
             metadata = doc.get("metadata", {})
@@ -88,13 +139,14 @@ class LlamaIndexChunker:
             elif "file_path" in doc:
                 metadata["source"] = doc["file_path"]
 
-            # Chunk document
-            nodes = self.chunk_text(text, metadata)
-            all_nodes.extend(nodes)
+            document_key = metadata.get("file_hash") or hashlib.md5(text.encode("utf-8")).hexdigest()
 
-        print(f"✓ Created {len(all_nodes)} chunks from {len(documents)} documents")
-
-        return all_nodes
+            # Chunk document
+            for chunk_index, node in enumerate(self.chunk_text(text, metadata)):
+                node.id_ = chunk_point_id(document_key, chunk_index, self.chunking_config)
+                node.metadata["file_hash"] = document_key
+                node.metadata["chunk_index"] = chunk_index
+                yield node
 
     def get_chunk_stats(self, nodes: List[TextNode]) -> Dict:
         """
@@ -0,0 +1,266 @@
+"""
+Shared Client Registry
+
+Process-wide, lazily created OpenAI and Qdrant clients, RAG retriever and
+manual catalog.
+All agent tools go through this registry so queries reuse pooled
+keep-alive connections instead of building new clients (and paying a
+TLS handshake) on every call.
+
+The asyncio clients (AsyncOpenAI, AsyncQdrantClient) back the async
+retrieval path (RAGRetriever.aretrieve); they are bound to the event loop
+that first uses them, i.e. the serving loop.
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Optional
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from dotenv import load_dotenv
+
+from .embedding import create_embedder
+from .vector_store import create_qdrant_client, create_async_qdrant_client, create_vector_store
+from .bm25_index import BM25Index
+from .catalog import ManualCatalog
+from .result_cache import GenerationWatcher
+
+load_dotenv()
+
+_lock = threading.RLock()
+_openai_client: Optional[OpenAI] = None
+_qdrant_client: Optional[QdrantClient] = None
+_async_openai_client: Optional[AsyncOpenAI] = None
+_async_qdrant_client: Optional[AsyncQdrantClient] = None
+_retriever = None
+_catalog: Optional[ManualCatalog] = None
+_catalog_watcher: Optional[GenerationWatcher] = None
+
+
+def _http_limits() -> httpx.Limits:
+    """Connection pool limits shared by the OpenAI and Qdrant HTTP clients"""
+    return httpx.Limits(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    )
+
+
+def get_openai_client() -> OpenAI:
+    """
+    Get the process-wide OpenAI client.
+
+    Returns:
+        OpenAI client with a keep-alive connection pool
+    """
+    global _openai_client
+
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                _openai_client = OpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    http_client=DefaultHttpxClient(limits=_http_limits())
+                )
+    return _openai_client
+
+
+def get_qdrant_client() -> QdrantClient:
+    """
+    Get the process-wide Qdrant client.
+
+    Returns:
+        Qdrant client (REST with a keep-alive connection pool, or gRPC)
+    """
+    global _qdrant_client
+
+    if _qdrant_client is None:
+        with _lock:
+            if _qdrant_client is None:
+                # Transport follows QDRANT_PREFER_GRPC; the pool limits apply to REST
+                _qdrant_client = create_qdrant_client(limits=_http_limits())
+    return _qdrant_client
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """
+    Get the process-wide asyncio OpenAI client.
+
+    Returns:
+        AsyncOpenAI client with a keep-alive connection pool
+    """
+    global _async_openai_client
+
+    if _async_openai_client is None:
+        with _lock:
+            if _async_openai_client is None:
+                _async_openai_client = AsyncOpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    http_client=DefaultAsyncHttpxClient(limits=_http_limits())
+                )
+    return _async_openai_client
+
+
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    """
+    Get the process-wide asyncio Qdrant client.
+
+    Returns:
+        AsyncQdrantClient (REST with a keep-alive connection pool, or gRPC)
+    """
+    global _async_qdrant_client
+
+    if _async_qdrant_client is None:
+        with _lock:
+            if _async_qdrant_client is None:
+                _async_qdrant_client = create_async_qdrant_client(limits=_http_limits())
+    return _async_qdrant_client
+
+
+def get_retriever():
+    """
+    Get the process-wide RAG retriever built on the shared clients.
+
+    Returns:
+        RAGRetriever instance
+    """
+    global _retriever
+
+    if _retriever is None:
+        with _lock:
+            if _retriever is None:
+                # Imported here to avoid a circular import (retriever uses this module)
+                from .retriever import RAGRetriever
+
+                backend = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+                if backend == "openai":
+                    embedder = create_embedder(
+                        backend,
+                        client=get_openai_client(),
+                        async_client=get_async_openai_client()
+                    )
+                else:
+                    embedder = create_embedder(backend)
+
+                # The shared Qdrant client is only created for the qdrant backend
+                vector_store_kwargs = {"embedding_dim": embedder.embedding_dim}
+                if os.getenv("VECTOR_STORE_BACKEND", "qdrant").lower() == "qdrant":
+                    vector_store_kwargs["client"] = get_qdrant_client()
+                    vector_store_kwargs["async_client"] = get_async_qdrant_client()
+                vector_store = create_vector_store(**vector_store_kwargs)
+
+                # BM25 fallback/fusion index, when ingestion has saved one (the
+                # retriever reloads it, or picks it up, after a re-ingestion)
+                lexical_index = BM25Index.load_if_exists(collection_name=vector_store.collection_name)
+
+                _retriever = RAGRetriever(
+                    embedder=embedder,
+                    vector_store=vector_store,
+                    lexical_index=lexical_index
+                )
+    return _retriever
+
+
+def get_catalog() -> Optional[ManualCatalog]:
+    """
+    Get the process-wide manual catalog.
+
+    Loaded from disk on first use and reloaded when ingestion bumps the
+    collection generation (see result_cache.bump_generation), so a running
+    agent resolves models against the manuals ingested since it started.
+
+    Returns:
+        ManualCatalog, or None when ingestion has not saved one
+    """
+    global _catalog, _catalog_watcher
+
+    with _lock:
+        if _catalog_watcher is None:
+            # Watch before loading so an ingestion finishing meanwhile is not missed
+            _catalog_watcher = GenerationWatcher()
+            _catalog = ManualCatalog.load_if_exists()
+        else:
+            _, changed = _catalog_watcher.check()
+            if changed:
+                _catalog = ManualCatalog.load_if_exists()
+        return _catalog
+
+
+def warmup(embed_probe: bool = True) -> Dict:
+    """
+    Create the shared clients and open their connections ahead of the first query.
+
+    Args:
+        embed_probe: Also send one short embedding request so the OpenAI
+                     connection (and query cache) is warm
+
+    Returns:
+        Dictionary with per-step timings in milliseconds
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    retriever = get_retriever()
+    timings["init_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    retriever.vector_store.get_collection_info()
+    timings["qdrant_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    get_catalog()
+    timings["catalog_ms"] = (time.perf_counter() - start) * 1000
+
+    if embed_probe:
+        start = time.perf_counter()
+        retriever.embedder.embed_text("refrigerator not cooling")
+        timings["embedding_ms"] = (time.perf_counter() - start) * 1000
+
+    return timings
+
+
+async def ashutdown():
+    """Close the shared asyncio clients on the serving loop, then the rest (see shutdown())"""
+    global _async_openai_client, _async_qdrant_client
+
+    async_openai_client, async_qdrant_client = _async_openai_client, _async_qdrant_client
+    _async_openai_client = None
+    _async_qdrant_client = None
+
+    if async_openai_client is not None:
+        await async_openai_client.close()
+    if async_qdrant_client is not None:
+        await async_qdrant_client.close()
+
+    shutdown()
+
+
+def shutdown():
+    """
+    Close the shared clients and drop the registry (safe to call more than once).
+
+    Asyncio clients still registered are dropped without closing them; use
+    ashutdown() from the event loop to close them cleanly.
+    """
+    global _openai_client, _qdrant_client, _async_openai_client, _async_qdrant_client
+    global _retriever, _catalog, _catalog_watcher
+
+    with _lock:
+        if _retriever is not None:
+            cache = getattr(_retriever.embedder, "cache", None)
+            if cache is not None:
+                cache.close()
+        if _openai_client is not None:
+            _openai_client.close()
+        if _qdrant_client is not None:
+            _qdrant_client.close()
+
+        _openai_client = None
+        _qdrant_client = None
+        _async_openai_client = None
+        _async_qdrant_client = None
+        _retriever = None
+        _catalog = None
+        _catalog_watcher = None
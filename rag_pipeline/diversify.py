@@ -0,0 +1,246 @@
+"""
+Result Diversification
+
+Post-retrieval stage that keeps near-identical chunks out of the top-k
+(and out of the LLM context):
+- Duplicates: chunks with the same normalized text (hash), or whose word
+  shingles overlap above a Jaccard threshold (chunk overlap, the same
+  manual text repeated across model variants). The best-ranked copy is
+  kept and lists the dropped copies under 'duplicates'.
+- Maximal marginal relevance (MMR): results are re-ordered so each pick
+  trades relevance to the query against similarity to the picks before
+  it, using the vectors returned by the search (with_vectors=True).
+  Relevance follows the fused ranking when there is one, and exact
+  model number / error code matches are always selected
+"""
+
+import re
+import zlib
+import hashlib
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def text_fingerprint(text: str) -> str:
+    """Hash of the lowercased, whitespace-normalized text"""
+    return hashlib.md5(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, size: int = 5) -> set:
+    """
+    Hashed word n-grams of a text.
+
+    Args:
+        text: Chunk text
+        size: Words per shingle (texts shorter than this give one shingle)
+
+    Returns:
+        Set of shingle hashes
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+def jaccard(a: set, b: set) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def dedupe_results(
+    results: List[Dict],
+    threshold: float = 0.8,
+    shingle_size: int = 5
+) -> Tuple[List[Dict], int]:
+    """
+    Drop results that repeat the text of a better-ranked result.
+
+    Args:
+        results: Search results, best first
+        threshold: Shingle Jaccard similarity at which two chunks count as duplicates
+        shingle_size: Words per shingle
+
+    Returns:
+        Tuple of (kept results in their original order, number dropped).
+        Kept results that absorbed duplicates get a 'duplicates' list of
+        {"id", "score", "metadata"} for the dropped copies, so model
+        variants sharing the text stay visible.
+    """
+    kept: List[Dict] = []
+    kept_fingerprints: Dict[str, int] = {}
+    kept_shingles: List[set] = []
+    dropped = 0
+
+    for result in results:
+        text = result.get("text", "")
+        fingerprint = text_fingerprint(text)
+        match = kept_fingerprints.get(fingerprint)
+
+        result_shingles = shingles(text, shingle_size)
+        if match is None:
+            for i, other in enumerate(kept_shingles):
+                if jaccard(result_shingles, other) >= threshold:
+                    match = i
+                    break
+
+        if match is None:
+            kept_fingerprints[fingerprint] = len(kept)
+            kept_shingles.append(result_shingles)
+            kept.append(result)
+            continue
+
+        dropped += 1
+        kept[match].setdefault("duplicates", []).append({
+            "id": result.get("id"),
+            "score": result.get("score"),
+            "metadata": result.get("metadata", {})
+        })
+
+    return kept, dropped
+
+
+def relevance_scores(results: List[Dict]) -> np.ndarray:
+    """
+    Relevance of each result for MMR.
+
+    Fused results (hybrid search, fusion mode) use their RRF 'fusion_score'
+    scaled so the best result is 1.0, which keeps the fused ranking (and
+    the exact matches it promotes) instead of falling back to the cosine;
+    other results use their 'score'.
+
+    Args:
+        results: Search results
+
+    Returns:
+        float32 relevance per result
+    """
+    if any("fusion_score" in r for r in results):
+        fused = np.array([r.get("fusion_score", 0.0) for r in results], dtype=np.float32)
+        top = fused.max()
+        return fused / top if top > 0 else fused
+    return np.array([r.get("score", 0.0) for r in results], dtype=np.float32)
+
+
+def similarity_matrix(results: List[Dict], shingle_size: int = 5) -> Optional[np.ndarray]:
+    """
+    Pairwise similarity of results for MMR redundancy.
+
+    Cosine similarity of the result vectors; pairs where a result has no
+    'vector' (e.g. BM25-only hits in fusion mode) use the shingle Jaccard
+    similarity of their texts instead, so those hits are penalized too.
+
+    Args:
+        results: Search results (with 'vector' from a with_vectors search)
+        shingle_size: Words per shingle for the text fallback
+
+    Returns:
+        Square similarity matrix, or None if no result has a vector
+    """
+    vectors = [r.get("vector") for r in results]
+    if all(v is None for v in vectors):
+        return None
+
+    dim = next(len(v) for v in vectors if v is not None)
+    matrix = np.zeros((len(results), dim), dtype=np.float32)
+    for i, vector in enumerate(vectors):
+        if vector is not None:
+            vector = np.asarray(vector, dtype=np.float32).ravel()
+            norm = np.linalg.norm(vector)
+            matrix[i] = vector / norm if norm > 0 else vector
+    similarity = matrix @ matrix.T
+
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        result_shingles = [shingles(r.get("text", ""), shingle_size) for r in results]
+        for i in missing:
+            for j in range(len(results)):
+                similarity[i, j] = similarity[j, i] = (
+                    1.0 if i == j else jaccard(result_shingles[i], result_shingles[j])
+                )
+    return similarity
+
+
+def mmr(
+    results: List[Dict],
+    lambda_mult: float = 0.7,
+    top_k: Optional[int] = None
+) -> List[Dict]:
+    """
+    Re-order results by maximal marginal relevance.
+
+    Relevance comes from relevance_scores() (fused rank when present, else
+    the cosine 'score'); redundancy is the highest similarity to an already
+    selected result (see similarity_matrix()). Results marked 'code_match'
+    (exact model number / error code hits of hybrid search) are selected
+    first, in their incoming order.
+
+    Args:
+        results: Search results (with 'vector' from a with_vectors search)
+        lambda_mult: 1.0 = pure relevance order, 0.0 = pure diversity
+        top_k: Number of results to select (default: all)
+
+    Returns:
+        Selected results in MMR order
+    """
+    top_k = len(results) if top_k is None else min(top_k, len(results))
+    pinned = [i for i, r in enumerate(results) if r.get("code_match")][:top_k]
+    similarity = similarity_matrix(results) if top_k > 1 else None
+    if similarity is None:
+        rest = [r for i, r in enumerate(results) if i not in pinned]
+        return [results[i] for i in pinned] + rest[:top_k - len(pinned)]
+
+    relevance = relevance_scores(results)
+    remaining = np.ones(len(results), dtype=bool)
+    selected = pinned or [int(np.argmax(relevance))]
+    remaining[selected] = False
+    redundancy = similarity[selected].max(axis=0)
+
+    while len(selected) < top_k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~remaining] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        remaining[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+
+    return [results[i] for i in selected]
+
+
+def diversify_results(
+    results: List[Dict],
+    lambda_mult: float = 0.7,
+    dedup_threshold: float = 0.8,
+    top_k: Optional[int] = None
+) -> List[Dict]:
+    """
+    Remove duplicate chunks, then select the rest by MMR.
+
+    Pass a candidate pool larger than top_k so dropped duplicates are
+    replaced and MMR has alternatives to choose from. MMR needs result
+    vectors; without them (BM25 results) the first top_k deduplicated
+    results are kept. 'vector' entries are removed from the returned
+    results.
+
+    Args:
+        results: Candidate search results, best first
+        lambda_mult: MMR relevance/diversity trade-off
+        dedup_threshold: Shingle Jaccard threshold for duplicates
+        top_k: Number of results to select (default: all)
+
+    Returns:
+        Diversified results
+    """
+    results, _ = dedupe_results(results, threshold=dedup_threshold)
+    results = mmr(results, lambda_mult=lambda_mult, top_k=top_k)
+
+    for result in results:
+        result.pop("vector", None)
+    return results
@@ -5,14 +5,52 @@ Create vector embeddings for text chunks using OpenAI's embedding models.
 """
 
 import os
-from typing import List, Dict
-from openai import OpenAI
+import json
+import asyncio
+from datetime import datetime
+from itertools import islice
+from typing import List, Dict, Callable, Iterable, Iterator, Optional, Tuple, Protocol, runtime_checkable
+import numpy as np
+from openai import OpenAI, AsyncOpenAI
 from llama_index.core.schema import TextNode
 from dotenv import load_dotenv
-import time
+
+from .embedding_cache import EmbeddingCache
+from .async_embedding import ConcurrentEmbeddingEngine, decode_embeddings, normalize_rows
+from .batching import TokenBudgetBatcher
 
 load_dotenv()
 
+# Full output dimension of OpenAI embedding models
+MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536
+}
+
+
+@runtime_checkable
+class Embedder(Protocol):
+    """Common surface of all embedding backends (see create_embedder)"""
+
+    model: str
+    embedding_dim: int
+
+    def embed_text(self, text: str) -> np.ndarray:
+        ...
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        ...
+
+    def embed_nodes(self, nodes: List[TextNode]) -> List[Dict]:
+        ...
+
+    def iter_embed_nodes(self, nodes: Iterable[TextNode]) -> Iterator[Dict]:
+        ...
+
+    def get_embedding_stats(self, embeddings: List[np.ndarray]) -> Dict:
+        ...
+
 
 class OpenAIEmbedder:
     """Generate embeddings using OpenAI API"""
@@ -21,7 +59,15 @@ class OpenAIEmbedder:
         self,
         api_key: str = None,
         model: str = None,
-        batch_size: int = 100
+        batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        dimensions: Optional[int] = None,
+        cache: Optional[EmbeddingCache] = None,
+        use_cache: Optional[bool] = None,
+        client: Optional[OpenAI] = None,
+        async_client: Optional[AsyncOpenAI] = None,
+        query_max_retries: Optional[int] = None
     ):
         """
         Initialize OpenAI embedder.
@@ -29,19 +75,81 @@ class OpenAIEmbedder:
         Args:
             api_key: OpenAI API key
             model: Embedding model (default: text-embedding-3-small)
-            batch_size: Number of texts to embed per API call
+            batch_size: Maximum number of texts per API call (default: EMBEDDING_MAX_BATCH_ITEMS or 512)
+            max_batch_tokens: Token budget per API call (default: EMBEDDING_MAX_BATCH_TOKENS or 100000)
+            max_concurrency: Maximum batches in flight (default: EMBEDDING_MAX_CONCURRENCY or 8)
+            dimensions: Reduced output dimension via the API 'dimensions' parameter
+                        (default: OPENAI_EMBEDDING_DIMENSIONS or full size; 0 forces full size)
+            cache: Embedding cache instance (created from env if not provided)
+            use_cache: Enable the persistent embedding cache (default: EMBEDDING_CACHE_ENABLED or True)
+            client: Shared OpenAI client (see rag_pipeline.clients); a new one is created if not provided
+            async_client: Shared asyncio OpenAI client for aembed_text(); created on first use if not provided
+            query_max_retries: Client retries for query embeddings (embed_text, aembed_text,
+                               embed_queries) before the error is raised
+                               (default: QUERY_EMBEDDING_MAX_RETRIES or 1)
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.model = model or os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
-        self.batch_size = batch_size
+
+        # Requests are packed by local token count, bounded by item and token budgets
+        self.batcher = TokenBudgetBatcher(
+            model=self.model,
+            max_tokens=max_batch_tokens,
+            max_items=batch_size
+        )
+        self.batch_size = self.batcher.max_items
+
+        # Persistent (model, text hash) -> vector cache checked before every API call
+        if use_cache is None:
+            use_cache = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.cache = cache or (EmbeddingCache() if use_cache else None)
 
         # Initialize OpenAI client
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = client or OpenAI(api_key=self.api_key)
+        self.async_client = async_client
+
+        # Queries fail fast so the retriever can fall back to BM25 right away;
+        # the copies share the connection pools of the clients above
+        if query_max_retries is None:
+            query_max_retries = int(os.getenv("QUERY_EMBEDDING_MAX_RETRIES", "1"))
+        self.query_max_retries = query_max_retries
+        self.query_client = self.client.with_options(max_retries=query_max_retries)
+        self._async_query_client = None
+
+        # Matryoshka-style reduced output (text-embedding-3-* only)
+        full_dim = MODEL_DIMENSIONS.get(self.model, 1536)
+        if dimensions is None and os.getenv("OPENAI_EMBEDDING_DIMENSIONS"):
+            dimensions = int(os.getenv("OPENAI_EMBEDDING_DIMENSIONS"))
+        if dimensions is not None and (dimensions <= 0 or dimensions >= full_dim):
+            dimensions = None
+        if dimensions is not None and not self.model.startswith("text-embedding-3"):
+            raise ValueError(f"{self.model} does not support reduced dimensions")
+        self.dimensions = dimensions
+
+        # Actual dimension of the vectors this embedder returns
+        self.embedding_dim = dimensions or full_dim
+
+        # Cache entries must not mix vectors of different sizes
+        self.cache_model = f"{self.model}@{dimensions}" if dimensions else self.model
+        self._request_params = {"model": self.model, "encoding_format": "base64"}
+        if dimensions:
+            self._request_params["dimensions"] = dimensions
+
+        # Concurrent engine for multi-batch workloads (ingestion)
+        self.max_concurrency = max_concurrency or int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "8"))
+        self.engine = ConcurrentEmbeddingEngine(
+            model=self.model,
+            embedding_dim=self.embedding_dim,
+            dimensions=self.dimensions,
+            api_key=self.api_key,
+            max_concurrency=self.max_concurrency
+        )
 
-        # Embedding dimension (text-embedding-3-small = 1536)
-        self.embedding_dim = 1536 if "small" in self.model else 3072
+        # Texts dropped by the last embed_texts call, and the report written for them
+        self.last_failures: List[Dict] = []
+        self.last_failure_report: Optional[str] = None
 
-    def embed_text(self, text: str) -> List[float]:
+    def embed_text(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text.
 
@@ -49,111 +157,472 @@ class OpenAIEmbedder:
             text: Input text to embed
 
         Returns:
-            List of floats (embedding vector)
+            float32 embedding vector
         """
-        response = self.client.embeddings.create(
-            model=self.model,
-            input=text
-        )
+        if self.cache is not None:
+            cached = self.cache.get(self.cache_model, text)
+            if cached is not None:
+                return cached
+
+        response = self.query_client.embeddings.create(input=text, **self._request_params)
+        embedding = decode_embeddings(response.data, normalize=bool(self.dimensions))[0]
+
+        if self.cache is not None:
+            self.cache.put(self.cache_model, text, embedding)
+
+        return embedding
+
+    async def aembed_text(self, text: str) -> np.ndarray:
+        """
+        Generate embedding for a single text without blocking the event loop.
 
-        return response.data[0].embedding
+        Args:
+            text: Input text to embed
 
-    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        Returns:
+            float32 embedding vector
+        """
+        if self.cache is not None:
+            # SQLite reads update last_access and may wait on an ingestion's write lock
+            cached = await asyncio.to_thread(self.cache.get, self.cache_model, text)
+            if cached is not None:
+                return cached
+
+        if self._async_query_client is None:
+            if self.async_client is None:
+                self.async_client = AsyncOpenAI(api_key=self.api_key)
+            self._async_query_client = self.async_client.with_options(max_retries=self.query_max_retries)
+
+        response = await self._async_query_client.embeddings.create(input=text, **self._request_params)
+        embedding = decode_embeddings(response.data, normalize=bool(self.dimensions))[0]
+
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put, self.cache_model, text, embedding)
+
+        return embedding
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for multiple texts in batches.
 
+        Texts that still fail after retries and batch bisection get NaN rows
+        and are listed in self.last_failures.
+
         Args:
             texts: List of texts to embed
 
         Returns:
-            List of embedding vectors
+            float32 matrix of shape (len(texts), embedding_dim)
         """
-        all_embeddings = []
-        total_batches = (len(texts) + self.batch_size - 1) // self.batch_size
+        return self._embed_cached(texts, self._embed_uncached)
 
-        for i in range(0, len(texts), self.batch_size):
-            batch = texts[i:i + self.batch_size]
-            batch_num = i // self.batch_size + 1
-
-            print(f"Embedding batch {batch_num}/{total_batches} ({len(batch)} texts)...")
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for search queries, failing fast.
 
-            try:
-                # Create embeddings for batch
-                response = self.client.embeddings.create(
-                    model=self.model,
-                    input=batch
-                )
+        Unlike embed_texts, requests are not retried with backoff or
+        bisected through the concurrent engine: the client retries at most
+        query_max_retries times, then the error is raised so the caller can
+        fall back (e.g. to the BM25 index) without waiting.
 
-                # Extract embeddings
-                embeddings = [data.embedding for data in response.data]
-                all_embeddings.extend(embeddings)
+        Args:
+            texts: Query texts
 
-                # Rate limiting - small pause between batches
-                if i + self.batch_size < len(texts):
-                    time.sleep(0.5)
+        Returns:
+            float32 matrix of shape (len(texts), embedding_dim)
+        """
+        return self._embed_cached(texts, self._embed_queries_uncached)
 
-            except Exception as e:
-                print(f"✗ Error embedding batch {batch_num}: {e}")
-                # Add None placeholders for failed batch
-                all_embeddings.extend([None] * len(batch))
+    def _embed_cached(
+        self,
+        texts: List[str],
+        embed_uncached: Callable[[List[str]], Tuple[np.ndarray, Dict[int, str]]]
+    ) -> np.ndarray:
+        """Serve texts from the embedding cache and embed the misses with embed_uncached"""
+        if self.cache is None:
+            all_embeddings, errors = embed_uncached(texts)
+            self.last_failures = [
+                {"index": i, "error": error} for i, error in sorted(errors.items())
+            ]
+            return all_embeddings
+
+        # Serve cached vectors and only send the misses to the API
+        cached = self.cache.get_many(self.cache_model, texts)
+        all_embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        missing = {}
+        for i, (text, embedding) in enumerate(zip(texts, cached)):
+            if embedding is None:
+                missing.setdefault(text, []).append(i)
+            else:
+                all_embeddings[i] = embedding
+        del cached
+
+        # Only report for ingestion-sized calls; query batches stay quiet
+        if len(texts) > self.batch_size:
+            print(f"Embedding cache: {len(texts) - sum(len(v) for v in missing.values())}/{len(texts)} hits")
+
+        self.last_failures = []
+        if missing:
+            missing_texts = list(missing)
+            new_embeddings, errors = embed_uncached(missing_texts)
+            self.cache.put_many(self.cache_model, missing_texts, new_embeddings)
+
+            for j, text in enumerate(missing_texts):
+                rows = missing[text]
+                all_embeddings[rows] = new_embeddings[j]
+                if j in errors:
+                    self.last_failures.extend({"index": i, "error": errors[j]} for i in rows)
+
+            self.last_failures.sort(key=lambda f: f["index"])
 
-        print(f"✓ Embedded {len(all_embeddings)} texts")
         return all_embeddings
 
-    def embed_nodes(self, nodes: List[TextNode]) -> List[Dict]:
+    def _embed_uncached(self, texts: List[str]) -> Tuple[np.ndarray, Dict[int, str]]:
+        """
+        Embed texts through the OpenAI API in batches.
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            Tuple of (float32 matrix with NaN rows for dropped texts,
+            mapping of dropped text index to error message)
+        """
+        batches = self.batcher.pack(texts)
+        all_embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        errors = {}
+
+        # A single batch (e.g. a query) goes straight through the pooled sync client
+        if len(batches) == 1:
+            embeddings = self._embed_batch(batches[0]["texts"])
+            if embeddings is not None:
+                all_embeddings[batches[0]["indices"]] = embeddings
+                return all_embeddings, errors
+
+        if not batches:
+            return all_embeddings, errors
+
+        batch_stats = self.batcher.get_batch_stats(batches)
+        print(f"Packed {batch_stats['texts']} texts into {batch_stats['requests']} requests "
+              f"(avg {batch_stats['avg_tokens_per_request']:.0f} tokens/request)")
+
+        done = []
+
+        def report(index: int, batch_len: int):
+            done.append(index)
+            print(f"Embedded batch {len(done)}/{len(batches)} "
+                  f"({batch_len} texts, {batches[index]['tokens']} tokens)")
+
+        # Failed requests are retried with backoff, then bisected down to the bad texts
+        batch_results = self.engine.embed_batches(
+            [batch["texts"] for batch in batches],
+            on_batch_done=report
+        )
+
+        # Copy each batch matrix into place and release it straight away
+        for batch in batches:
+            all_embeddings[batch["indices"]] = batch_results.pop(0)
+
+        for failure in self.engine.last_failures:
+            errors[batches[failure["batch"]]["indices"][failure["position"]]] = failure["error"]
+
+        print(f"✓ Embedded {len(texts) - len(errors)}/{len(texts)} texts "
+              f"({self.engine.last_stats['tokens']} tokens billed)")
+        if errors:
+            print(f"✗ Dropped {len(errors)} texts after retries and batch splitting")
+        if self.engine.last_stats.get("rate_limited"):
+            print(f"  Rate limited {self.engine.last_stats['rate_limited']} times, "
+                  f"final concurrency {self.engine.last_stats['final_concurrency']}")
+        return all_embeddings, errors
+
+    def _embed_queries_uncached(self, texts: List[str]) -> Tuple[np.ndarray, Dict[int, str]]:
+        """
+        Embed query texts with the fail-fast client (errors are raised).
+
+        Returns:
+            Tuple of (float32 matrix, empty error mapping)
+        """
+        all_embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        for batch in self.batcher.pack(texts):
+            response = self.query_client.embeddings.create(input=batch["texts"], **self._request_params)
+            all_embeddings[batch["indices"]] = decode_embeddings(response.data, normalize=bool(self.dimensions))
+        return all_embeddings, {}
+
+    def _embed_batch(self, batch: List[str]) -> Optional[np.ndarray]:
+        """
+        Embed one batch with the synchronous client.
+
+        Args:
+            batch: Texts for a single API request
+
+        Returns:
+            float32 matrix, or None if the request failed
+            (the caller then retries it through the engine)
+        """
+        try:
+            response = self.client.embeddings.create(input=batch, **self._request_params)
+            return decode_embeddings(response.data, normalize=bool(self.dimensions))
+
+        except Exception as e:
+            print(f"✗ Error embedding batch, retrying: {e}")
+            return None
+
+    def embed_nodes(
+        self,
+        nodes: List[TextNode],
+        failure_report_path: Optional[str] = None
+    ) -> List[Dict]:
         """
         Embed TextNode objects and return with metadata.
 
+        Nodes that cannot be embedded are left out and written to a JSON
+        failure report so they can be re-ingested on their own.
+
         Args:
             nodes: List of TextNode objects
+            failure_report_path: Where to write the dropped-chunk report
+                                 (default: EMBEDDING_FAILURE_REPORT_DIR/embedding_failures_<timestamp>.json)
 
         Returns:
-            List of dictionaries with text, embedding, and metadata
+            List of dictionaries with text, embedding (float32 row view into
+            one shared matrix), and metadata
         """
         # Extract texts from nodes
         texts = [node.text for node in nodes]
 
         # Generate embeddings
         embeddings = self.embed_texts(texts)
+        dropped = {f["index"] for f in self.last_failures}
 
         # Combine with metadata
         embedded_docs = []
-        for node, embedding in zip(nodes, embeddings):
-            if embedding is not None:
+        for i, node in enumerate(nodes):
+            if i not in dropped:
                 embedded_docs.append({
                     "id": node.node_id,
                     "text": node.text,
-                    "embedding": embedding,
+                    "embedding": embeddings[i],
                     "metadata": node.metadata
                 })
 
+        self.last_failure_report = None
+        if self.last_failures:
+            self.last_failure_report = write_failure_report(
+                [self._failure_entry(nodes[f["index"]], f["error"]) for f in self.last_failures],
+                path=failure_report_path,
+                model=self.model
+            )
+
         return embedded_docs
 
-    def get_embedding_stats(self, embeddings: List[List[float]]) -> Dict:
+    def iter_embed_nodes(
+        self,
+        nodes: Iterable[TextNode],
+        window_size: Optional[int] = None,
+        failure_report_path: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """
+        Embed TextNode objects lazily, one window of nodes at a time.
+
+        Memory stays bounded by the window (texts + one float32 matrix)
+        instead of the whole corpus; feed the result straight into
+        QdrantStore.add_documents. Dropped nodes are collected across windows
+        and written to one failure report when the iterator is exhausted.
+
+        Args:
+            nodes: Iterable of TextNode objects (e.g. LlamaIndexChunker.iter_chunks)
+            window_size: Nodes embedded per window; large enough to keep
+                         max_concurrency batches busy (default: EMBEDDING_STREAM_WINDOW
+                         or batch_size * max_concurrency)
+            failure_report_path: Where to write the dropped-chunk report
+
+        Yields:
+            Dictionaries with id, text, embedding (float32 row view), and metadata
+        """
+        window_size = window_size or int(
+            os.getenv("EMBEDDING_STREAM_WINDOW", str(self.batch_size * self.max_concurrency))
+        )
+        iterator = iter(nodes)
+        failures = []
+        offset = 0
+
+        while True:
+            window = list(islice(iterator, window_size))
+            if not window:
+                break
+
+            embeddings = self.embed_texts([node.text for node in window])
+            dropped = {f["index"] for f in self.last_failures}
+
+            for f in self.last_failures:
+                failures.append({
+                    "index": offset + f["index"],
+                    "error": f["error"],
+                    "entry": self._failure_entry(window[f["index"]], f["error"])
+                })
+
+            for i, node in enumerate(window):
+                if i not in dropped:
+                    yield {
+                        "id": node.node_id,
+                        "text": node.text,
+                        "embedding": embeddings[i],
+                        "metadata": node.metadata
+                    }
+
+            offset += len(window)
+
+        self.last_failures = [{"index": f["index"], "error": f["error"]} for f in failures]
+        self.last_failure_report = None
+        if failures:
+            self.last_failure_report = write_failure_report(
+                [f["entry"] for f in failures],
+                path=failure_report_path,
+                model=self.model
+            )
+
+    @staticmethod
+    def _failure_entry(node: TextNode, error: str) -> Dict:
+        """Failure report entry for a node that could not be embedded"""
+        return {
+            "id": node.node_id,
+            "source": node.metadata.get("source"),
+            "error": error,
+            "text_preview": node.text[:200]
+        }
+
+    def get_embedding_stats(self, embeddings: List[np.ndarray]) -> Dict:
         """
         Get statistics about embeddings.
 
         Args:
-            embeddings: List of embedding vectors
+            embeddings: Embedding vectors (list of vectors or a matrix)
 
         Returns:
             Dictionary with embedding statistics
         """
-        valid_embeddings = [e for e in embeddings if e is not None]
+        stats = embedding_stats(embeddings)
+        stats["model"] = self.model
+        stats["requested_dimensions"] = self.dimensions
+        stats["cache"] = self.cache.get_stats() if self.cache is not None else None
+        return stats
 
-        return {
-            "total": len(embeddings),
-            "valid": len(valid_embeddings),
-            "failed": len(embeddings) - len(valid_embeddings),
-            "dimension": len(valid_embeddings[0]) if valid_embeddings else 0,
-            "model": self.model
-        }
+
+def embedding_stats(embeddings: List[np.ndarray]) -> Dict:
+    """
+    Count valid / failed vectors and report their dimension and memory.
+
+    Args:
+        embeddings: Embedding vectors (list of vectors or a matrix); None or
+                    NaN rows count as failed
+
+    Returns:
+        Dictionary with embedding statistics
+    """
+    valid_embeddings = [
+        e for e in embeddings
+        if e is not None and not np.isnan(e).any()
+    ]
+
+    return {
+        "total": len(embeddings),
+        "valid": len(valid_embeddings),
+        "failed": len(embeddings) - len(valid_embeddings),
+        "dimension": len(valid_embeddings[0]) if valid_embeddings else 0,
+        "bytes": sum(np.asarray(e).nbytes for e in valid_embeddings)
+    }
+
+
+def write_failure_report(
+    dropped: List[Dict],
+    path: Optional[str] = None,
+    model: Optional[str] = None
+) -> str:
+    """
+    Write a JSON report of chunks that could not be embedded.
+
+    Args:
+        dropped: List of dicts describing each dropped chunk ('id', 'error', ...)
+        path: Report file path (default: timestamped file in EMBEDDING_FAILURE_REPORT_DIR)
+        model: Embedding model used
+
+    Returns:
+        Path of the written report
+    """
+    if path is None:
+        report_dir = os.getenv("EMBEDDING_FAILURE_REPORT_DIR", "./data/reports")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(report_dir, f"embedding_failures_{timestamp}.json")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "model": model,
+        "dropped_count": len(dropped),
+        "dropped_ids": [d["id"] for d in dropped],
+        "dropped": dropped
+    }
+
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"✗ {len(dropped)} chunks could not be embedded - report written to {path}")
+    return path
+
+
+def truncate_embeddings(embeddings: np.ndarray, dimensions: int) -> np.ndarray:
+    """
+    Shorten Matryoshka embeddings locally and re-normalize them.
+
+    For text-embedding-3 models this matches what the API returns for the
+    same 'dimensions' value, so one full-size embedding run can be evaluated
+    at several sizes.
+
+    Args:
+        embeddings: float32 matrix of full-size embeddings
+        dimensions: Target dimension
+
+    Returns:
+        New float32 matrix of shape (n, dimensions)
+    """
+    return normalize_rows(np.array(embeddings[:, :dimensions], dtype=np.float32))
+
+
+def create_embedder(backend: Optional[str] = None, **kwargs) -> Embedder:
+    """
+    Create the embedding backend selected by config.
+
+    Args:
+        backend: 'openai', 'hashing' or 'sentence-transformers'
+                 (default: EMBEDDING_BACKEND or 'openai')
+        **kwargs: Passed to the backend constructor
+
+    Returns:
+        Embedder instance
+    """
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "openai")).lower()
+
+    if backend == "openai":
+        return OpenAIEmbedder(**kwargs)
+
+    # Local backends are imported lazily so their optional dependencies stay optional
+    from .local_embedding import HashingEmbedder, SentenceTransformerEmbedder
+
+    if backend == "hashing":
+        return HashingEmbedder(**kwargs)
+    if backend in ("sentence-transformers", "sentence_transformers", "local"):
+        return SentenceTransformerEmbedder(**kwargs)
+
+    raise ValueError(f"Unsupported embedding backend: {backend}")
 
 
 def embed_chunks(
     chunks: List[TextNode],
     model: str = "text-embedding-3-small",
-    batch_size: int = 100
+    batch_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    dimensions: Optional[int] = None
 ) -> List[Dict]:
     """
     Convenience function to embed chunks.
@@ -161,12 +630,19 @@ def embed_chunks(
     Args:
         chunks: List of TextNode objects
         model: OpenAI embedding model
-        batch_size: Batch size for API calls
+        batch_size: Maximum texts per API call
+        max_concurrency: Maximum batches in flight
+        dimensions: Reduced output dimension (None = full size)
 
     Returns:
         List of dictionaries with embeddings
     """
-    embedder = OpenAIEmbedder(model=model, batch_size=batch_size)
+    embedder = OpenAIEmbedder(
+        model=model,
+        batch_size=batch_size,
+        max_concurrency=max_concurrency,
+        dimensions=dimensions
+    )
     return embedder.embed_nodes(chunks)
 
 
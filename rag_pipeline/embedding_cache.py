@@ -0,0 +1,251 @@
+"""
+Persistent Embedding Cache
+
+Disk-backed, content-addressed cache for embedding vectors so that
+re-ingesting unchanged chunks and repeated user queries skip the
+OpenAI round trip.
+"""
+
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+import time
+import unicodedata
+from typing import List, Dict, Optional, Sequence
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text before hashing.
+
+    Only changes that cannot affect the embedding are applied: unicode
+    NFC normalization, whitespace collapsing and trimming.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Normalized text
+    """
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EmbeddingCache:
+    """SQLite-backed LRU cache of embeddings keyed by (model, text hash)"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None
+    ):
+        """
+        Initialize embedding cache.
+
+        Args:
+            path: SQLite database file (default: EMBEDDING_CACHE_PATH or
+                  ./data/cache/embeddings.sqlite)
+            max_entries: Maximum number of cached vectors before least
+                         recently used entries are evicted
+        """
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", "./data/cache/embeddings.sqlite")
+        self.max_entries = max_entries or int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """
+        Build the content-addressed cache key for a text.
+
+        Args:
+            model: Embedding model name
+            text: Input text
+
+        Returns:
+            Hex digest identifying (model, normalized text)
+        """
+        digest = hashlib.sha256()
+        digest.update(model.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(normalize_text(text).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up embeddings for several texts.
+
+        Args:
+            model: Embedding model name
+            texts: Texts to look up
+
+        Returns:
+            List of float32 vectors aligned with texts; None where the text is not cached
+        """
+        keys = [self.make_key(model, text) for text in texts]
+        found = {}
+
+        with self._lock:
+            unique_keys = list(dict.fromkeys(keys))
+            # SQLite limits the number of bound parameters per statement
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            results = [found.get(key) for key in keys]
+            hits = sum(1 for r in results if r is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+
+        return results
+
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        """
+        Look up the embedding for a single text.
+
+        Args:
+            model: Embedding model name
+            text: Input text
+
+        Returns:
+            Cached embedding or None
+        """
+        return self.get_many(model, [text])[0]
+
+    def put_many(
+        self,
+        model: str,
+        texts: Sequence[str],
+        embeddings: Sequence[Optional[np.ndarray]]
+    ):
+        """
+        Store embeddings for several texts.
+
+        Args:
+            model: Embedding model name
+            texts: Texts that were embedded
+            embeddings: Embedding vectors aligned with texts (None or NaN entries are skipped)
+        """
+        now = time.time()
+        rows = []
+        for text, embedding in zip(texts, embeddings):
+            if embedding is None:
+                continue
+            vector = np.asarray(embedding, dtype=np.float32)
+            if np.isnan(vector).any():
+                continue
+            rows.append((self.make_key(model, text), model, vector.shape[0], vector.tobytes(), now))
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            self._evict()
+
+    def put(self, model: str, text: str, embedding: np.ndarray):
+        """
+        Store the embedding for a single text.
+
+        Args:
+            model: Embedding model name
+            text: Input text
+            embedding: Embedding vector
+        """
+        self.put_many(model, [text], [embedding])
+
+    def _evict(self):
+        """Evict least recently used entries above max_entries (lock must be held)"""
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (overflow,)
+        )
+        self._conn.commit()
+        self.evictions += overflow
+
+    def clear(self):
+        """Remove all cached embeddings"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size and hit/miss counters
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
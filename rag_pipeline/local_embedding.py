@@ -0,0 +1,236 @@
+"""
+Local (Offline) Embedding Backends
+
+CPU embedders with the same surface as OpenAIEmbedder, for low-latency
+query embedding and air-gapped runs:
+- HashingEmbedder: hashed word + character n-gram features, no model files
+- SentenceTransformerEmbedder: small sentence-transformer model loaded from disk
+"""
+
+import os
+import re
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+from itertools import islice
+from typing import List, Dict, Iterable, Iterator, Optional
+import numpy as np
+from llama_index.core.schema import TextNode
+from dotenv import load_dotenv
+
+from .embedding import embedding_stats
+
+load_dotenv()
+
+
+class LocalEmbedder(ABC):
+    """Shared node handling for local embedders (subclasses implement embed_texts)"""
+
+    model: str = "local"
+    embedding_dim: int = 0
+
+    def embed_text(self, text: str) -> np.ndarray:
+        """
+        Generate embedding for a single text.
+
+        Args:
+            text: Input text to embed
+
+        Returns:
+            float32 embedding vector
+        """
+        return self.embed_texts([text])[0]
+
+    @abstractmethod
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts.
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            float32 matrix of shape (len(texts), embedding_dim)
+        """
+
+    def embed_nodes(self, nodes: List[TextNode]) -> List[Dict]:
+        """
+        Embed TextNode objects and return with metadata.
+
+        Args:
+            nodes: List of TextNode objects
+
+        Returns:
+            List of dictionaries with text, embedding (float32 row view), and metadata
+        """
+        embeddings = self.embed_texts([node.text for node in nodes])
+
+        return [
+            {
+                "id": node.node_id,
+                "text": node.text,
+                "embedding": embedding,
+                "metadata": node.metadata
+            }
+            for node, embedding in zip(nodes, embeddings)
+        ]
+
+    def iter_embed_nodes(
+        self,
+        nodes: Iterable[TextNode],
+        window_size: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Embed TextNode objects lazily, one window of nodes at a time.
+
+        Args:
+            nodes: Iterable of TextNode objects
+            window_size: Nodes embedded per window (default: EMBEDDING_STREAM_WINDOW or 1024)
+
+        Yields:
+            Dictionaries with id, text, embedding (float32 row view), and metadata
+        """
+        window_size = window_size or int(os.getenv("EMBEDDING_STREAM_WINDOW", "1024"))
+        iterator = iter(nodes)
+
+        while True:
+            window = list(islice(iterator, window_size))
+            if not window:
+                break
+            yield from self.embed_nodes(window)
+
+    def get_embedding_stats(self, embeddings: List[np.ndarray]) -> Dict:
+        """
+        Get statistics about embeddings.
+
+        Args:
+            embeddings: Embedding vectors (list of vectors or a matrix)
+
+        Returns:
+            Dictionary with embedding statistics
+        """
+        stats = embedding_stats(embeddings)
+        stats["model"] = self.model
+        stats["cache"] = None
+        return stats
+
+
+class HashingEmbedder(LocalEmbedder):
+    """Feature-hashing embedder over words and character n-grams"""
+
+    def __init__(
+        self,
+        embedding_dim: Optional[int] = None,
+        ngram_range: tuple = (3, 5)
+    ):
+        """
+        Initialize hashing embedder.
+
+        Args:
+            embedding_dim: Output dimension (default: LOCAL_EMBEDDING_DIM or 1024)
+            ngram_range: Min/max character n-gram length
+        """
+        self.embedding_dim = embedding_dim or int(os.getenv("LOCAL_EMBEDDING_DIM", "1024"))
+        self.ngram_range = ngram_range
+        self.model = f"hashing-{self.embedding_dim}"
+
+    def _features(self, text: str) -> Counter:
+        """Extract word and character n-gram features"""
+        features = Counter()
+
+        # Keep hyphenated tokens intact so model numbers / error codes survive
+        for word in re.findall(r"[a-z0-9]+(?:-[a-z0-9]+)*", text.lower()):
+            features["w:" + word] += 1
+
+            padded = f"<{word}>"
+            low, high = self.ngram_range
+            for n in range(low, high + 1):
+                for i in range(len(padded) - n + 1):
+                    features["c:" + padded[i:i + n]] += 1
+
+        return features
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts.
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            float32 matrix of L2-normalized embeddings
+        """
+        embeddings = np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if not features:
+                continue
+
+            # crc32 is stable across processes, unlike hash()
+            hashes = np.fromiter(
+                (zlib.crc32(feature.encode("utf-8")) for feature in features),
+                dtype=np.uint32,
+                count=len(features)
+            )
+            counts = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+            signs = np.where(hashes >> 31, 1.0, -1.0).astype(np.float32)
+
+            np.add.at(embeddings[row], hashes % self.embedding_dim, signs * (1.0 + np.log(counts)))
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+        return embeddings
+
+
+class SentenceTransformerEmbedder(LocalEmbedder):
+    """Small sentence-transformer model running on CPU"""
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        device: Optional[str] = None,
+        batch_size: int = 64
+    ):
+        """
+        Initialize sentence-transformer embedder.
+
+        Args:
+            model: Local model directory or model name
+                   (default: LOCAL_EMBEDDING_MODEL or sentence-transformers/all-MiniLM-L6-v2)
+            device: Torch device (default: LOCAL_EMBEDDING_DEVICE or cpu)
+            batch_size: Texts per forward pass
+        """
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "sentence-transformers is required for EMBEDDING_BACKEND=sentence-transformers "
+                "(pip install sentence-transformers)"
+            ) from e
+
+        self.model = model or os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        self.device = device or os.getenv("LOCAL_EMBEDDING_DEVICE", "cpu")
+        self.batch_size = batch_size
+
+        self.encoder = SentenceTransformer(self.model, device=self.device)
+        self.embedding_dim = self.encoder.get_sentence_embedding_dimension()
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts.
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            float32 matrix of L2-normalized embeddings
+        """
+        vectors = self.encoder.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=len(texts) > self.batch_size
+        )
+        return np.ascontiguousarray(vectors, dtype=np.float32)
@@ -0,0 +1,613 @@
+"""
+In-Process Vector Store
+
+Exact cosine search over a memory-mapped float32 matrix, with the same
+interface as QdrantStore. Intended for tests, evaluation runs and small
+edge deployments where a Qdrant server (and an HTTP round trip per query)
+is not worth it:
+- vectors.npy: L2-normalized float32 matrix, memory-mapped read-only
+- payloads.jsonl: one {"id", "payload"} record per row
+- Filters are answered from per-(field, value) boolean bitmaps
+- Readers re-map the files when another process re-ingests the collection
+  (collection generation bump, see result_cache.bump_generation)
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from itertools import islice
+from typing import List, Dict, Iterable, Iterator, Optional, Sequence, Union
+import numpy as np
+from dotenv import load_dotenv
+
+from .vector_store import PAYLOAD_INDEXES
+from .result_cache import GenerationWatcher
+
+load_dotenv()
+
+# Rows copied at a time when rewriting the vector file
+COPY_BLOCK_ROWS = 65536
+
+
+class LocalVectorStore:
+    """Exact-search vector store backed by a memory-mapped .npy file"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        collection_name: Optional[str] = None,
+        embedding_dim: int = 1536
+    ):
+        """
+        Initialize local store.
+
+        Args:
+            path: Base directory (default: LOCAL_VECTOR_STORE_PATH or ./data/local_store)
+            collection_name: Collection name (default: QDRANT_COLLECTION_NAME or fridge_manuals)
+            embedding_dim: Dimension of embeddings
+        """
+        self.path = path or os.getenv("LOCAL_VECTOR_STORE_PATH", "./data/local_store")
+        self.collection_name = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "fridge_manuals")
+        self.embedding_dim = embedding_dim
+        self.url = f"file://{os.path.abspath(self.path)}"
+
+        self.collection_dir = os.path.join(self.path, self.collection_name)
+        self.vectors_path = os.path.join(self.collection_dir, "vectors.npy")
+        self.payloads_path = os.path.join(self.collection_dir, "payloads.jsonl")
+
+        # _lock serializes writers; _state_lock guards swapping in a new
+        # state, so a search never pairs new bitmaps with old payloads
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+        # os.replace by another process leaves this process on the old
+        # inode; the generation bump after ingestion triggers a re-map
+        self._watcher = GenerationWatcher(self.collection_name)
+        self._watch_lock = threading.Lock()
+        self._vectors = np.zeros((0, embedding_dim), dtype=np.float32)
+        self._ids: List = []
+        self._payloads: List[Dict] = []
+        self._rows: Dict = {}
+        self._bitmaps: Dict[str, Dict] = {}
+
+        # Throughput of the last add_documents call (same keys as QdrantStore)
+        self.last_upload_stats: Dict = {}
+
+        if os.path.exists(self.vectors_path):
+            self._load()
+
+    def _load(self):
+        """Map the vector file and read payloads, then swap them in"""
+        vectors = np.load(self.vectors_path, mmap_mode="r")
+        ids, payloads = [], []
+
+        if os.path.exists(self.payloads_path):
+            with open(self.payloads_path) as f:
+                for line in f:
+                    record = json.loads(line)
+                    ids.append(record["id"])
+                    payloads.append(record["payload"])
+
+        rows = {point_id: row for row, point_id in enumerate(ids)}
+        bitmaps: Dict[str, Dict] = {}
+        for field in PAYLOAD_INDEXES:
+            self._bitmap_index(field, payloads, bitmaps)
+
+        with self._state_lock:
+            self._vectors, self._ids, self._payloads = vectors, ids, payloads
+            self._rows, self._bitmaps = rows, bitmaps
+
+    def _refresh(self):
+        """Re-map the collection if its generation changed (re-ingested elsewhere)"""
+        with self._watch_lock:
+            _, changed = self._watcher.check()
+        if changed and os.path.exists(self.vectors_path):
+            with self._lock:
+                self._load()
+
+    def _snapshot(self):
+        """(vectors, ids, payloads, bitmaps) of one consistent, up-to-date state"""
+        self._refresh()
+        with self._state_lock:
+            return self._vectors, self._ids, self._payloads, self._bitmaps
+
+    def create_collection(self, force_recreate: bool = False, **storage_options):
+        """
+        Create the collection directory.
+
+        Args:
+            force_recreate: If True, delete existing collection first
+            **storage_options: QdrantStore HNSW/quantization/on_disk options (not
+                               applicable: vectors are always memory-mapped, search is exact)
+        """
+        collection_exists = os.path.exists(self.vectors_path)
+
+        if collection_exists and force_recreate:
+            print(f"Deleting existing collection: {self.collection_name}")
+            self.delete_collection()
+            collection_exists = False
+
+        if collection_exists:
+            existing_dim = self.get_vector_size()
+            if existing_dim != self.embedding_dim:
+                raise ValueError(
+                    f"Collection {self.collection_name} stores {existing_dim}-dim vectors but the "
+                    f"embedder produces {self.embedding_dim}-dim vectors; recreate it "
+                    f"(force_recreate=True) or use another collection name"
+                )
+            print(f"Collection already exists: {self.collection_name}")
+            return
+
+        print(f"Creating collection: {self.collection_name}")
+        os.makedirs(self.collection_dir, exist_ok=True)
+        with self._lock:
+            self._write(np.zeros((0, self.embedding_dim), dtype=np.float32), [], [])
+        print(f"✓ Collection created: {self.collection_name}")
+
+    def _write(self, vectors: np.ndarray, ids: List, payloads: List[Dict]):
+        """Persist vectors + payloads and re-map them (lock must be held)"""
+        tmp_vectors = self.vectors_path + ".tmp.npy"
+        np.save(tmp_vectors, np.ascontiguousarray(vectors, dtype=np.float32))
+        self._commit(tmp_vectors, self._write_payloads(ids, payloads))
+
+    def _write_payloads(self, ids: List, payloads: List[Dict]) -> str:
+        """Write a payload file next to the live one and return its path"""
+        tmp_payloads = self.payloads_path + ".tmp"
+        with open(tmp_payloads, "w") as f:
+            for point_id, payload in zip(ids, payloads):
+                f.write(json.dumps({"id": point_id, "payload": payload}) + "\n")
+        return tmp_payloads
+
+    def _commit(self, tmp_vectors: str, tmp_payloads: str):
+        """Swap in written vector and payload files and re-map (lock must be held)"""
+        # Replace atomically so readers never see a half-written file
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_payloads, self.payloads_path)
+        self._load()
+
+    def add_documents(
+        self,
+        documents: Iterable[Dict],
+        batch_size: int = 100,
+        skip_existing: bool = False,
+        **kwargs
+    ) -> int:
+        """
+        Add documents with embeddings.
+
+        Existing IDs are overwritten (upsert semantics). Vectors are
+        normalized on insert so search is a plain dot product. The vectors
+        and payloads of each batch are appended to staging files as they
+        arrive, and the collection files are rewritten once at the end by
+        block copies, so reading the input holds one batch at a time
+        whatever its size. After the merge the payloads are loaded like
+        those of any collection (the vectors stay memory-mapped).
+
+        Args:
+            documents: Iterable of dicts with 'text', 'embedding', 'metadata'
+            batch_size: Number of documents read per batch
+            skip_existing: Drop documents whose 'id' is already stored
+            **kwargs: Accepted for QdrantStore compatibility (max_workers, ...)
+
+        Returns:
+            Number of documents added
+        """
+        start = time.perf_counter()
+        os.makedirs(self.collection_dir, exist_ok=True)
+        staged_name = os.path.join(self.collection_dir, f"staged-{uuid.uuid4().hex}")
+        staged_path, staged_payloads_path = staged_name + ".f32", staged_name + ".jsonl"
+        iterator = iter(documents)
+        # Only IDs and payload line offsets stay in memory
+        new_ids, payload_offsets = [], []
+        skipped = 0
+        batches = 0
+        added_bytes = 0
+
+        try:
+            with open(staged_path, "wb") as staged, open(staged_payloads_path, "wb") as staged_payloads:
+                while True:
+                    batch = list(islice(iterator, batch_size))
+                    if not batch:
+                        break
+                    vectors = []
+                    for doc in batch:
+                        if skip_existing and doc.get("id") in self._rows:
+                            skipped += 1
+                            continue
+                        point_id = doc.get("id", str(uuid.uuid4()))
+                        payload = {"text": doc["text"], **doc.get("metadata", {})}
+                        new_ids.append(point_id)
+                        payload_offsets.append(staged_payloads.tell())
+                        staged_payloads.write((json.dumps({"id": point_id, "payload": payload}) + "\n").encode())
+                        vectors.append(np.asarray(doc["embedding"], dtype=np.float32))
+                    if not vectors:
+                        continue
+
+                    added = np.vstack(vectors)
+                    if added.shape[1] != self.embedding_dim:
+                        raise ValueError(f"Expected {self.embedding_dim}-dim vectors, got {added.shape[1]}")
+                    norms = np.linalg.norm(added, axis=1, keepdims=True)
+                    np.divide(added, norms, out=added, where=norms > 0)
+                    staged.write(np.ascontiguousarray(added).tobytes())
+                    added_bytes += added.nbytes
+                    batches += 1
+
+            if not new_ids:
+                self.last_upload_stats = {
+                    "documents": 0, "skipped_existing": skipped, "batches": 0, "failed_batches": [],
+                    "seconds": 0.0, "points_per_second": 0.0, "mb_per_second": 0.0
+                }
+                return 0
+
+            with self._lock:
+                self._merge(staged_path, staged_payloads_path, new_ids, payload_offsets)
+        finally:
+            for path in (staged_path, staged_payloads_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        self.last_upload_stats = {
+            "documents": len(new_ids),
+            "skipped_existing": skipped,
+            "batches": batches,
+            "failed_batches": [],
+            "seconds": elapsed,
+            "points_per_second": len(new_ids) / elapsed,
+            "mb_per_second": added_bytes / 1e6 / elapsed
+        }
+
+        print(f"✓ Added {len(new_ids)} documents to {self.collection_name}")
+        if skipped:
+            print(f"✓ Skipped {skipped} documents already in {self.collection_name}")
+        return len(new_ids)
+
+    def _merge(self, staged_path: str, staged_payloads_path: str, new_ids: List, payload_offsets: List[int]):
+        """Write stored + staged rows to new vector and payload files and commit them (lock must be held)"""
+        staged = np.memmap(staged_path, dtype=np.float32, mode="r", shape=(len(new_ids), self.embedding_dim))
+        stored = len(self._ids)
+        ids = list(self._ids)
+        rows = dict(self._rows)
+
+        appended, overwritten = [], {}
+        for i, point_id in enumerate(new_ids):
+            row = rows.get(point_id)
+            if row is None:
+                rows[point_id] = stored + len(appended)
+                appended.append(i)
+            elif row >= stored:
+                # Repeated new ID within this call: the last occurrence wins
+                appended[row - stored] = i
+            else:
+                overwritten[row] = i
+
+        ids.extend(new_ids[i] for i in appended)
+
+        tmp_vectors = self.vectors_path + ".tmp.npy"
+        vectors = np.lib.format.open_memmap(
+            tmp_vectors, mode="w+", dtype=np.float32, shape=(len(ids), self.embedding_dim)
+        )
+        for block in range(0, stored, COPY_BLOCK_ROWS):
+            end = min(block + COPY_BLOCK_ROWS, stored)
+            vectors[block:end] = self._vectors[block:end]
+        for row, i in overwritten.items():
+            vectors[row] = staged[i]
+        for block in range(0, len(appended), COPY_BLOCK_ROWS):
+            staged_rows = appended[block:block + COPY_BLOCK_ROWS]
+            vectors[stored + block:stored + block + len(staged_rows)] = staged[staged_rows]
+        vectors.flush()
+        del vectors, staged
+
+        # Staged payload lines are already in the payload file format
+        tmp_payloads = self.payloads_path + ".tmp"
+        with open(staged_payloads_path, "rb") as staged_payloads, open(tmp_payloads, "wb") as f:
+            def staged_line(i):
+                staged_payloads.seek(payload_offsets[i])
+                return staged_payloads.readline()
+
+            for row in range(stored):
+                if row in overwritten:
+                    f.write(staged_line(overwritten[row]))
+                else:
+                    f.write((json.dumps({"id": self._ids[row], "payload": self._payloads[row]}) + "\n").encode())
+            for i in appended:
+                f.write(staged_line(i))
+
+        self._commit(tmp_vectors, tmp_payloads)
+
+    def delete_stale_manual(self, source: str, file_hash: str) -> int:
+        """
+        Delete the points of earlier versions of a re-ingested manual.
+
+        Args:
+            source: Manual source (GCS URI) shared by all its versions
+            file_hash: Hash of the current version; its points are kept
+
+        Returns:
+            Number of points deleted
+        """
+        self._refresh()
+        with self._lock:
+            keep = np.array([
+                not (payload.get("source") == source and payload.get("file_hash") != file_hash)
+                for payload in self._payloads
+            ], dtype=bool)
+            deleted = int(len(keep) - keep.sum())
+            if not deleted:
+                return 0
+
+            rows = np.flatnonzero(keep)
+            ids = [self._ids[row] for row in rows]
+            payloads = [self._payloads[row] for row in rows]
+            if not len(rows):
+                self._write(np.zeros((0, self.embedding_dim), dtype=np.float32), ids, payloads)
+                return deleted
+
+            tmp_vectors = self.vectors_path + ".tmp.npy"
+            vectors = np.lib.format.open_memmap(
+                tmp_vectors, mode="w+", dtype=np.float32, shape=(len(rows), self.embedding_dim)
+            )
+            for block in range(0, len(rows), COPY_BLOCK_ROWS):
+                kept_rows = rows[block:block + COPY_BLOCK_ROWS]
+                vectors[block:block + len(kept_rows)] = self._vectors[kept_rows]
+            vectors.flush()
+            del vectors
+
+            self._commit(tmp_vectors, self._write_payloads(ids, payloads))
+        return deleted
+
+    def existing_ids(self, ids: Iterable, batch_size: int = 1000) -> set:
+        """
+        Find which point IDs are already stored.
+
+        Args:
+            ids: Point IDs to check
+            batch_size: Accepted for QdrantStore compatibility
+
+        Returns:
+            Set of the given IDs that exist in the collection
+        """
+        return {point_id for point_id in ids if point_id in self._rows}
+
+    @staticmethod
+    def _bitmap_index(field: str, payloads: List[Dict], bitmaps: Dict[str, Dict]) -> Dict:
+        """Get (building on first use) the value -> row bitmap index of a payload field"""
+        index = bitmaps.get(field)
+        if index is None:
+            rows_by_value: Dict = {}
+            for row, payload in enumerate(payloads):
+                value = payload.get(field)
+                if isinstance(value, (str, int, bool)):
+                    rows_by_value.setdefault(value, []).append(row)
+
+            index = {}
+            for value, rows in rows_by_value.items():
+                bitmap = np.zeros(len(payloads), dtype=bool)
+                bitmap[rows] = True
+                index[value] = bitmap
+            bitmaps[field] = index
+        return index
+
+    def _filter_mask(self, state, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        """AND the bitmaps of all filter conditions (None = no filter)"""
+        if not filters:
+            return None
+
+        _, _, payloads, bitmaps = state
+        mask = np.ones(len(payloads), dtype=bool)
+        for key, value in filters.items():
+            bitmap = self._bitmap_index(key, payloads, bitmaps).get(value)
+            if bitmap is None:
+                return np.zeros(len(payloads), dtype=bool)
+            mask &= bitmap
+        return mask
+
+    @staticmethod
+    def _top_k(
+        state,
+        scores: np.ndarray,
+        rows: Optional[np.ndarray],
+        top_k: int,
+        with_vectors: bool = False
+    ) -> List[Dict]:
+        """Format the top_k rows by score"""
+        k = min(top_k, scores.shape[0])
+        if k == 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if rows is not None:
+            candidate_rows = rows[top]
+        else:
+            candidate_rows = top
+
+        vectors, ids, payloads, _ = state
+        results = []
+        for row, score in zip(candidate_rows, scores[top]):
+            payload = payloads[row]
+            result = {
+                "id": ids[row],
+                "score": float(score),
+                "text": payload.get("text", ""),
+                "metadata": {k: v for k, v in payload.items() if k != "text"}
+            }
+            if with_vectors:
+                result["vector"] = np.array(vectors[row])
+            results.append(result)
+        return results
+
+    @staticmethod
+    def _normalize_query(query_embedding: Sequence[float]) -> np.ndarray:
+        """Query as a unit float32 vector"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        return query / norm if norm > 0 else query
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        with_vectors: bool = False,
+        **search_params
+    ) -> List[Dict]:
+        """
+        Search for similar documents (exact cosine similarity).
+
+        Args:
+            query_embedding: Query vector (NumPy array or list)
+            top_k: Number of results to return
+            filters: Optional metadata filters (exact match on every field)
+            with_vectors: Include each result's stored (normalized) vector as 'vector'
+            **search_params: Accepted for QdrantStore compatibility (search is always exact)
+
+        Returns:
+            List of matching documents with scores
+        """
+        state = self._snapshot()
+        vectors = state[0]
+        query = self._normalize_query(query_embedding)
+        mask = self._filter_mask(state, filters)
+
+        if mask is None:
+            return self._top_k(state, vectors @ query, None, top_k, with_vectors)
+
+        rows = np.flatnonzero(mask)
+        return self._top_k(state, vectors[rows] @ query, rows, top_k, with_vectors)
+
+    def search_batch(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        top_k: int = 5,
+        filters: Optional[Union[Dict, Sequence[Optional[Dict]]]] = None,
+        with_vectors: bool = False,
+        **search_params
+    ) -> List[List[Dict]]:
+        """
+        Search for several query vectors.
+
+        Args:
+            query_embeddings: Query vectors (matrix or list of vectors)
+            top_k: Number of results per query
+            filters: Metadata filters shared by all queries, or one per query
+            with_vectors: Include each result's stored vector as 'vector'
+            **search_params: Accepted for QdrantStore compatibility (search is always exact)
+
+        Returns:
+            One result list per query, in the same format as search()
+        """
+        if filters is not None and not isinstance(filters, dict):
+            if len(filters) != len(query_embeddings):
+                raise ValueError("filters must be a dict or one entry per query")
+            return [
+                self.search(embedding, top_k=top_k, filters=query_filters, with_vectors=with_vectors)
+                for embedding, query_filters in zip(query_embeddings, filters)
+            ]
+
+        if len(query_embeddings) == 0:
+            return []
+
+        state = self._snapshot()
+        vectors = state[0]
+        queries = np.vstack([self._normalize_query(q) for q in query_embeddings])
+        mask = self._filter_mask(state, filters)
+        rows = np.flatnonzero(mask) if mask is not None else None
+        matrix = vectors[rows] if rows is not None else vectors
+
+        # One matrix product for all queries sharing the same filter
+        scores = queries @ matrix.T
+        return [self._top_k(state, row_scores, rows, top_k, with_vectors) for row_scores in scores]
+
+    def ensure_payload_indexes(self, indexes: Optional[Dict] = None) -> List[str]:
+        """
+        Build bitmap indexes for the filter fields (built lazily otherwise).
+
+        Args:
+            indexes: Field names to index (default: PAYLOAD_INDEXES)
+
+        Returns:
+            Names of the fields that were indexed
+        """
+        fields = list(indexes or PAYLOAD_INDEXES)
+        _, _, payloads, bitmaps = self._snapshot()
+        for field in fields:
+            self._bitmap_index(field, payloads, bitmaps)
+        return fields
+
+    def get_payload_indexes(self) -> Dict[str, str]:
+        """
+        Get the bitmap indexes built so far.
+
+        Returns:
+            Dictionary of field name -> index type
+        """
+        return {field: "bitmap" for field in self._bitmaps}
+
+    def get_vector_size(self) -> Optional[int]:
+        """
+        Get the vector dimension stored in the collection.
+
+        Returns:
+            Vector size, or None if the collection does not exist
+        """
+        if not os.path.exists(self.vectors_path):
+            return None
+        return int(np.load(self.vectors_path, mmap_mode="r").shape[1])
+
+    def iter_points(self, batch_size: int = 256, with_vectors: bool = True) -> Iterator[Dict]:
+        """
+        Stream every stored point with its vector (e.g. to export a snapshot).
+
+        Args:
+            batch_size: Rows copied out of the memory map at a time
+            with_vectors: Also read vectors
+
+        Yields:
+            Document dicts in the add_documents format ('id', 'text',
+            'embedding' as float32 array (None without vectors), 'metadata')
+        """
+        vectors, ids, payloads, _ = self._snapshot()
+
+        for start in range(0, len(ids), batch_size):
+            end = min(start + batch_size, len(ids))
+            block = np.array(vectors[start:end], dtype=np.float32) if with_vectors else [None] * (end - start)
+            for offset, vector in enumerate(block):
+                payload = dict(payloads[start + offset])
+                yield {
+                    "id": ids[start + offset],
+                    "text": payload.pop("text", ""),
+                    "embedding": vector,
+                    "metadata": payload
+                }
+
+    def delete_collection(self):
+        """Delete the collection"""
+        with self._lock:
+            shutil.rmtree(self.collection_dir, ignore_errors=True)
+            with self._state_lock:
+                self._vectors = np.zeros((0, self.embedding_dim), dtype=np.float32)
+                self._ids, self._payloads, self._rows, self._bitmaps = [], [], {}, {}
+        print(f"✓ Deleted collection: {self.collection_name}")
+
+    def get_collection_info(self) -> Dict:
+        """
+        Get information about the collection.
+
+        Returns:
+            Dictionary with collection stats
+        """
+        return {
+            "name": self.collection_name,
+            "vectors_count": len(self._ids),
+            "points_count": len(self._ids),
+            "status": "green",
+            "payload_indexes": self.get_payload_indexes(),
+            "config": {
+                "dimension": self.embedding_dim,
+                "distance": "cosine"
+            }
+        }
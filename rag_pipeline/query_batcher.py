@@ -0,0 +1,153 @@
+"""
+Query Embedding Micro-Batcher
+
+Coalesce query embedding requests that arrive within a short window into
+a single batched embeddings call, so concurrent sessions share one API
+request instead of each paying its own round trip.
+"""
+
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional
+import numpy as np
+from dotenv import load_dotenv
+
+from .embedding import Embedder
+
+load_dotenv()
+
+
+class QueryEmbeddingBatcher:
+    """Collect queries for a few milliseconds and embed them in one call"""
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        window_ms: Optional[float] = None,
+        max_batch_size: int = 64,
+        idle_timeout: float = 5.0
+    ):
+        """
+        Initialize micro-batcher.
+
+        Args:
+            embedder: Embedder used for the batched calls
+            window_ms: How long to wait for more queries after the first one
+                       arrives (default: QUERY_EMBED_BATCH_WINDOW_MS or 5)
+            max_batch_size: Flush as soon as this many queries are waiting
+            idle_timeout: Seconds without requests before the worker thread exits
+                          (it is restarted on the next request)
+        """
+        self.embedder = embedder
+        self.window = (
+            window_ms if window_ms is not None
+            else float(os.getenv("QUERY_EMBED_BATCH_WINDOW_MS", "5"))
+        ) / 1000.0
+        self.max_batch_size = max_batch_size
+        self.idle_timeout = idle_timeout
+
+        self.requests = 0
+        self.batches = 0
+        self.max_observed_batch = 0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def embed(self, text: str, timeout: Optional[float] = 60.0) -> np.ndarray:
+        """
+        Embed a query, sharing the API call with concurrent callers.
+
+        Args:
+            text: Query text
+            timeout: Seconds to wait for the result
+
+        Returns:
+            float32 embedding vector
+        """
+        future: Future = Future()
+        self._queue.put((text, future))
+
+        with self._lock:
+            self.requests += 1
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name="query-embedding-batcher",
+                    daemon=True
+                )
+                self._worker.start()
+
+        return future.result(timeout=timeout)
+
+    def _run(self):
+        """Worker loop: gather a window of queries, embed, fan results out"""
+        while True:
+            try:
+                first = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    # Re-check under the lock so a request enqueued right now is not stranded
+                    if self._queue.empty():
+                        self._worker = None
+                        return
+                continue
+
+            pending = [first]
+            deadline = time.monotonic() + self.window
+
+            while len(pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._flush(pending)
+
+    def _flush(self, pending):
+        """Embed one coalesced batch and resolve the callers' futures"""
+        # Identical concurrent queries are embedded once
+        texts = list(dict.fromkeys(text for text, _ in pending))
+
+        with self._lock:
+            self.batches += 1
+            self.max_observed_batch = max(self.max_observed_batch, len(pending))
+
+        try:
+            # Fail fast where supported: a slow retry would stall every caller in the batch
+            embed_queries = getattr(self.embedder, "embed_queries", self.embedder.embed_texts)
+            embeddings = embed_queries(texts)
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+
+        rows = {text: embeddings[i] for i, text in enumerate(texts)}
+        for text, future in pending:
+            vector = rows[text]
+            if np.isnan(vector).any():
+                future.set_exception(RuntimeError(f"Failed to embed query: {text[:80]}"))
+            else:
+                future.set_result(vector)
+
+    def get_stats(self) -> Dict:
+        """
+        Get batching statistics.
+
+        Returns:
+            Dictionary with request/batch counts and average batch size
+        """
+        with self._lock:
+            return {
+                "window_ms": self.window * 1000.0,
+                "requests": self.requests,
+                "batches": self.batches,
+                "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_observed_batch
+            }
@@ -0,0 +1,273 @@
+"""
+Retrieval Result Cache
+
+In-memory cache of RAGRetriever responses keyed by (query, top_k, filters,
+min_score, retrieval mode), so repeated questions skip the embedding call
+and the vector search:
+- Bounded LRU with a TTL per entry
+- Every ingestion run bumps a per-collection generation counter on disk
+  (bump_generation); entries from an older generation are never served,
+  so a replaced manual cannot come back from the cache. The counter file
+  is re-read only when its mtime changes (one stat() per lookup).
+- Hit/miss/eviction counters for monitoring
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+from dotenv import load_dotenv
+
+from .embedding_cache import normalize_text
+
+load_dotenv()
+
+
+def generation_path(collection_name: Optional[str] = None) -> str:
+    """Path of the ingestion generation counter of a collection"""
+    collection_name = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "fridge_manuals")
+    directory = os.getenv("RESULT_CACHE_GENERATION_DIR", "./data/cache/generations")
+    return os.path.join(directory, f"{collection_name}.generation")
+
+
+def read_generation(collection_name: Optional[str] = None) -> int:
+    """
+    Read the ingestion generation of a collection.
+
+    Args:
+        collection_name: Collection (default: QDRANT_COLLECTION_NAME)
+
+    Returns:
+        Generation counter (0 if the collection was never re-ingested)
+    """
+    try:
+        with open(generation_path(collection_name)) as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_generation(collection_name: Optional[str] = None) -> int:
+    """
+    Invalidate cached results of a collection (call after changing its content).
+
+    Args:
+        collection_name: Collection (default: QDRANT_COLLECTION_NAME)
+
+    Returns:
+        New generation counter
+    """
+    path = generation_path(collection_name)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    generation = read_generation(collection_name) + 1
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        f.write(str(generation))
+    os.replace(tmp_path, path)
+    return generation
+
+
+def copy_response(response: Dict) -> Dict:
+    """Copy a retrieval response deep enough that callers can modify results freely"""
+    copied = dict(response)
+    copied["results"] = [
+        {**result, "metadata": dict(result.get("metadata", {}))}
+        for result in response.get("results", [])
+    ]
+    return copied
+
+
+class GenerationWatcher:
+    """Current ingestion generation of a collection, re-read only when its counter file changes"""
+
+    def __init__(self, collection_name: Optional[str] = None):
+        """
+        Initialize watcher.
+
+        Args:
+            collection_name: Collection to watch (default: QDRANT_COLLECTION_NAME)
+        """
+        self.collection_name = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "fridge_manuals")
+        self.path = generation_path(self.collection_name)
+        self.generation = read_generation(self.collection_name)
+        self._mtime = self._stat()
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def check(self) -> Tuple[int, bool]:
+        """
+        Read the current generation (one stat() unless the file changed).
+
+        Returns:
+            Tuple of (generation, whether it changed since the last check)
+        """
+        mtime = self._stat()
+        if mtime == self._mtime:
+            return self.generation, False
+
+        self._mtime = mtime
+        generation = read_generation(self.collection_name)
+        changed = generation != self.generation
+        self.generation = generation
+        return generation, changed
+
+
+class ResultCache:
+    """LRU + TTL cache of retrieval responses, invalidated by ingestion generation"""
+
+    def __init__(
+        self,
+        collection_name: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        """
+        Initialize result cache.
+
+        Args:
+            collection_name: Collection whose generation invalidates entries
+                             (default: QDRANT_COLLECTION_NAME)
+            max_entries: Maximum cached responses before least recently used
+                         ones are evicted (default: RESULT_CACHE_MAX_ENTRIES or 1024)
+            ttl_seconds: Entry lifetime (default: RESULT_CACHE_TTL_SECONDS or 600)
+        """
+        self.collection_name = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "fridge_manuals")
+        self.max_entries = max_entries or int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("RESULT_CACHE_TTL_SECONDS", "600"))
+        self._watcher = GenerationWatcher(self.collection_name)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Dict]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(
+        query: str,
+        top_k: int,
+        filters: Optional[Dict] = None,
+        min_score: float = 0.0,
+        mode: str = "dense"
+    ) -> Hashable:
+        """
+        Build the cache key of a retrieval.
+
+        Args:
+            query: User query (whitespace-normalized like the embedding cache)
+            top_k: Number of results
+            filters: Metadata filters
+            min_score: Score threshold
+            mode: Retrieval mode
+
+        Returns:
+            Hashable key
+        """
+        return (
+            normalize_text(query),
+            top_k,
+            tuple(sorted((filters or {}).items())),
+            min_score,
+            mode
+        )
+
+    def generation(self) -> int:
+        """
+        Current ingestion generation (re-read when the counter file changes).
+
+        Returns:
+            Generation counter
+        """
+        generation, changed = self._watcher.check()
+        if changed:
+            with self._lock:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+        return generation
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Copy of the cached response, or None
+        """
+        generation = self.generation()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, entry_generation, response = entry
+            if entry_generation != generation or expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return copy_response(response)
+
+    def put(self, key: Hashable, response: Dict, generation: Optional[int] = None):
+        """
+        Store a response.
+
+        Args:
+            key: Key from make_key()
+            response: Retrieval response
+            generation: Generation read before the response was computed, so a
+                        re-ingestion that finished meanwhile invalidates it
+                        (default: current generation)
+        """
+        if generation is None:
+            generation = self.generation()
+        entry = (time.monotonic() + self.ttl_seconds, generation, copy_response(response))
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all cached responses"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size, generation and hit/miss counters
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "generation": self.generation(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
@@ -2,11 +2,53 @@
 RAG Retriever
 
 Query the RAG system to retrieve relevant manual content.
+Async variants (aretrieve, asearch_manuals_rag) use the asyncio OpenAI and
+Qdrant clients so a serving event loop is never blocked on I/O.
 """
 
-from typing import List, Dict, Optional
-from .embedding import OpenAIEmbedder
-from .vector_store import QdrantStore
+import os
+import asyncio
+import threading
+from typing import List, Dict, Hashable, Optional, Tuple, Union
+import numpy as np
+from .embedding import Embedder, OpenAIEmbedder, create_embedder
+from .vector_store import QdrantStore, create_vector_store
+from .query_batcher import QueryEmbeddingBatcher
+from .bm25_index import BM25Index
+from .result_cache import ResultCache, GenerationWatcher
+from .semantic_cache import SemanticCache
+from .diversify import diversify_results
+from .clients import get_retriever
+
+RETRIEVAL_MODES = ("dense", "fusion", "lexical")
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], top_k: int, k: int = 60) -> List[Dict]:
+    """
+    Merge ranked result lists by reciprocal rank fusion.
+
+    Each document scores sum(1 / (k + rank)) over the lists it appears in.
+    The first occurrence of a document is kept (pass the dense list first
+    so 'score' stays the cosine similarity); the fused score is added as
+    'fusion_score'.
+
+    Args:
+        result_lists: Ranked result lists (vector store format)
+        top_k: Number of results to return
+        k: RRF rank constant
+
+    Returns:
+        Fused results, best first
+    """
+    fused: Dict = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, 1):
+            entry = fused.get(result["id"])
+            if entry is None:
+                entry = fused[result["id"]] = {**result, "fusion_score": 0.0}
+            entry["fusion_score"] += 1.0 / (k + rank)
+
+    return sorted(fused.values(), key=lambda r: r["fusion_score"], reverse=True)[:top_k]
 
 
 class RAGRetriever:
@@ -14,18 +56,87 @@ class RAGRetriever:
 
     def __init__(
         self,
-        embedder: Optional[OpenAIEmbedder] = None,
-        vector_store: Optional[QdrantStore] = None
+        embedder: Optional[Embedder] = None,
+        vector_store: Optional[QdrantStore] = None,
+        query_batch_window_ms: Optional[float] = None,
+        lexical_index: Optional[BM25Index] = None,
+        retrieval_mode: Optional[str] = None,
+        result_cache: Optional[ResultCache] = None,
+        use_result_cache: Optional[bool] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        use_semantic_cache: Optional[bool] = None,
+        diversify: Optional[bool] = None
     ):
         """
         Initialize RAG retriever.
 
         Args:
-            embedder: OpenAI embedder instance
-            vector_store: Qdrant store instance
+            embedder: Embedder instance (default: backend from EMBEDDING_BACKEND)
+            vector_store: Vector store instance (default: backend from VECTOR_STORE_BACKEND)
+            query_batch_window_ms: Coalesce concurrent query embeddings arriving within
+                                   this window into one API call; 0 disables
+                                   (default: QUERY_EMBED_BATCH_WINDOW_MS or 5)
+            lexical_index: BM25 index of the same chunks; used alone when query
+                           embedding fails (degraded mode) and for fusion
+            retrieval_mode: 'dense', 'fusion' (dense + BM25 by reciprocal rank fusion)
+                            or 'lexical' (BM25 only) (default: RETRIEVAL_MODE or dense)
+            result_cache: Response cache instance (created from env if not provided)
+            use_result_cache: Cache responses of retrieve/retrieve_many
+                              (default: RESULT_CACHE_ENABLED or True)
+            semantic_cache: Near-duplicate query cache instance (created from env if not provided)
+            use_semantic_cache: Reuse the results of a recent query with a near-identical
+                                embedding and skip the search (default: SEMANTIC_CACHE_ENABLED or False)
+            diversify: Fetch a larger candidate pool, drop duplicate chunks and pick
+                       top_k by maximal marginal relevance (default: RETRIEVAL_DIVERSIFY or True)
         """
-        self.embedder = embedder or OpenAIEmbedder()
-        self.vector_store = vector_store or QdrantStore()
+        self.embedder = embedder or create_embedder()
+        self.vector_store = vector_store or create_vector_store(embedding_dim=self.embedder.embedding_dim)
+
+        # Micro-batching only pays off for remote embedders
+        if query_batch_window_ms is None:
+            query_batch_window_ms = float(os.getenv("QUERY_EMBED_BATCH_WINDOW_MS", "5"))
+        self.query_batcher = None
+        if query_batch_window_ms > 0 and isinstance(self.embedder, OpenAIEmbedder):
+            self.query_batcher = QueryEmbeddingBatcher(self.embedder, window_ms=query_batch_window_ms)
+
+        self.lexical_index = lexical_index
+        # Re-ingestion saves a new BM25 index and bumps the collection
+        # generation; the saved index is then (re)loaded before the next search
+        self.lexical_index_path = lexical_index.path if lexical_index is not None else None
+        self._lexical_watcher = GenerationWatcher(self.vector_store.collection_name)
+        self._lexical_lock = threading.Lock()
+        self.retrieval_mode = (retrieval_mode or os.getenv("RETRIEVAL_MODE", "dense")).lower()
+        if self.retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"retrieval_mode must be one of {RETRIEVAL_MODES}, got {self.retrieval_mode!r}")
+        if self.retrieval_mode != "dense" and lexical_index is None:
+            raise ValueError(f"retrieval_mode {self.retrieval_mode!r} needs a lexical_index")
+        self.rrf_k = int(os.getenv("RRF_K", "60"))
+
+        # Near-identical chunks (chunk overlap, manuals shared by model variants)
+        # are merged and top_k picked by MMR, on the vectors returned by the
+        # search, from a candidate pool of top_k * fetch_factor results
+        if diversify is None:
+            diversify = os.getenv("RETRIEVAL_DIVERSIFY", "true").lower() in ("1", "true", "yes")
+        self.diversify = diversify
+        self.fetch_factor = max(int(os.getenv("DIVERSIFY_FETCH_FACTOR", "3")), 1)
+        self.mmr_lambda = float(os.getenv("MMR_LAMBDA", "0.7"))
+        self.dedup_threshold = float(os.getenv("DEDUP_JACCARD_THRESHOLD", "0.8"))
+
+        # Repeated (query, filters, top_k) lookups skip embedding and search;
+        # entries die with the TTL or when ingestion bumps the collection generation
+        if use_result_cache is None:
+            use_result_cache = os.getenv("RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.result_cache = result_cache or (
+            ResultCache(collection_name=self.vector_store.collection_name) if use_result_cache else None
+        )
+
+        # Paraphrased repeats ("fridge not cooling" / "refrigerator warm inside")
+        # are matched by query embedding after the embedding step
+        if use_semantic_cache is None:
+            use_semantic_cache = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.semantic_cache = semantic_cache or (
+            SemanticCache(collection_name=self.vector_store.collection_name) if use_semantic_cache else None
+        )
 
     def retrieve(
         self,
@@ -46,29 +157,393 @@ class RAGRetriever:
         Returns:
             Dictionary with retrieved documents and metadata
         """
-        # 1. Embed query
-        query_embedding = self.embedder.embed_text(query)
-
-        # 2. Search vector store
+        if self.result_cache is None:
+            return self._retrieve(query, top_k, filters, min_score)
+
+        key = self.result_cache.make_key(query, top_k, filters, min_score, self.retrieval_mode)
+        generation = self.result_cache.generation()
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = self._retrieve(query, top_k, filters, min_score)
+        # Degraded (BM25 fallback) answers are not cached so recovery is immediate
+        if not response["degraded"]:
+            self.result_cache.put(key, response, generation)
+        return response
+
+    def _retrieve(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict],
+        min_score: float
+    ) -> Dict:
+        """Retrieve without the result cache (see retrieve())"""
+        if self._lexical_index_changed():
+            self._reload_lexical_index()
+        fetch_k = self._fetch_k(top_k)
+        if self.retrieval_mode == "lexical":
+            results = self.lexical_index.search(query, fetch_k, filters)
+            return self._format_response(query, top_k, results, min_score)
+
+        # 1. Embed query (coalesced with concurrent queries when batching is enabled)
+        try:
+            if self.query_batcher is not None:
+                query_embedding = self.query_batcher.embed(query)
+            else:
+                query_embedding = self.embedder.embed_text(query)
+        except Exception as e:
+            if self.lexical_index is None:
+                raise
+            # Degraded mode: answer from the lexical index alone
+            print(f"⚠️  Query embedding failed ({e}); using the BM25 index")
+            results = self.lexical_index.search(query, fetch_k, filters)
+            return self._format_response(query, top_k, results, min_score, degraded=True)
+
+        # 2. A near-duplicate of a recent query reuses its results
+        cached, slot = self._semantic_lookup(query, query_embedding, top_k, filters, min_score)
+        if cached is not None:
+            return cached
+
+        # 3. Search vector store (the text feeds the sparse side of hybrid search)
         results = self.vector_store.search(
             query_embedding=query_embedding,
-            top_k=top_k,
-            filters=filters
+            top_k=fetch_k,
+            filters=filters,
+            query_text=query,
+            with_vectors=self.diversify
         )
 
-        # 3. Filter by minimum score
+        if self.retrieval_mode == "fusion":
+            lexical_results = self.lexical_index.search(query, fetch_k, filters)
+            results = reciprocal_rank_fusion([results, lexical_results], fetch_k, self.rrf_k)
+
+        response = self._format_response(query, top_k, results, min_score)
+        self._semantic_store(slot, query, query_embedding, response)
+        return response
+
+    async def aretrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        min_score: float = 0.0
+    ) -> Dict:
+        """
+        Retrieve relevant documents for a query without blocking the event loop.
+
+        Args:
+            query: User query
+            top_k: Number of results to return
+            filters: Optional metadata filters
+            min_score: Minimum similarity score threshold
+
+        Returns:
+            Dictionary with retrieved documents and metadata (same as retrieve())
+        """
+        if self.result_cache is None:
+            return await self._aretrieve(query, top_k, filters, min_score)
+
+        key = self.result_cache.make_key(query, top_k, filters, min_score, self.retrieval_mode)
+        generation = self.result_cache.generation()
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = await self._aretrieve(query, top_k, filters, min_score)
+        if not response["degraded"]:
+            self.result_cache.put(key, response, generation)
+        return response
+
+    async def _aretrieve(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict],
+        min_score: float
+    ) -> Dict:
+        """Retrieve without the result cache (see aretrieve())"""
+        if self._lexical_index_changed():
+            await asyncio.to_thread(self._reload_lexical_index)
+        fetch_k = self._fetch_k(top_k)
+        if self.retrieval_mode == "lexical":
+            results = self.lexical_index.search(query, fetch_k, filters)
+            return self._format_response(query, top_k, results, min_score)
+
+        # 1. Embed query; backends without an async API run on a worker thread
+        try:
+            if hasattr(self.embedder, "aembed_text"):
+                query_embedding = await self.embedder.aembed_text(query)
+            else:
+                query_embedding = await asyncio.to_thread(self.embedder.embed_text, query)
+        except Exception as e:
+            if self.lexical_index is None:
+                raise
+            print(f"⚠️  Query embedding failed ({e}); using the BM25 index")
+            results = self.lexical_index.search(query, fetch_k, filters)
+            return self._format_response(query, top_k, results, min_score, degraded=True)
+
+        # 2. A near-duplicate of a recent query reuses its results
+        cached, slot = self._semantic_lookup(query, query_embedding, top_k, filters, min_score)
+        if cached is not None:
+            return cached
+
+        # 3. Search vector store
+        search_kwargs = {
+            "query_embedding": query_embedding,
+            "top_k": fetch_k,
+            "filters": filters,
+            "query_text": query,
+            "with_vectors": self.diversify
+        }
+        if hasattr(self.vector_store, "asearch"):
+            results = await self.vector_store.asearch(**search_kwargs)
+        else:
+            results = await asyncio.to_thread(self.vector_store.search, **search_kwargs)
+
+        if self.retrieval_mode == "fusion":
+            lexical_results = self.lexical_index.search(query, fetch_k, filters)
+            results = reciprocal_rank_fusion([results, lexical_results], fetch_k, self.rrf_k)
+
+        response = self._format_response(query, top_k, results, min_score)
+        self._semantic_store(slot, query, query_embedding, response)
+        return response
+
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        filters: Optional[Union[Dict, List[Optional[Dict]]]] = None,
+        min_score: float = 0.0
+    ) -> List[Dict]:
+        """
+        Retrieve documents for several queries with one embeddings call and
+        one Qdrant batch search.
+
+        Args:
+            queries: User queries
+            top_k: Number of results per query
+            filters: Metadata filters shared by all queries, or one per query
+            min_score: Minimum similarity score threshold
+
+        Returns:
+            One response per query, in the same format as retrieve()
+        """
+        if not queries:
+            return []
+        if filters is None or isinstance(filters, dict):
+            filters = [filters] * len(queries)
+
+        if self.result_cache is None:
+            return self._retrieve_many(queries, top_k, filters, min_score)
+
+        # Only queries missing from the result cache are embedded and searched
+        keys = [
+            self.result_cache.make_key(query, top_k, query_filters, min_score, self.retrieval_mode)
+            for query, query_filters in zip(queries, filters)
+        ]
+        generation = self.result_cache.generation()
+        responses = [self.result_cache.get(key) for key in keys]
+        missing = [i for i, response in enumerate(responses) if response is None]
+
+        if missing:
+            computed = self._retrieve_many(
+                [queries[i] for i in missing],
+                top_k,
+                [filters[i] for i in missing],
+                min_score
+            )
+            for i, response in zip(missing, computed):
+                responses[i] = response
+                if not response["degraded"]:
+                    self.result_cache.put(keys[i], response, generation)
+
+        return responses
+
+    def _retrieve_many(
+        self,
+        queries: List[str],
+        top_k: int,
+        filters: List[Optional[Dict]],
+        min_score: float
+    ) -> List[Dict]:
+        """Retrieve several queries without the result cache (see retrieve_many())"""
+        if self._lexical_index_changed():
+            self._reload_lexical_index()
+        fetch_k = self._fetch_k(top_k)
+        if self.retrieval_mode == "lexical":
+            return [
+                self._format_response(query, top_k, results, min_score)
+                for query, results in zip(queries, self.lexical_index.search_batch(queries, fetch_k, filters))
+            ]
+
+        # 1. Embed all queries in one request (cache hits are not re-sent);
+        # backends with embed_queries fail fast instead of retrying with backoff
+        embed_queries = getattr(self.embedder, "embed_queries", self.embedder.embed_texts)
+        try:
+            query_embeddings = embed_queries(queries)
+        except Exception as e:
+            if self.lexical_index is None:
+                raise
+            print(f"⚠️  Query embedding failed ({e}); using the BM25 index")
+            query_embeddings = np.full((len(queries), self.embedder.embedding_dim), np.nan, dtype=np.float32)
+
+        # Queries whose embedding failed fall back to BM25 (or get an empty
+        # result) instead of failing the batch
+        valid = ~np.isnan(query_embeddings).any(axis=1)
+
+        # 2. Near-duplicates of recent queries reuse their results
+        semantic_hits, slots = {}, {}
+        for i in np.flatnonzero(valid).tolist():
+            cached, slots[i] = self._semantic_lookup(queries[i], query_embeddings[i], top_k, filters[i], min_score)
+            if cached is not None:
+                semantic_hits[i] = cached
+
+        # 3. Search all remaining valid queries in one round trip
+        valid_indices = [i for i in np.flatnonzero(valid).tolist() if i not in semantic_hits]
+        batch_results = self.vector_store.search_batch(
+            query_embeddings=query_embeddings[valid_indices],
+            top_k=fetch_k,
+            filters=[filters[i] for i in valid_indices],
+            query_texts=[queries[i] for i in valid_indices],
+            with_vectors=self.diversify
+        )
+        results_by_index = dict(zip(valid_indices, batch_results))
+
+        responses = []
+        for i, query in enumerate(queries):
+            if i in semantic_hits:
+                responses.append(semantic_hits[i])
+                continue
+
+            if i not in results_by_index:
+                # Embedding failed: BM25 answer (or none), marked degraded so
+                # the result cache does not keep it
+                results = self.lexical_index.search(query, fetch_k, filters[i]) if self.lexical_index is not None else []
+                responses.append(self._format_response(query, top_k, results, min_score, degraded=True))
+                continue
+
+            results = results_by_index[i]
+            if self.retrieval_mode == "fusion":
+                lexical_results = self.lexical_index.search(query, fetch_k, filters[i])
+                results = reciprocal_rank_fusion([results, lexical_results], fetch_k, self.rrf_k)
+            response = self._format_response(query, top_k, results, min_score)
+            self._semantic_store(slots.get(i), query, query_embeddings[i], response)
+            responses.append(response)
+
+        return responses
+
+    def _lexical_index_changed(self) -> bool:
+        """Whether the collection was re-ingested since the lexical index was loaded (one stat())"""
+        with self._lexical_lock:
+            _, changed = self._lexical_watcher.check()
+        return changed
+
+    def _reload_lexical_index(self):
+        """Load the BM25 index saved by the last ingestion (kept as is when none was saved)"""
+        index = BM25Index.load_if_exists(
+            path=self.lexical_index_path,
+            collection_name=self.vector_store.collection_name
+        )
+        if index is not None:
+            self.lexical_index = index
+            print(f"✓ Reloaded BM25 index: {len(index)} chunks")
+
+    def _fetch_k(self, top_k: int) -> int:
+        """Number of candidates to search for top_k results (a larger pool when diversifying)"""
+        return top_k * self.fetch_factor if self.diversify else top_k
+
+    def _semantic_lookup(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        top_k: int,
+        filters: Optional[Dict],
+        min_score: float
+    ) -> Tuple[Optional[Dict], Optional[Tuple[Hashable, int]]]:
+        """
+        Look up a near-duplicate query in the semantic cache.
+
+        Returns:
+            Tuple of (cached response or None, (scope, generation) to store a
+            freshly computed response under, or None without a semantic cache)
+        """
+        if self.semantic_cache is None:
+            return None, None
+
+        scope = self.semantic_cache.make_scope(top_k, filters, min_score, self.retrieval_mode)
+        generation = self.semantic_cache.generation()
+        return self.semantic_cache.lookup(scope, query_embedding, query), (scope, generation)
+
+    def _semantic_store(
+        self,
+        slot: Optional[Tuple[Hashable, int]],
+        query: str,
+        query_embedding: np.ndarray,
+        response: Dict
+    ):
+        """Store a computed response in the semantic cache (slot from _semantic_lookup())"""
+        if slot is not None:
+            scope, generation = slot
+            self.semantic_cache.put(scope, query, query_embedding, response, generation)
+
+    def _format_response(
+        self,
+        query: str,
+        top_k: int,
+        results: List[Dict],
+        min_score: float,
+        degraded: bool = False
+    ) -> Dict:
+        """
+        Diversify results (when enabled), apply the score threshold and
+        build the retrieval response.
+
+        Args:
+            query: User query
+            top_k: Number of results requested
+            results: Search results
+            min_score: Minimum similarity score threshold
+            degraded: Results come from the BM25 index because embedding failed
+
+        Returns:
+            Dictionary with retrieved documents and metadata
+        """
+        # Merge duplicate chunks and pick top_k of the candidate pool by MMR
+        if self.diversify:
+            results = diversify_results(results, self.mmr_lambda, self.dedup_threshold, top_k)
+        results = results[:top_k]
+
+        # Filter by minimum score (exact model number / error code matches of
+        # hybrid search are kept whatever their cosine)
         filtered_results = [
             r for r in results
-            if r["score"] >= min_score
+            if r["score"] >= min_score or r.get("code_match")
         ]
 
-        # 4. Format response
+        # Format response
         return {
             "query": query,
             "top_k": top_k,
             "total_results": len(filtered_results),
             "results": filtered_results,
-            "context": self._build_context(filtered_results)
+            "context": self._build_context(filtered_results),
+            "degraded": degraded
+        }
+
+    def get_cache_stats(self) -> Dict:
+        """
+        Get result, semantic and embedding cache statistics.
+
+        Returns:
+            Dictionary with 'results', 'semantic' and 'embeddings' stats (None when disabled)
+        """
+        embedding_cache = getattr(self.embedder, "cache", None)
+        return {
+            "results": self.result_cache.get_stats() if self.result_cache is not None else None,
+            "semantic": self.semantic_cache.get_stats() if self.semantic_cache is not None else None,
+            "embeddings": embedding_cache.get_stats() if embedding_cache is not None else None
         }
 
     def _build_context(self, results: List[Dict]) -> str:
@@ -118,6 +593,56 @@ class RAGRetriever:
         Returns:
             Dictionary with retrieved documents
         """
+        return self.retrieve(
+            query=query,
+            top_k=top_k,
+            filters=self.metadata_filters(brand, product_type, model)
+        )
+
+    async def aretrieve_with_metadata(
+        self,
+        query: str,
+        top_k: int = 5,
+        brand: Optional[str] = None,
+        product_type: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Dict:
+        """
+        Retrieve with metadata filtering without blocking the event loop.
+
+        Args:
+            query: User query
+            top_k: Number of results
+            brand: Filter by brand (e.g., "Samsung")
+            product_type: Filter by product type (e.g., "refrigerator", "microwave")
+            model: Filter by model number
+
+        Returns:
+            Dictionary with retrieved documents
+        """
+        return await self.aretrieve(
+            query=query,
+            top_k=top_k,
+            filters=self.metadata_filters(brand, product_type, model)
+        )
+
+    @staticmethod
+    def metadata_filters(
+        brand: Optional[str] = None,
+        product_type: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Build metadata filters from brand / product type / model.
+
+        Args:
+            brand: Filter by brand
+            product_type: Filter by product type
+            model: Filter by model number
+
+        Returns:
+            Filter dict, or None when no filter is set
+        """
         # Build filters - map product_type to appliance_type (actual metadata field)
         filters = {}
         if brand:
@@ -127,11 +652,7 @@ class RAGRetriever:
         if model:
             filters["model_number"] = model  # Fixed: use model_number
 
-        return self.retrieve(
-            query=query,
-            top_k=top_k,
-            filters=filters if filters else None
-        )
+        return filters if filters else None
 
 
 def search_manuals_rag(
@@ -143,6 +664,9 @@ def search_manuals_rag(
     """
     Convenience function for searching manuals (compatible with agent tools).
 
+    Uses the process-wide retriever from rag_pipeline.clients, so repeated
+    calls share embedder, clients and pooled connections.
+
     Args:
         query: Search query
         top_k: Number of results
@@ -152,7 +676,7 @@ def search_manuals_rag(
     Returns:
         Dictionary with search results in agent-compatible format
     """
-    retriever = RAGRetriever()
+    retriever = get_retriever()
 
     result = retriever.retrieve_with_metadata(
         query=query,
@@ -161,15 +685,88 @@ def search_manuals_rag(
         product_type=product_type
     )
 
-    # Format for agent compatibility
+    return _agent_response(query, result)
+
+
+async def asearch_manuals_rag(
+    query: str,
+    top_k: int = 5,
+    brand: Optional[str] = "Samsung",
+    product_type: Optional[str] = "refrigerator"
+) -> dict:
+    """
+    Async version of search_manuals_rag for tools running on an event loop.
+
+    Embedding and search go through the shared AsyncOpenAI / AsyncQdrantClient
+    connection pools, so concurrent sessions do not each hold a thread.
+
+    Args:
+        query: Search query
+        top_k: Number of results
+        brand: Brand filter
+        product_type: Product type filter
+
+    Returns:
+        Dictionary with search results in agent-compatible format
+    """
+    retriever = get_retriever()
+
+    result = await retriever.aretrieve_with_metadata(
+        query=query,
+        top_k=top_k,
+        brand=brand,
+        product_type=product_type
+    )
+
+    return _agent_response(query, result)
+
+
+def search_manuals_rag_batch(
+    queries: List[str],
+    top_k: int = 5,
+    brand: Union[Optional[str], List[Optional[str]]] = "Samsung",
+    product_type: Union[Optional[str], List[Optional[str]]] = "refrigerator"
+) -> List[dict]:
+    """
+    Search manuals for several queries in one embeddings call and one Qdrant round trip.
+
+    Args:
+        queries: Search queries
+        top_k: Number of results per query
+        brand: Brand filter, shared or one per query
+        product_type: Product type filter, shared or one per query
+
+    Returns:
+        One agent-compatible result dict per query (same format as search_manuals_rag)
+    """
+    brands = brand if isinstance(brand, list) else [brand] * len(queries)
+    product_types = product_type if isinstance(product_type, list) else [product_type] * len(queries)
+
+    retriever = get_retriever()
+
+    results = retriever.retrieve_many(
+        queries=queries,
+        top_k=top_k,
+        filters=[
+            retriever.metadata_filters(b, p)
+            for b, p in zip(brands, product_types)
+        ]
+    )
+
+    return [_agent_response(query, result) for query, result in zip(queries, results)]
+
+
+def _agent_response(query: str, result: Dict) -> dict:
+    """Format a retrieval response for agent tools"""
     return {
         "status": "success",
         "query": query,
         "found_information": result["total_results"] > 0,
         "context": result["context"],
         "results": result["results"],
-        "source": "RAG System (Qdrant + OpenAI)",
-        "num_results": result["total_results"]
+        "source": "RAG System (BM25 fallback)" if result.get("degraded") else "RAG System (Qdrant + OpenAI)",
+        "num_results": result["total_results"],
+        "degraded": result.get("degraded", False)
     }
 
 
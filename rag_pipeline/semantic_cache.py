@@ -0,0 +1,279 @@
+"""
+Semantic Query Cache
+
+Near-duplicate query cache inside RAGRetriever. Users describe the same
+problem in many ways ("fridge not cooling", "refrigerator warm inside"),
+so exact-string caching misses most repeats; here a new query reuses the
+results of a recent query whose embedding is close enough:
+- Entries are scoped by (top_k, filters, min_score, retrieval mode), so a
+  hit never crosses brand / appliance type filters
+- Each scope is a small in-memory matrix of normalized query embeddings;
+  a lookup is one matrix-vector product
+- A hit needs cosine similarity >= SEMANTIC_CACHE_THRESHOLD and skips the
+  vector search; entries expire with a TTL and are dropped when ingestion
+  bumps the collection generation (see result_cache.bump_generation)
+- Stats include the best-match similarity of recent lookups and the hit
+  ratio each candidate threshold would have given, for threshold tuning
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict, Hashable, Optional, Sequence
+import numpy as np
+from dotenv import load_dotenv
+
+from .result_cache import GenerationWatcher, copy_response
+
+load_dotenv()
+
+# Thresholds reported in get_stats()["hit_ratio_by_threshold"]
+CANDIDATE_THRESHOLDS = (0.85, 0.88, 0.90, 0.92, 0.94, 0.96, 0.98)
+
+
+class SemanticCache:
+    """Filter-scoped cache of retrieval responses, matched by query embedding similarity"""
+
+    def __init__(
+        self,
+        collection_name: Optional[str] = None,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        sample_size: int = 1000
+    ):
+        """
+        Initialize semantic cache.
+
+        Args:
+            collection_name: Collection whose generation invalidates entries
+                             (default: QDRANT_COLLECTION_NAME)
+            threshold: Minimum cosine similarity for a hit
+                       (default: SEMANTIC_CACHE_THRESHOLD or 0.95)
+            max_entries: Cached queries per scope before least recently used
+                         ones are evicted (default: SEMANTIC_CACHE_MAX_ENTRIES or 256)
+            ttl_seconds: Entry lifetime (default: SEMANTIC_CACHE_TTL_SECONDS or 600)
+            sample_size: Recent best-match similarities kept for get_stats()
+        """
+        self.threshold = threshold or float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+        self.max_entries = max_entries or int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "256"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "600"))
+        self._watcher = GenerationWatcher(collection_name)
+        self.collection_name = self._watcher.collection_name
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._hit_similarity_sum = 0.0
+
+        self._lock = threading.Lock()
+        self._scopes: Dict[Hashable, Dict] = {}
+        self._similarities = deque(maxlen=sample_size)
+
+    @staticmethod
+    def make_scope(
+        top_k: int,
+        filters: Optional[Dict] = None,
+        min_score: float = 0.0,
+        mode: str = "dense"
+    ) -> Hashable:
+        """
+        Build the scope of a retrieval; queries only match within their scope.
+
+        Args:
+            top_k: Number of results
+            filters: Metadata filters
+            min_score: Score threshold
+            mode: Retrieval mode
+
+        Returns:
+            Hashable scope key
+        """
+        return (top_k, tuple(sorted((filters or {}).items())), min_score, mode)
+
+    def generation(self) -> int:
+        """
+        Current ingestion generation; a change drops every cached query.
+
+        Returns:
+            Generation counter
+        """
+        generation, changed = self._watcher.check()
+        if changed:
+            with self._lock:
+                self.invalidations += sum(len(entries["queries"]) for entries in self._scopes.values())
+                self._scopes.clear()
+        return generation
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, scope: Hashable, query_embedding: Sequence[float], query: Optional[str] = None) -> Optional[Dict]:
+        """
+        Find the cached response of a near-duplicate query.
+
+        Args:
+            scope: Key from make_scope()
+            query_embedding: Embedding of the new query
+            query: New query text (replaces the cached query in the response)
+
+        Returns:
+            Copy of the cached response with a 'semantic_match' entry
+            ({"query", "similarity"}), or None
+        """
+        self.generation()
+        vector = self._normalize(query_embedding)
+
+        with self._lock:
+            entries = self._scopes.get(scope)
+            if entries is None or not entries["queries"] or entries["vectors"].shape[1] != len(vector):
+                self.misses += 1
+                return None
+
+            similarities = entries["vectors"] @ vector
+            now = time.monotonic()
+            similarities[entries["expires"] < now] = -np.inf
+
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if np.isfinite(similarity):
+                self._similarities.append(similarity)
+
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._hit_similarity_sum += similarity
+            entries["last_used"][best] = now
+            response = entries["responses"][best]
+            matched_query = entries["queries"][best]
+
+        response = copy_response(response)
+        if query is not None:
+            response["query"] = query
+        response["semantic_match"] = {"query": matched_query, "similarity": similarity}
+        return response
+
+    def put(
+        self,
+        scope: Hashable,
+        query: str,
+        query_embedding: Sequence[float],
+        response: Dict,
+        generation: Optional[int] = None
+    ):
+        """
+        Store a response under its query embedding.
+
+        Args:
+            scope: Key from make_scope()
+            query: Query text
+            query_embedding: Embedding of the query
+            response: Retrieval response
+            generation: Generation read before the response was computed; the
+                        response is dropped if a re-ingestion finished meanwhile
+        """
+        if generation is not None and generation != self.generation():
+            return
+
+        vector = self._normalize(query_embedding)
+        response = copy_response(response)
+        response.pop("semantic_match", None)
+        now = time.monotonic()
+
+        with self._lock:
+            entries = self._scopes.get(scope)
+            if entries is None or entries["vectors"].shape[1] != len(vector):
+                entries = self._scopes[scope] = {
+                    "vectors": np.zeros((0, len(vector)), dtype=np.float32),
+                    "queries": [],
+                    "responses": [],
+                    "expires": np.zeros(0),
+                    "last_used": np.zeros(0)
+                }
+
+            # Drop expired rows before deciding whether to evict
+            expired = np.flatnonzero(entries["expires"] < now)
+            if len(expired):
+                self.expirations += len(expired)
+                keep = np.setdiff1d(np.arange(len(entries["queries"])), expired)
+                entries["vectors"] = entries["vectors"][keep]
+                entries["queries"] = [entries["queries"][i] for i in keep]
+                entries["responses"] = [entries["responses"][i] for i in keep]
+                entries["expires"] = entries["expires"][keep]
+                entries["last_used"] = entries["last_used"][keep]
+
+            if len(entries["queries"]) >= self.max_entries:
+                # Reuse the row of the least recently used query
+                row = int(np.argmin(entries["last_used"]))
+                self.evictions += 1
+                entries["vectors"][row] = vector
+                entries["queries"][row] = query
+                entries["responses"][row] = response
+                entries["expires"][row] = now + self.ttl_seconds
+                entries["last_used"][row] = now
+                return
+
+            entries["vectors"] = np.vstack([entries["vectors"], vector[None, :]])
+            entries["queries"].append(query)
+            entries["responses"].append(response)
+            entries["expires"] = np.append(entries["expires"], now + self.ttl_seconds)
+            entries["last_used"] = np.append(entries["last_used"], now)
+
+    def clear(self):
+        """Remove all cached queries"""
+        with self._lock:
+            self._scopes.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size, hit/miss counters and threshold-tuning data:
+            percentiles of recent best-match similarities and the hit ratio
+            each candidate threshold would have given on the same lookups
+        """
+        lookups = self.hits + self.misses
+        with self._lock:
+            similarities = np.asarray(self._similarities, dtype=np.float32)
+            entries = sum(len(scope["queries"]) for scope in self._scopes.values())
+            scopes = len(self._scopes)
+
+        stats = {
+            "entries": entries,
+            "scopes": scopes,
+            "max_entries_per_scope": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "threshold": self.threshold,
+            "generation": self._watcher.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "avg_hit_similarity": self._hit_similarity_sum / self.hits if self.hits else None,
+            "similarity_samples": len(similarities),
+            "similarity_percentiles": None,
+            "hit_ratio_by_threshold": None
+        }
+
+        if len(similarities):
+            # Share of recent lookups (with a non-empty scope) each threshold would serve
+            stats["similarity_percentiles"] = {
+                f"p{p}": round(float(np.percentile(similarities, p)), 4) for p in (50, 75, 90, 95, 99)
+            }
+            stats["hit_ratio_by_threshold"] = {
+                f"{t:.2f}": round(float(np.mean(similarities >= t)), 4)
+                for t in sorted(set(CANDIDATE_THRESHOLDS) | {round(self.threshold, 2)})
+            }
+
+        return stats
@@ -0,0 +1,163 @@
+"""
+Sparse Term Vectors
+
+BM25-style sparse vectors for hybrid search. Exact tokens that embed poorly,
+such as model numbers (RS28A5F61SR, RS28A5F61**) and error codes (C-10),
+become index terms that Qdrant matches directly:
+- Terms are hashed into a 31-bit index space (no vocabulary to store or sync)
+- Code-like tokens (letters + digits) also emit prefix terms, so a full model
+  number matches wildcard forms in manuals and shares terms with its family
+- Document weights are BM25 term-frequency saturation; Qdrant applies IDF
+  server-side (Modifier.IDF), so stored weights never go stale as the corpus grows
+- Query weights are 1 per distinct term
+"""
+
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_/.][a-z0-9]+)*")
+SPLIT_PATTERN = re.compile(r"[-_/.]")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have if in into is it its of on or that the
+their then there these this to was were will with your you not do does can
+""".split())
+
+# Prefix terms are emitted from this length up to the full code
+MIN_CODE_PREFIX = 6
+
+
+def is_code(token: str) -> bool:
+    """Whether a token looks like a model number or error code (letters and digits)"""
+    return any(c.isdigit() for c in token) and any(c.isalpha() for c in token)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms.
+
+    Hyphenated/dotted tokens are kept whole and also split into their parts
+    and a joined form, so "C-10", "c10" and "C 10" share terms.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Terms in order (stopwords removed)
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+
+        parts = SPLIT_PATTERN.split(token)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part not in STOPWORDS)
+            terms.append("".join(parts))
+
+    return terms
+
+
+def term_index(term: str) -> int:
+    """Stable 31-bit index of a term (same across processes and machines)"""
+    return zlib.crc32(term.encode("utf-8")) & 0x7FFFFFFF
+
+
+class SparseEncoder:
+    """Encode text as hashed BM25 term vectors"""
+
+    def __init__(
+        self,
+        k1: float = 1.2,
+        b: float = 0.75,
+        avg_doc_length: float = None
+    ):
+        """
+        Initialize encoder.
+
+        Args:
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+            avg_doc_length: Average chunk length in terms
+                            (default: SPARSE_AVG_DOC_LENGTH or 250)
+        """
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length or float(os.getenv("SPARSE_AVG_DOC_LENGTH", "250"))
+
+    def terms(self, text: str) -> List[str]:
+        """
+        Index terms of a text, including prefix terms of code-like tokens.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Terms (with repetitions, for term frequencies)
+        """
+        terms = tokenize(text)
+        prefixes = []
+        for term in terms:
+            if is_code(term) and len(term) > MIN_CODE_PREFIX:
+                prefixes.extend(f"^{term[:n]}" for n in range(MIN_CODE_PREFIX, len(term)))
+        return terms + prefixes
+
+    def code_terms(self, text: str) -> set:
+        """
+        Model number / error code terms of a text, including their prefix terms.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Set of code terms
+        """
+        return {term for term in self.terms(text) if term.startswith("^") or is_code(term)}
+
+    @staticmethod
+    def _to_sparse(weights: Dict[str, float]) -> Tuple[List[int], List[float]]:
+        """Hash terms to indices, summing weights of colliding terms"""
+        merged: Dict[int, float] = {}
+        for term, weight in weights.items():
+            index = term_index(term)
+            merged[index] = merged.get(index, 0.0) + weight
+        indices = sorted(merged)
+        return indices, [merged[i] for i in indices]
+
+    def encode_document(self, text: str) -> Tuple[List[int], List[float]]:
+        """
+        Encode a chunk for indexing.
+
+        Args:
+            text: Chunk text (plus any metadata worth matching exactly)
+
+        Returns:
+            (indices, values) of the sparse vector
+        """
+        counts = Counter(self.terms(text))
+        doc_length = len(tokenize(text))
+        norm = self.k1 * (1 - self.b + self.b * doc_length / self.avg_doc_length)
+
+        return self._to_sparse({
+            term: tf * (self.k1 + 1) / (tf + norm)
+            for term, tf in counts.items()
+        })
+
+    def encode_query(self, text: str) -> Tuple[List[int], List[float]]:
+        """
+        Encode a search query.
+
+        Args:
+            text: Query text
+
+        Returns:
+            (indices, values) of the sparse vector
+        """
+        return self._to_sparse({term: 1.0 for term in self.terms(text)})
@@ -5,21 +5,219 @@ Store and retrieve vector embeddings using Qdrant.
 """
 
 import os
+import time
 import uuid
-from typing import List, Dict, Optional
-from qdrant_client import QdrantClient
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from itertools import islice
+from typing import List, Dict, Iterable, Iterator, Optional, Sequence, Union
+import numpy as np
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.models import (
     Distance,
     VectorParams,
     PointStruct,
     Filter,
     FieldCondition,
-    MatchValue
+    MatchValue,
+    FilterSelector,
+    PayloadSchemaType,
+    SearchRequest,
+    SearchParams,
+    HnswConfigDiff,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    SparseVectorParams,
+    SparseIndexParams,
+    SparseVector,
+    Modifier,
+    Prefetch,
+    FusionQuery,
+    Fusion,
+    QueryRequest,
+    SetPayload,
+    SetPayloadOperation
 )
 from dotenv import load_dotenv
 
+from .sparse import SparseEncoder
+
 load_dotenv()
 
+# Named vectors of hybrid collections (QDRANT_HYBRID); plain collections
+# keep a single unnamed dense vector
+DENSE_VECTOR = "dense"
+SPARSE_VECTOR = "sparse"
+
+# Payload fields used in search filters (see RAGRetriever.retrieve_with_metadata).
+# Keyword indexes let Qdrant resolve MatchValue conditions from the index and
+# plan filtered HNSW searches instead of checking payloads point by point.
+PAYLOAD_INDEXES = {
+    "brand": PayloadSchemaType.KEYWORD,
+    "appliance_type": PayloadSchemaType.KEYWORD,
+    "model_number": PayloadSchemaType.KEYWORD
+}
+
+# Client errors worth retrying; other 4xx responses fail the batch at once
+RETRYABLE_STATUS_CODES = {408, 429}
+NON_RETRYABLE_GRPC_CODES = {
+    "INVALID_ARGUMENT", "NOT_FOUND", "ALREADY_EXISTS", "PERMISSION_DENIED",
+    "UNAUTHENTICATED", "FAILED_PRECONDITION", "OUT_OF_RANGE", "UNIMPLEMENTED"
+}
+
+# Indexed fields -> the keys ingestion wrote for them before it used the
+# indexed names (see QdrantStore.backfill_payload_fields)
+LEGACY_PAYLOAD_FIELDS = {
+    "appliance_type": "product_type",
+    "model_number": "model"
+}
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Whether a failed Qdrant request may succeed when repeated.
+
+    Client errors (4xx except timeouts and rate limits, or the matching gRPC
+    status codes) and local validation errors are not retried.
+
+    Args:
+        error: Exception raised by the client
+
+    Returns:
+        False for errors a retry cannot fix
+    """
+    if isinstance(error, UnexpectedResponse):
+        status = error.status_code or 500
+        return status >= 500 or status in RETRYABLE_STATUS_CODES
+    code = getattr(error, "code", None)
+    if callable(code):
+        # grpc.RpcError (prefer_grpc)
+        return getattr(code(), "name", "") not in NON_RETRYABLE_GRPC_CODES
+    return not isinstance(error, (ValueError, TypeError, KeyError))
+
+
+def to_vector_list(vector: Sequence[float]) -> List[float]:
+    """
+    Convert a vector to the plain list the Qdrant client serializes.
+
+    Args:
+        vector: NumPy array or sequence of floats
+
+    Returns:
+        List of floats
+    """
+    if isinstance(vector, np.ndarray):
+        return vector.astype(np.float32, copy=False).tolist()
+    return list(vector)
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean environment variable"""
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+def build_quantization_config(quantization: Optional[str]):
+    """
+    Build the Qdrant quantization config for a quantization mode.
+
+    Args:
+        quantization: 'scalar', 'binary' or None/'none'
+
+    Returns:
+        Quantization config, or None for full-precision vectors
+    """
+    if not quantization or quantization.lower() == "none":
+        return None
+
+    if quantization.lower() == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
+            )
+        )
+    if quantization.lower() == "binary":
+        return BinaryQuantization(
+            binary=BinaryQuantizationConfig(always_ram=True)
+        )
+
+    raise ValueError(f"Unsupported quantization: {quantization} (use scalar, binary or none)")
+
+
+def create_qdrant_client(
+    url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    prefer_grpc: Optional[bool] = None,
+    grpc_port: Optional[int] = None,
+    **kwargs
+) -> QdrantClient:
+    """
+    Create a Qdrant client for the configured transport.
+
+    With prefer_grpc, requests go over gRPC: vectors are protobuf-encoded
+    instead of JSON floats and share one multiplexed HTTP/2 connection.
+
+    Args:
+        url: Qdrant server URL (default: QDRANT_URL)
+        api_key: Qdrant API key (default: QDRANT_API_KEY)
+        prefer_grpc: Use gRPC transport (default: QDRANT_PREFER_GRPC or False)
+        grpc_port: gRPC port (default: QDRANT_GRPC_PORT or 6334)
+        **kwargs: Passed to QdrantClient (e.g. limits, timeout)
+
+    Returns:
+        QdrantClient instance
+    """
+    url = url or os.getenv("QDRANT_URL", "http://localhost:6333")
+    api_key = api_key or os.getenv("QDRANT_API_KEY")
+    if prefer_grpc is None:
+        prefer_grpc = env_flag("QDRANT_PREFER_GRPC")
+    grpc_port = grpc_port or int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+
+    if api_key:
+        kwargs["api_key"] = api_key
+
+    return QdrantClient(url=url, prefer_grpc=prefer_grpc, grpc_port=grpc_port, **kwargs)
+
+
+def create_async_qdrant_client(
+    url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    prefer_grpc: Optional[bool] = None,
+    grpc_port: Optional[int] = None,
+    **kwargs
+) -> AsyncQdrantClient:
+    """
+    Create an asyncio Qdrant client for the configured transport.
+
+    Same configuration as create_qdrant_client(); the client belongs to the
+    event loop that first uses it.
+
+    Args:
+        url: Qdrant server URL (default: QDRANT_URL)
+        api_key: Qdrant API key (default: QDRANT_API_KEY)
+        prefer_grpc: Use gRPC transport (default: QDRANT_PREFER_GRPC or False)
+        grpc_port: gRPC port (default: QDRANT_GRPC_PORT or 6334)
+        **kwargs: Passed to AsyncQdrantClient (e.g. limits, timeout)
+
+    Returns:
+        AsyncQdrantClient instance
+    """
+    url = url or os.getenv("QDRANT_URL", "http://localhost:6333")
+    api_key = api_key or os.getenv("QDRANT_API_KEY")
+    if prefer_grpc is None:
+        prefer_grpc = env_flag("QDRANT_PREFER_GRPC")
+    grpc_port = grpc_port or int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+
+    if api_key:
+        kwargs["api_key"] = api_key
+
+    return AsyncQdrantClient(url=url, prefer_grpc=prefer_grpc, grpc_port=grpc_port, **kwargs)
+
 
 class QdrantStore:
     """Qdrant vector store for embeddings"""
@@ -29,7 +227,12 @@ class QdrantStore:
         url: Optional[str] = None,
         api_key: Optional[str] = None,
         collection_name: Optional[str] = None,
-        embedding_dim: int = 1536
+        embedding_dim: int = 1536,
+        client: Optional[QdrantClient] = None,
+        prefer_grpc: Optional[bool] = None,
+        grpc_port: Optional[int] = None,
+        hybrid: Optional[bool] = None,
+        async_client: Optional[AsyncQdrantClient] = None
     ):
         """
         Initialize Qdrant client.
@@ -38,25 +241,71 @@ class QdrantStore:
             url: Qdrant server URL
             api_key: Qdrant API key (for cloud)
             collection_name: Collection name for vectors
-            embedding_dim: Dimension of embeddings (1536 for OpenAI small)
+            embedding_dim: Dimension of embeddings (use embedder.embedding_dim so reduced
+                           dimensions and local backends get a matching collection)
+            client: Shared Qdrant client (see rag_pipeline.clients); a new one is created if not provided
+            prefer_grpc: Use the gRPC transport for search and upsert
+                         (default: QDRANT_PREFER_GRPC or False)
+            grpc_port: gRPC port (default: QDRANT_GRPC_PORT or 6334)
+            hybrid: Store named dense + sparse (BM25 term) vectors and fuse both
+                    in search with RRF (default: QDRANT_HYBRID or False)
+            async_client: Shared asyncio Qdrant client for asearch() (see
+                          rag_pipeline.clients); created on first use if not provided
         """
         self.url = url or os.getenv("QDRANT_URL", "http://localhost:6333")
         self.api_key = api_key or os.getenv("QDRANT_API_KEY")
         self.collection_name = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "fridge_manuals")
         self.embedding_dim = embedding_dim
 
+        self.prefer_grpc = env_flag("QDRANT_PREFER_GRPC") if prefer_grpc is None else prefer_grpc
+
         # Initialize Qdrant client
-        if self.api_key:
-            self.client = QdrantClient(url=self.url, api_key=self.api_key)
-        else:
-            self.client = QdrantClient(url=self.url)
+        self.client = client or create_qdrant_client(
+            url=self.url,
+            api_key=self.api_key,
+            prefer_grpc=self.prefer_grpc,
+            grpc_port=grpc_port
+        )
+        self.grpc_port = grpc_port
+        self.async_client = async_client
 
-    def create_collection(self, force_recreate: bool = False):
+        # Throughput and failures of the last add_documents call
+        self.last_upload_stats: Dict = {}
+
+        # Default search-time accuracy/speed trade-off (overridable per search)
+        self.hnsw_ef = int(os.getenv("QDRANT_HNSW_EF", "0")) or None
+        self.quantization_rescore = env_flag("QDRANT_QUANTIZATION_RESCORE", True)
+        self.quantization_oversampling = float(os.getenv("QDRANT_QUANTIZATION_OVERSAMPLING", "0")) or None
+
+        # Hybrid search: sparse terms are computed locally at upsert and query time
+        self.hybrid = env_flag("QDRANT_HYBRID") if hybrid is None else hybrid
+        self.sparse_encoder = SparseEncoder() if self.hybrid else None
+        # Candidates fetched per vector before fusion, as a multiple of top_k
+        self.hybrid_prefetch = int(os.getenv("QDRANT_HYBRID_PREFETCH", "4"))
+
+    def create_collection(
+        self,
+        force_recreate: bool = False,
+        hnsw_m: Optional[int] = None,
+        hnsw_ef_construct: Optional[int] = None,
+        quantization: Optional[str] = None,
+        on_disk: Optional[bool] = None
+    ):
         """
         Create Qdrant collection.
 
+        Storage options only apply when the collection is created; use
+        force_recreate to change them on an existing collection.
+
         Args:
             force_recreate: If True, delete existing collection first
+            hnsw_m: HNSW edges per node (default: QDRANT_HNSW_M or Qdrant's 16)
+            hnsw_ef_construct: HNSW build-time neighbours (default: QDRANT_HNSW_EF_CONSTRUCT or Qdrant's 100)
+            quantization: 'scalar' (int8, 4x smaller), 'binary' (32x smaller) or None
+                          (default: QDRANT_QUANTIZATION); quantized vectors stay in RAM
+                          and originals are used for rescoring
+            on_disk: Keep original float32 vectors on disk (memmap) instead of RAM
+                     (default: QDRANT_ON_DISK or False)
         """
         # Check if collection exists
         collections = self.client.get_collections().collections
@@ -67,121 +316,797 @@ class QdrantStore:
             self.client.delete_collection(self.collection_name)
             collection_exists = False
 
+        if collection_exists:
+            existing_dim = self.get_vector_size()
+            if existing_dim is not None and existing_dim != self.embedding_dim:
+                raise ValueError(
+                    f"Collection {self.collection_name} stores {existing_dim}-dim vectors but the "
+                    f"embedder produces {self.embedding_dim}-dim vectors; recreate it "
+                    f"(force_recreate=True) or use another collection name"
+                )
+            if self.hybrid and not self.is_hybrid_collection():
+                raise ValueError(
+                    f"Collection {self.collection_name} has no named dense/sparse vectors; "
+                    f"recreate it (force_recreate=True) to enable hybrid search"
+                )
+
         if not collection_exists:
+            hnsw_m = hnsw_m or int(os.getenv("QDRANT_HNSW_M", "0")) or None
+            hnsw_ef_construct = hnsw_ef_construct or int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "0")) or None
+            quantization = quantization or os.getenv("QDRANT_QUANTIZATION") or None
+            if on_disk is None:
+                on_disk = env_flag("QDRANT_ON_DISK")
+
+            dense_params = VectorParams(
+                size=self.embedding_dim,
+                distance=Distance.COSINE,
+                on_disk=on_disk
+            )
+
             print(f"Creating collection: {self.collection_name}")
             self.client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=self.embedding_dim,
-                    distance=Distance.COSINE
-                )
+                vectors_config={DENSE_VECTOR: dense_params} if self.hybrid else dense_params,
+                sparse_vectors_config=(
+                    {
+                        SPARSE_VECTOR: SparseVectorParams(
+                            index=SparseIndexParams(on_disk=on_disk),
+                            modifier=Modifier.IDF
+                        )
+                    }
+                    if self.hybrid else None
+                ),
+                hnsw_config=(
+                    HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct)
+                    if hnsw_m or hnsw_ef_construct else None
+                ),
+                quantization_config=build_quantization_config(quantization)
             )
-            print(f"✓ Collection created: {self.collection_name}")
+            print(f"✓ Collection created: {self.collection_name} "
+                  f"(quantization: {quantization or 'none'}, on_disk: {on_disk}, hybrid: {self.hybrid})")
+
+            # Index filter fields up front, while the collection is empty
+            self.ensure_payload_indexes()
         else:
             print(f"Collection already exists: {self.collection_name}")
 
+    def get_payload_indexes(self) -> Dict[str, str]:
+        """
+        Get the payload indexes configured on the collection.
+
+        Returns:
+            Dictionary of field name -> index type
+        """
+        schema = self.client.get_collection(self.collection_name).payload_schema or {}
+        return {
+            field: getattr(info.data_type, "value", str(info.data_type))
+            for field, info in schema.items()
+        }
+
+    def ensure_payload_indexes(self, indexes: Optional[Dict[str, PayloadSchemaType]] = None) -> List[str]:
+        """
+        Create missing payload indexes (idempotent; safe on populated collections).
+
+        An index whose type differs from the declared one is dropped and rebuilt.
+
+        Args:
+            indexes: Field name -> index type (default: PAYLOAD_INDEXES)
+
+        Returns:
+            Names of the fields that were (re)indexed
+        """
+        indexes = indexes or PAYLOAD_INDEXES
+        existing = self.get_payload_indexes()
+        created = []
+
+        for field, schema_type in indexes.items():
+            if existing.get(field) == schema_type.value:
+                continue
+
+            if field in existing:
+                print(f"Rebuilding payload index {field}: {existing[field]} -> {schema_type.value}")
+                self.client.delete_payload_index(self.collection_name, field, wait=True)
+
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field,
+                field_schema=schema_type,
+                wait=True
+            )
+            created.append(field)
+            print(f"✓ Payload index created: {field} ({schema_type.value})")
+
+        return created
+
+    def backfill_payload_fields(self, batch_size: int = 256) -> int:
+        """
+        Copy legacy payload keys (model, product_type) to the indexed fields
+        (model_number, appliance_type) on points that lack them.
+
+        Points ingested before ingestion wrote the indexed names are otherwise
+        invisible to the brand/model/appliance filters and their indexes.
+
+        Args:
+            batch_size: Points per scroll request and per payload update
+
+        Returns:
+            Number of points updated
+        """
+        updated = 0
+        offset = None
+
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=list(LEGACY_PAYLOAD_FIELDS) + list(LEGACY_PAYLOAD_FIELDS.values()),
+                with_vectors=False
+            )
+            operations = []
+            for point in points:
+                payload = point.payload or {}
+                missing = {
+                    field: payload[legacy] for field, legacy in LEGACY_PAYLOAD_FIELDS.items()
+                    if field not in payload and legacy in payload
+                }
+                if missing:
+                    operations.append(SetPayloadOperation(set_payload=SetPayload(payload=missing, points=[point.id])))
+            if operations:
+                self.client.batch_update_points(self.collection_name, operations, wait=True)
+                updated += len(operations)
+            if offset is None:
+                return updated
+
     def add_documents(
         self,
-        documents: List[Dict],
-        batch_size: int = 100
+        documents: Iterable[Dict],
+        batch_size: int = 100,
+        max_workers: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        skip_existing: bool = False
     ) -> int:
         """
         Add documents with embeddings to Qdrant.
 
+        Documents may be a list or any iterable/generator; they are consumed
+        batch by batch, so at most ~2x max_workers batches (plus one read
+        ahead) are held in memory regardless of the corpus size.
+
+        Batches are upserted by a pool of workers with wait=False, so uploads
+        overlap instead of waiting for each acknowledgement. The last batch
+        is sent with wait=True after all others were accepted; Qdrant applies
+        updates in order, so its completion is a barrier for the whole load.
+
+        Embeddings may be float32 NumPy vectors (as produced by the embedders)
+        or plain lists; they are converted to lists one batch at a time, inside
+        the worker, right before the upload.
+
         Args:
-            documents: List of dicts with 'text', 'embedding', 'metadata'
+            documents: Iterable of dicts with 'text', 'embedding', 'metadata'
             batch_size: Number of documents per batch
+            max_workers: Parallel upload workers (default: QDRANT_UPLOAD_WORKERS or 4)
+            max_retries: Retries per failed batch (default: QDRANT_UPLOAD_RETRIES or 3)
+            skip_existing: Drop documents whose 'id' is already stored before
+                           uploading (see existing_ids)
 
         Returns:
-            Number of documents added
+            Number of documents added (batches that still fail after retries
+            are skipped and listed in self.last_upload_stats)
         """
-        points = []
+        max_workers = max_workers or int(os.getenv("QDRANT_UPLOAD_WORKERS", "4"))
+        if max_retries is None:
+            max_retries = int(os.getenv("QDRANT_UPLOAD_RETRIES", "3"))
 
-        for doc in documents:
-            # Generate unique ID if not provided
-            doc_id = doc.get("id", str(uuid.uuid4()))
+        # Batch count is only known up front for sized inputs
+        total = f"/{-(-len(documents) // batch_size)}" if hasattr(documents, "__len__") else ""
+        iterator = iter(documents)
 
-            # Create point
-            point = PointStruct(
-                id=doc_id,
-                vector=doc["embedding"],
-                payload={
-                    "text": doc["text"],
-                    **doc.get("metadata", {})
-                }
+        skipped = 0
+
+        def next_batch() -> List[Dict]:
+            nonlocal skipped
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not skip_existing or not batch:
+                    return batch
+                existing = self.existing_ids([doc["id"] for doc in batch if "id" in doc])
+                new = [doc for doc in batch if doc.get("id") not in existing]
+                skipped += len(batch) - len(new)
+                if new:
+                    return new
+
+        batches_seen = 0
+        stored = 0
+        vector_bytes = 0
+        failed_batches = []
+        start = time.perf_counter()
+
+        def record(batch_num: int, batch: List[Dict], error: Optional[Exception]):
+            nonlocal stored, vector_bytes
+            if error is None:
+                stored += len(batch)
+                vector_bytes += sum(np.asarray(doc["embedding"]).size * 4 for doc in batch)
+                print(f"✓ Uploaded batch {batch_num}{total} ({len(batch)} documents)")
+            else:
+                failed_batches.append({"batch": batch_num, "documents": len(batch), "error": str(error)})
+                retries = f" after {max_retries} retries" if is_retryable(error) else ""
+                print(f"✗ Batch {batch_num}{total} failed{retries}: {error}")
+
+        # Bound the batches held in memory by queued uploads
+        max_in_flight = max_workers * 2
+
+        # Read one batch ahead so the last batch is known and can carry the barrier
+        batch = next_batch()
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="qdrant-upsert") as pool:
+            in_flight = {}
+            while batch:
+                following = next_batch()
+                if not following:
+                    break
+
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(*in_flight.pop(future), future.result())
+
+                batches_seen += 1
+                future = pool.submit(self._upsert_batch, batch, False, max_retries)
+                in_flight[future] = (batches_seen, batch)
+                batch = following
+
+            for future in as_completed(list(in_flight)):
+                record(*in_flight.pop(future), future.result())
+
+        # Consistency barrier: the final batch waits until all updates are applied
+        if batch:
+            batches_seen += 1
+            record(batches_seen, batch, self._upsert_batch(batch, True, max_retries))
+
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        self.last_upload_stats = {
+            "documents": stored,
+            "skipped_existing": skipped,
+            "batches": batches_seen,
+            "failed_batches": failed_batches,
+            "seconds": elapsed,
+            "points_per_second": stored / elapsed,
+            "mb_per_second": vector_bytes / 1e6 / elapsed
+        }
+
+        print(f"✓ Added {stored} documents to {self.collection_name} "
+              f"({stored / elapsed:.0f} points/s, {vector_bytes / 1e6 / elapsed:.1f} MB/s vectors)")
+        if skipped:
+            print(f"✓ Skipped {skipped} documents already in {self.collection_name}")
+        if failed_batches:
+            print(f"⚠️  {len(failed_batches)} batch(es) failed; see last_upload_stats['failed_batches']")
+        return stored
+
+    def existing_ids(self, ids: Iterable[Union[str, int]], batch_size: int = 1000) -> set:
+        """
+        Find which point IDs are already stored.
+
+        Args:
+            ids: Point IDs to check
+            batch_size: IDs per retrieve request
+
+        Returns:
+            Set of the given IDs that exist in the collection
+        """
+        ids = list(ids)
+        found = set()
+
+        for i in range(0, len(ids), batch_size):
+            points = self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=ids[i:i + batch_size],
+                with_payload=False,
+                with_vectors=False
             )
-            points.append(point)
+            found.update(str(point.id) if isinstance(point.id, str) else point.id for point in points)
 
-        # Upload in batches
-        total_batches = (len(points) + batch_size - 1) // batch_size
+        return found
 
-        for i in range(0, len(points), batch_size):
-            batch = points[i:i + batch_size]
-            batch_num = i // batch_size + 1
+    def delete_stale_manual(self, source: str, file_hash: str) -> int:
+        """
+        Delete the points of earlier versions of a re-ingested manual.
 
-            print(f"Uploading batch {batch_num}/{total_batches} ({len(batch)} documents)...")
+        Args:
+            source: Manual source (GCS URI) shared by all its versions
+            file_hash: Hash of the current version; its points are kept
 
-            self.client.upsert(
+        Returns:
+            Number of points deleted
+        """
+        stale = Filter(
+            must=[FieldCondition(key="source", match=MatchValue(value=source))],
+            must_not=[FieldCondition(key="file_hash", match=MatchValue(value=file_hash))]
+        )
+        count = self.client.count(collection_name=self.collection_name, count_filter=stale, exact=True).count
+        if count:
+            self.client.delete(
                 collection_name=self.collection_name,
-                points=batch
+                points_selector=FilterSelector(filter=stale),
+                wait=True
+            )
+        return count
+
+    def _upsert_batch(
+        self,
+        batch: List[Dict],
+        wait_for_result: bool,
+        max_retries: int,
+        backoff_base: float = 0.5
+    ) -> Optional[Exception]:
+        """
+        Upsert one batch with retries.
+
+        Args:
+            batch: Documents to upsert
+            wait_for_result: Wait until Qdrant has applied the update
+            max_retries: Retries after the first attempt
+            backoff_base: Base delay in seconds for exponential backoff
+
+        Returns:
+            None on success, otherwise the last error (a malformed document or
+            a rejected request fails the batch without retries)
+        """
+        try:
+            points = [
+                PointStruct(
+                    # Generate unique ID if not provided
+                    id=doc.get("id", str(uuid.uuid4())),
+                    vector=self._point_vector(doc),
+                    payload={
+                        "text": doc["text"],
+                        **doc.get("metadata", {})
+                    }
+                )
+                for doc in batch
+            ]
+        except Exception as e:
+            return e
+
+        for attempt in range(max_retries + 1):
+            try:
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=points,
+                    wait=wait_for_result
+                )
+                return None
+            except Exception as e:
+                if attempt == max_retries or not is_retryable(e):
+                    return e
+                time.sleep(backoff_base * (2 ** attempt))
+
+    def _point_vector(self, doc: Dict):
+        """Dense vector, plus the sparse term vector for hybrid collections"""
+        dense = to_vector_list(doc["embedding"])
+        if not self.hybrid:
+            return dense
+
+        # Model numbers live in metadata (older points only carry 'model');
+        # index them so exact queries hit
+        metadata = doc.get("metadata", {})
+        model_number = metadata.get("model_number") or metadata.get("model", "")
+        indices, values = self.sparse_encoder.encode_document(f"{doc['text']} {model_number}")
+        return {
+            DENSE_VECTOR: dense,
+            SPARSE_VECTOR: SparseVector(indices=indices, values=values)
+        }
+
+    def _build_filter(self, filters: Optional[Dict]) -> Optional[Filter]:
+        """
+        Build a Qdrant filter from exact-match metadata filters.
+
+        Args:
+            filters: Field -> value conditions (all must match)
+
+        Returns:
+            Filter, or None when there are no conditions
+        """
+        if not filters:
+            return None
+
+        conditions = []
+        for key, value in filters.items():
+            conditions.append(
+                FieldCondition(
+                    key=key,
+                    match=MatchValue(value=value)
+                )
             )
+        return Filter(must=conditions) if conditions else None
+
+    @staticmethod
+    def _format_results(results, with_vectors: bool = False) -> List[Dict]:
+        """Convert scored points to the result dicts returned by search()"""
+        formatted_results = []
+        for result in results:
+            formatted = {
+                "id": result.id,
+                "score": result.score,
+                "text": result.payload.get("text", ""),
+                "metadata": {
+                    k: v for k, v in result.payload.items()
+                    if k != "text"
+                }
+            }
+            if with_vectors and result.vector is not None:
+                vector = result.vector.get(DENSE_VECTOR) if isinstance(result.vector, dict) else result.vector
+                formatted["vector"] = np.asarray(vector, dtype=np.float32)
+            formatted_results.append(formatted)
+
+        return formatted_results
+
+    def _search_params(
+        self,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False,
+        rescore: Optional[bool] = None,
+        oversampling: Optional[float] = None
+    ) -> SearchParams:
+        """
+        Build search params from per-call overrides and the store defaults.
+
+        Args:
+            hnsw_ef: HNSW search-time neighbours (higher = better recall, slower)
+            exact: Bypass HNSW and quantization and scan all vectors
+            rescore: Re-rank quantized candidates with the original vectors
+            oversampling: Fetch top_k * oversampling quantized candidates before rescoring
+
+        Returns:
+            SearchParams
+        """
+        rescore = self.quantization_rescore if rescore is None else rescore
+        oversampling = oversampling or self.quantization_oversampling
 
-        print(f"✓ Added {len(points)} documents to {self.collection_name}")
-        return len(points)
+        return SearchParams(
+            hnsw_ef=hnsw_ef or self.hnsw_ef,
+            exact=exact,
+            # Ignored by Qdrant for collections without quantization
+            quantization=QuantizationSearchParams(
+                rescore=rescore,
+                oversampling=oversampling
+            )
+        )
 
     def search(
         self,
-        query_embedding: List[float],
+        query_embedding: Sequence[float],
         top_k: int = 5,
-        filters: Optional[Dict] = None
+        filters: Optional[Dict] = None,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False,
+        rescore: Optional[bool] = None,
+        oversampling: Optional[float] = None,
+        query_text: Optional[str] = None,
+        with_vectors: bool = False
     ) -> List[Dict]:
         """
         Search for similar documents.
 
         Args:
-            query_embedding: Query vector
+            query_embedding: Query vector (NumPy array or list)
             top_k: Number of results to return
             filters: Optional metadata filters
+            hnsw_ef: HNSW search-time neighbours (default: QDRANT_HNSW_EF or Qdrant's default)
+            exact: Exact (brute-force) search, e.g. as ground truth for recall checks
+            rescore: Rescore quantized candidates with original vectors
+                     (default: QDRANT_QUANTIZATION_RESCORE or True)
+            oversampling: Quantized candidate oversampling factor
+                          (default: QDRANT_QUANTIZATION_OVERSAMPLING or Qdrant's default)
+            query_text: Query text for the sparse side of hybrid search
+                        (ignored unless the store is hybrid)
+            with_vectors: Include each result's stored (dense) vector as 'vector'
 
         Returns:
             List of matching documents with scores
         """
-        # Build filter if provided
-        query_filter = None
-        if filters:
-            conditions = []
-            for key, value in filters.items():
-                conditions.append(
-                    FieldCondition(
-                        key=key,
-                        match=MatchValue(value=value)
-                    )
-                )
-            if conditions:
-                query_filter = Filter(must=conditions)
+        if self.hybrid:
+            request = self._hybrid_request(
+                query_embedding,
+                query_text,
+                top_k,
+                self._build_filter(filters),
+                self._search_params(hnsw_ef, exact, rescore, oversampling),
+                with_vectors
+            )
+            return self._query_hybrid([request], [query_embedding], with_vectors, [query_text])[0]
 
-        # Search
         results = self.client.search(
             collection_name=self.collection_name,
-            query_vector=query_embedding,
+            query_vector=to_vector_list(query_embedding),
             limit=top_k,
-            query_filter=query_filter
+            query_filter=self._build_filter(filters),
+            search_params=self._search_params(hnsw_ef, exact, rescore, oversampling),
+            with_vectors=with_vectors
         )
 
-        # Format results
-        formatted_results = []
-        for result in results:
-            formatted_results.append({
-                "id": result.id,
-                "score": result.score,
-                "text": result.payload.get("text", ""),
-                "metadata": {
-                    k: v for k, v in result.payload.items()
-                    if k != "text"
-                }
-            })
+        return self._format_results(results, with_vectors)
 
-        return formatted_results
+    async def asearch(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False,
+        rescore: Optional[bool] = None,
+        oversampling: Optional[float] = None,
+        query_text: Optional[str] = None,
+        with_vectors: bool = False
+    ) -> List[Dict]:
+        """
+        Search for similar documents without blocking the event loop.
+
+        Same arguments and results as search(), sent through the asyncio client.
+
+        Returns:
+            List of matching documents with scores
+        """
+        if self.async_client is None:
+            self.async_client = create_async_qdrant_client(
+                url=self.url,
+                api_key=self.api_key,
+                prefer_grpc=self.prefer_grpc,
+                grpc_port=self.grpc_port
+            )
+
+        if self.hybrid:
+            request = self._hybrid_request(
+                query_embedding,
+                query_text,
+                top_k,
+                self._build_filter(filters),
+                self._search_params(hnsw_ef, exact, rescore, oversampling),
+                with_vectors
+            )
+            responses = await self.async_client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[request]
+            )
+            return self._format_hybrid(responses, [request], [query_embedding], with_vectors, [query_text])[0]
+
+        results = await self.async_client.search(
+            collection_name=self.collection_name,
+            query_vector=to_vector_list(query_embedding),
+            limit=top_k,
+            query_filter=self._build_filter(filters),
+            search_params=self._search_params(hnsw_ef, exact, rescore, oversampling),
+            with_vectors=with_vectors
+        )
+
+        return self._format_results(results, with_vectors)
+
+    def search_batch(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        top_k: int = 5,
+        filters: Optional[Union[Dict, Sequence[Optional[Dict]]]] = None,
+        query_texts: Optional[Sequence[Optional[str]]] = None,
+        with_vectors: bool = False,
+        **search_params
+    ) -> List[List[Dict]]:
+        """
+        Search for several query vectors in one round trip.
+
+        Args:
+            query_embeddings: Query vectors (matrix or list of vectors)
+            top_k: Number of results per query
+            filters: Metadata filters shared by all queries, or one (optional)
+                     filter dict per query
+            query_texts: Query texts for the sparse side of hybrid search
+                         (ignored unless the store is hybrid)
+            with_vectors: Include each result's stored (dense) vector as 'vector'
+            **search_params: hnsw_ef, exact, rescore, oversampling (see search())
+
+        Returns:
+            One result list per query, in the same format as search()
+        """
+        if filters is None or isinstance(filters, dict):
+            filters = [filters] * len(query_embeddings)
+        if len(filters) != len(query_embeddings):
+            raise ValueError("filters must be a dict or one entry per query")
+        if len(query_embeddings) == 0:
+            return []
+
+        params = self._search_params(**search_params)
+
+        if self.hybrid:
+            query_texts = query_texts or [None] * len(query_embeddings)
+            requests = [
+                self._hybrid_request(embedding, text, top_k, self._build_filter(query_filters), params, with_vectors)
+                for embedding, text, query_filters in zip(query_embeddings, query_texts, filters)
+            ]
+            return self._query_hybrid(requests, query_embeddings, with_vectors, query_texts)
+
+        requests = [
+            SearchRequest(
+                vector=to_vector_list(embedding),
+                limit=top_k,
+                filter=self._build_filter(query_filters),
+                params=params,
+                with_payload=True,
+                with_vector=with_vectors
+            )
+            for embedding, query_filters in zip(query_embeddings, filters)
+        ]
+
+        batch_results = self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=requests
+        )
+
+        return [self._format_results(results, with_vectors) for results in batch_results]
+
+    def _hybrid_request(
+        self,
+        query_embedding: Sequence[float],
+        query_text: Optional[str],
+        top_k: int,
+        query_filter: Optional[Filter],
+        params: SearchParams,
+        with_vectors: bool = False
+    ) -> QueryRequest:
+        """
+        Build a query API request for a hybrid collection.
+
+        With query text, dense and sparse candidates are prefetched and fused
+        server-side with reciprocal rank fusion; without it (or when the text
+        has no index terms) the dense vector is searched alone.
+        """
+        dense = to_vector_list(query_embedding)
+        indices, values = self.sparse_encoder.encode_query(query_text) if query_text else ([], [])
+
+        if not indices:
+            return QueryRequest(
+                query=dense,
+                using=DENSE_VECTOR,
+                filter=query_filter,
+                params=params,
+                limit=top_k,
+                with_payload=True,
+                with_vector=[DENSE_VECTOR] if with_vectors else None
+            )
+
+        candidates = top_k * max(self.hybrid_prefetch, 1)
+        return QueryRequest(
+            prefetch=[
+                Prefetch(query=dense, using=DENSE_VECTOR, filter=query_filter, params=params, limit=candidates),
+                Prefetch(
+                    query=SparseVector(indices=indices, values=values),
+                    using=SPARSE_VECTOR,
+                    filter=query_filter,
+                    limit=candidates
+                )
+            ],
+            query=FusionQuery(fusion=Fusion.RRF),
+            limit=top_k,
+            with_payload=True,
+            # Returned so fused results can carry their cosine similarity
+            with_vector=[DENSE_VECTOR]
+        )
+
+    def _query_hybrid(
+        self,
+        requests: List[QueryRequest],
+        query_embeddings,
+        with_vectors: bool = False,
+        query_texts: Optional[Sequence[Optional[str]]] = None
+    ) -> List[List[Dict]]:
+        """
+        Run hybrid query requests in one round trip.
+
+        Fused results keep the RRF order; their RRF score is returned as
+        'fusion_score' and 'score' stays the cosine similarity to the query,
+        so similarity thresholds downstream keep their meaning. Results that
+        share a model number / error code term with the query are marked
+        'code_match' (exact matches the cosine under-rates; score
+        thresholds exempt them).
+        """
+        responses = self.client.query_batch_points(
+            collection_name=self.collection_name,
+            requests=requests
+        )
+        return self._format_hybrid(responses, requests, query_embeddings, with_vectors, query_texts)
+
+    def _format_hybrid(
+        self,
+        responses,
+        requests: List[QueryRequest],
+        query_embeddings,
+        with_vectors: bool = False,
+        query_texts: Optional[Sequence[Optional[str]]] = None
+    ) -> List[List[Dict]]:
+        """Convert hybrid query responses to result lists (see _query_hybrid())"""
+        all_results = []
+        query_texts = query_texts or [None] * len(requests)
+        for response, request, embedding, text in zip(responses, requests, query_embeddings, query_texts):
+            results = self._format_results(response.points, with_vectors)
+            if not request.prefetch:
+                # Dense-only request: the score already is the cosine similarity
+                all_results.append(results)
+                continue
+
+            query = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            for result, point in zip(results, response.points):
+                if isinstance(point.vector, dict) and DENSE_VECTOR in point.vector and norm > 0:
+                    # Qdrant stores cosine vectors normalized, so a dot product is the cosine
+                    vector = np.asarray(point.vector[DENSE_VECTOR], dtype=np.float32)
+                    result["fusion_score"] = result["score"]
+                    result["score"] = float(np.dot(query, vector) / norm)
+
+            query_codes = self.sparse_encoder.code_terms(text) if text else set()
+            if query_codes:
+                for result in results:
+                    metadata = result["metadata"]
+                    model_number = metadata.get("model_number") or metadata.get("model", "")
+                    if query_codes & self.sparse_encoder.code_terms(f"{result['text']} {model_number}"):
+                        result["code_match"] = True
+
+            all_results.append(results)
+
+        return all_results
+
+    def is_hybrid_collection(self) -> bool:
+        """Whether the existing collection has the named dense and sparse vectors"""
+        params = self.client.get_collection(self.collection_name).config.params
+        return (
+            isinstance(params.vectors, dict)
+            and DENSE_VECTOR in params.vectors
+            and SPARSE_VECTOR in (params.sparse_vectors or {})
+        )
+
+    def get_vector_size(self) -> Optional[int]:
+        """
+        Get the vector dimension configured on the existing collection.
+
+        Returns:
+            Vector size, or None if it cannot be determined
+        """
+        vectors = self.client.get_collection(self.collection_name).config.params.vectors
+        if isinstance(vectors, dict):
+            vectors = vectors.get(DENSE_VECTOR) or next(iter(vectors.values()), None)
+        return getattr(vectors, "size", None)
+
+    def iter_points(self, batch_size: int = 256, with_vectors: bool = True) -> Iterator[Dict]:
+        """
+        Stream every stored point with its vector (e.g. to export a snapshot).
+
+        Args:
+            batch_size: Points per scroll request
+            with_vectors: Also read vectors (payload-only reads are much smaller)
+
+        Yields:
+            Document dicts in the add_documents format ('id', 'text',
+            'embedding' as float32 array (None without vectors), 'metadata')
+        """
+        offset = None
+
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=[DENSE_VECTOR] if with_vectors and self.hybrid else with_vectors
+            )
+            for point in points:
+                payload = dict(point.payload or {})
+                # Hybrid points carry named vectors; sparse ones are recomputed on upsert
+                vector = point.vector[DENSE_VECTOR] if isinstance(point.vector, dict) else point.vector
+                yield {
+                    "id": point.id,
+                    "text": payload.pop("text", ""),
+                    "embedding": np.asarray(vector, dtype=np.float32) if with_vectors else None,
+                    "metadata": payload
+                }
+            if offset is None:
+                return
 
     def delete_collection(self):
         """Delete the collection"""
@@ -202,6 +1127,11 @@ class QdrantStore:
             "vectors_count": info.vectors_count,
             "points_count": info.points_count,
             "status": info.status,
+            "hybrid": isinstance(info.config.params.vectors, dict) and bool(info.config.params.sparse_vectors),
+            "payload_indexes": {
+                field: getattr(index.data_type, "value", str(index.data_type))
+                for field, index in (info.payload_schema or {}).items()
+            },
             "config": {
                 "dimension": self.embedding_dim,
                 "distance": "cosine"
@@ -209,6 +1139,31 @@ class QdrantStore:
         }
 
 
+def create_vector_store(backend: Optional[str] = None, **kwargs):
+    """
+    Create the vector store backend selected by config.
+
+    Args:
+        backend: 'qdrant' or 'local' (default: VECTOR_STORE_BACKEND or 'qdrant')
+        **kwargs: Passed to the backend constructor (collection_name, embedding_dim, ...)
+
+    Returns:
+        QdrantStore or LocalVectorStore instance
+    """
+    backend = (backend or os.getenv("VECTOR_STORE_BACKEND", "qdrant")).lower()
+
+    if backend == "qdrant":
+        return QdrantStore(**kwargs)
+
+    if backend == "local":
+        # Imported lazily; local_store depends on this module
+        from .local_store import LocalVectorStore
+        kwargs.pop("client", None)
+        return LocalVectorStore(**kwargs)
+
+    raise ValueError(f"Unsupported vector store backend: {backend}")
+
+
 # Example usage
 if __name__ == "__main__":
     # Initialize store
@@ -14,6 +14,9 @@ sys.path.insert(0, str(project_root))
 # Import the orchestrator
 from agents.core_orchestrator import create_core_orchestrator
 
+# Shared RAG clients (warmed at startup, closed on exit)
+from rag_pipeline.clients import warmup, shutdown
+
 # Import Google ADK
 from google.adk.apps import App
 
@@ -39,6 +42,17 @@ def main():
         print(f"❌ Error creating agent: {e}")
         sys.exit(1)
 
+    # Open RAG connections before the first user query
+    try:
+        timings = warmup()
+        print("✅ RAG clients warmed up!")
+        for step, ms in timings.items():
+            print(f"   - {step.removesuffix('_ms')}: {ms:.0f} ms")
+        print()
+    except Exception as e:
+        print(f"⚠️  RAG warmup failed (clients will connect on first query): {e}")
+        print()
+
     # Create and run the app
     try:
         print("🚀 Starting server on http://localhost:8000")
@@ -73,6 +87,8 @@ def main():
     except Exception as e:
         print(f"\n❌ Error starting server: {e}")
         sys.exit(1)
+    finally:
+        shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Embedding Dimension Benchmark
+
+Compare retrieval recall of reduced-dimension (Matryoshka-truncated)
+embeddings against full-size embeddings on chunks from the Qdrant
+collection:
+1. Load chunk texts from the collection
+2. Embed chunks and queries once at full size (cached)
+3. Truncate + re-normalize to each candidate dimension
+4. Report recall@k vs. full-size exact search, memory and search time
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag_pipeline.embedding import OpenAIEmbedder, truncate_embeddings
+from rag_pipeline.vector_store import QdrantStore
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_QUERIES = [
+    "refrigerator not cooling",
+    "fridge warm inside freezer works",
+    "ice maker not producing ice",
+    "water leaking from refrigerator door",
+    "loud buzzing noise from fridge",
+    "how to reset the ice maker",
+    "error code C-10 on display",
+    "microwave not heating food",
+    "washer not draining water",
+    "dryer not heating clothes still damp",
+    "washer extreme vibration during spin cycle",
+    "how to replace the water filter",
+    "temperature settings for fresh food compartment",
+    "door alarm keeps beeping",
+    "frost build up in freezer"
+]
+
+
+def load_chunk_texts(store: QdrantStore, limit: int) -> list:
+    """
+    Load chunk texts from the collection.
+
+    Args:
+        store: Qdrant store
+        limit: Maximum number of chunks
+
+    Returns:
+        List of chunk texts
+    """
+    texts = []
+    offset = None
+
+    while len(texts) < limit:
+        points, offset = store.client.scroll(
+            collection_name=store.collection_name,
+            limit=min(256, limit - len(texts)),
+            offset=offset,
+            with_payload=["text"],
+            with_vectors=False
+        )
+        texts.extend(p.payload.get("text", "") for p in points if p.payload.get("text"))
+        if offset is None:
+            break
+
+    return texts
+
+
+def exact_top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k most similar corpus rows per query (cosine on unit vectors)"""
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, kth=min(k, scores.shape[1] - 1), axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def benchmark_dimensions(
+    dims: list,
+    top_k: int = 10,
+    limit: int = 5000,
+    queries: list = None,
+    model: str = None
+) -> dict:
+    """
+    Measure recall@k of truncated embeddings against full-size embeddings.
+
+    Args:
+        dims: Candidate dimensions
+        top_k: k for recall@k
+        limit: Maximum number of chunks to load
+        queries: Query texts (default: built-in troubleshooting queries)
+        model: Embedding model (default: OPENAI_EMBEDDING_MODEL)
+
+    Returns:
+        Dictionary with per-dimension results
+    """
+    queries = queries or DEFAULT_QUERIES
+
+    # Full-size reference embeddings (reduced sizes are derived locally)
+    embedder = OpenAIEmbedder(model=model, dimensions=0)
+    store = QdrantStore(embedding_dim=embedder.embedding_dim)
+
+    print(f"Loading up to {limit} chunks from {store.collection_name}...")
+    texts = load_chunk_texts(store, limit)
+    print(f"✓ Loaded {len(texts)} chunks")
+
+    corpus = embedder.embed_texts(texts)
+    query_vectors = embedder.embed_texts(queries)
+
+    valid = ~np.isnan(corpus).any(axis=1)
+    corpus = corpus[valid]
+
+    k = min(top_k, corpus.shape[0])
+    reference = exact_top_k(query_vectors, corpus, k)
+
+    results = []
+    for dim in sorted(set(dims + [embedder.embedding_dim])):
+        if dim > embedder.embedding_dim:
+            continue
+
+        reduced_corpus = truncate_embeddings(corpus, dim)
+        reduced_queries = truncate_embeddings(query_vectors, dim)
+
+        start = time.perf_counter()
+        found = exact_top_k(reduced_queries, reduced_corpus, k)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        recall = np.mean([
+            len(set(found[i]) & set(reference[i])) / k
+            for i in range(len(queries))
+        ])
+
+        results.append({
+            "dimension": dim,
+            "recall_at_k": round(float(recall), 4),
+            "bytes_per_vector": dim * 4,
+            "index_mb_per_100k": round(dim * 4 * 100_000 / 1e6, 1),
+            "search_ms_per_query": round(elapsed_ms, 3)
+        })
+
+    return {
+        "model": embedder.model,
+        "collection": store.collection_name,
+        "chunks": int(corpus.shape[0]),
+        "queries": len(queries),
+        "top_k": k,
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recall of reduced embedding dimensions")
+
+    parser.add_argument(
+        "--dims",
+        type=int,
+        nargs="+",
+        default=[256, 512, 768, 1024],
+        help="Dimensions to evaluate (default: 256 512 768 1024)"
+    )
+
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=10,
+        help="k for recall@k (default: 10)"
+    )
+
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=5000,
+        help="Maximum chunks to load from the collection (default: 5000)"
+    )
+
+    parser.add_argument(
+        "--queries-file",
+        help="Text file with one query per line (default: built-in queries)"
+    )
+
+    parser.add_argument(
+        "--model",
+        help="Embedding model (default: OPENAI_EMBEDDING_MODEL)"
+    )
+
+    parser.add_argument(
+        "--output",
+        help="Write results as JSON to this file"
+    )
+
+    args = parser.parse_args()
+
+    queries = None
+    if args.queries_file:
+        with open(args.queries_file) as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    report = benchmark_dimensions(
+        dims=args.dims,
+        top_k=args.top_k,
+        limit=args.limit,
+        queries=queries,
+        model=args.model
+    )
+
+    print("\n" + "="*60)
+    print(f"DIMENSION BENCHMARK ({report['model']}, {report['chunks']} chunks, "
+          f"{report['queries']} queries, recall@{report['top_k']})")
+    print("="*60)
+    print(f"{'Dim':>6} {'Recall':>8} {'Bytes/vec':>10} {'MB/100k':>9} {'ms/query':>9}")
+    for r in report["results"]:
+        print(f"{r['dimension']:>6} {r['recall_at_k']:>8.3f} {r['bytes_per_vector']:>10} "
+              f"{r['index_mb_per_100k']:>9} {r['search_ms_per_query']:>9}")
+    print("="*60)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Lexical (BM25) Retrieval Benchmark
+
+Compare the three RAGRetriever modes on the same queries:
+- dense: embed query + vector search (current path)
+- lexical: in-process BM25 index only (degraded mode, no embedding call)
+- fusion: dense + BM25 merged by reciprocal rank fusion
+
+For each mode, report p50/p95 latency, overlap@k with the dense results
+(how much of the current top-k is kept) and model hit@k: the share of
+queries with a known model number whose top-k includes a chunk from that
+model's manual. Queries come from the test contexts (problem description,
+plus the model number alone as an exact-token lookup) and/or a text file.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag_pipeline.embedding import create_embedder
+from rag_pipeline.vector_store import create_vector_store
+from rag_pipeline.bm25_index import BM25Index
+from rag_pipeline.retriever import RAGRetriever
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MODES = ("dense", "lexical", "fusion")
+
+
+def clean_model(model: str) -> str:
+    """Model number without wildcards, for prefix comparison"""
+    return (model or "").upper().replace("*", "").strip()
+
+
+def load_queries(contexts_dir: str = None, queries_file: str = None) -> list:
+    """
+    Build the benchmark queries.
+
+    Args:
+        contexts_dir: Directory with user_context_*.json files
+        queries_file: Text file with one query per line
+
+    Returns:
+        List of dicts with query, filters and (optional) model
+    """
+    queries = []
+
+    if contexts_dir:
+        for context_file in sorted(Path(contexts_dir).glob("user_context_*.json")):
+            with open(context_file) as f:
+                context = json.load(f)
+            appliance = context["appliance"]
+            filters = RAGRetriever.metadata_filters(appliance["brand"], appliance["type"])
+            queries.append({
+                "query": f"{appliance['type']} {context['problem']['description']}",
+                "filters": filters,
+                "model": appliance["model"]
+            })
+            # Exact-token lookup, as tools._check_model_appliance_type does
+            queries.append({
+                "query": appliance["model"],
+                "filters": RAGRetriever.metadata_filters(appliance["brand"]),
+                "model": appliance["model"]
+            })
+
+    if queries_file:
+        with open(queries_file) as f:
+            queries.extend({"query": line.strip(), "filters": None, "model": None} for line in f if line.strip())
+
+    return queries
+
+
+def model_hit(results: list, model: str) -> bool:
+    """Whether any result comes from the given model's manual (wildcards as prefixes)"""
+    wanted = clean_model(model)
+    for r in results:
+        found = clean_model(r["metadata"].get("model_number", ""))
+        shorter = min(len(wanted), len(found))
+        if shorter >= 6 and wanted[:shorter] == found[:shorter]:
+            return True
+    return False
+
+
+def benchmark_modes(retrievers: dict, queries: list, top_k: int) -> dict:
+    """
+    Run every query through every retrieval mode.
+
+    Args:
+        retrievers: Mode name -> RAGRetriever
+        queries: Queries from load_queries
+        top_k: Results per query
+
+    Returns:
+        Mode name -> metrics dict
+    """
+    results = {mode: [] for mode in retrievers}
+    latencies = {mode: [] for mode in retrievers}
+
+    for mode, retriever in retrievers.items():
+        print(f"Running {len(queries)} queries ({mode})...")
+        for q in queries:
+            start = time.perf_counter()
+            response = retriever.retrieve(q["query"], top_k=top_k, filters=q["filters"])
+            latencies[mode].append((time.perf_counter() - start) * 1000)
+            results[mode].append(response["results"])
+
+    report = {}
+    dense_ids = [{r["id"] for r in found} for found in results["dense"]]
+    with_model = [i for i, q in enumerate(queries) if q["model"]]
+
+    for mode in retrievers:
+        overlaps = [
+            len({r["id"] for r in found} & expected) / len(expected)
+            for found, expected in zip(results[mode], dense_ids)
+            if expected
+        ]
+        hits = [model_hit(results[mode][i], queries[i]["model"]) for i in with_model]
+        report[mode] = {
+            "p50_ms": round(float(np.percentile(latencies[mode], 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies[mode], 95)), 2),
+            "overlap_with_dense": round(float(np.mean(overlaps)), 3) if overlaps else None,
+            "model_hit_rate": round(float(np.mean(hits)), 3) if hits else None
+        }
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BM25 vs dense vs fused retrieval")
+
+    parser.add_argument(
+        "--contexts-dir",
+        default="test_contexts",
+        help="Directory with user_context_*.json files (default: test_contexts)"
+    )
+
+    parser.add_argument(
+        "--queries-file",
+        help="Text file with extra queries, one per line"
+    )
+
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=5,
+        help="Results per query (default: 5)"
+    )
+
+    parser.add_argument(
+        "--build-index",
+        action="store_true",
+        help="(Re)build the BM25 index from the collection and save it first"
+    )
+
+    parser.add_argument(
+        "--output",
+        help="Write results as JSON to this file"
+    )
+
+    args = parser.parse_args()
+
+    queries = load_queries(args.contexts_dir if os.path.isdir(args.contexts_dir) else None, args.queries_file)
+    if not queries:
+        print("✗ No queries: add test contexts or pass --queries-file")
+        return
+
+    # No embedding cache: dense latency should include the API call
+    backend = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+    embedder = create_embedder(backend, **({"use_cache": False} if backend == "openai" else {}))
+    vector_store = create_vector_store(embedding_dim=embedder.embedding_dim)
+
+    index = None if args.build_index else BM25Index.load_if_exists(collection_name=vector_store.collection_name)
+    if index is None:
+        print(f"Building BM25 index from {vector_store.collection_name}...")
+        index = BM25Index.from_vector_store(vector_store)
+        index.save()
+
+    retrievers = {
+        mode: RAGRetriever(
+            embedder=embedder,
+            vector_store=vector_store,
+            query_batch_window_ms=0,
+            lexical_index=index,
+            retrieval_mode=mode
+        )
+        for mode in MODES
+    }
+
+    report = benchmark_modes(retrievers, queries, args.top_k)
+    info = index.get_info()
+
+    print("\n" + "="*60)
+    print(f"LEXICAL BENCHMARK ({len(queries)} queries, top_k={args.top_k})")
+    print(f"BM25 index: {info['documents']} chunks, {info['terms']} terms")
+    print("="*60)
+    print(f"{'mode':>8} {'p50 ms':>8} {'p95 ms':>8} {'overlap':>8} {'model hit':>10}")
+    for mode, r in report.items():
+        print(f"{mode:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{str(r['overlap_with_dense']):>8} {str(r['model_hit_rate']):>10}")
+    print("="*60)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"queries": len(queries), "top_k": args.top_k, "index": info, "results": report}, f, indent=2)
+        print(f"✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Search Accuracy Benchmark (HNSW / Quantization)
+
+Measure the recall lost by approximate search on the configured collection:
+1. Sample query vectors (stored points, or embedded queries from a file)
+2. Ground truth: exact (brute-force) search
+3. For each hnsw_ef / rescore / oversampling setting, report recall@k
+   against exact search and p50/p95 latency
+
+Create collections with different storage settings via
+scripts/setup_qdrant.py (--quantization, --on-disk, --hnsw-m) and run this
+against each to pick a setting with data.
+"""
+
+import sys
+import json
+import time
+import argparse
+import itertools
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag_pipeline.vector_store import QdrantStore
+from rag_pipeline.embedding import create_embedder
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def sample_query_vectors(store: QdrantStore, count: int, pool_factor: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Sample stored vectors to use as queries.
+
+    Args:
+        store: Qdrant store
+        count: Number of queries
+        pool_factor: Read count * pool_factor points and sample from them
+        seed: Random seed
+
+    Returns:
+        float32 matrix of query vectors
+    """
+    pool = []
+    offset = None
+
+    while len(pool) < count * pool_factor:
+        points, offset = store.client.scroll(
+            collection_name=store.collection_name,
+            limit=256,
+            offset=offset,
+            with_payload=False,
+            with_vectors=True
+        )
+        pool.extend(np.asarray(p.vector, dtype=np.float32) for p in points)
+        if offset is None:
+            break
+
+    if not pool:
+        return np.zeros((0, store.embedding_dim), dtype=np.float32)
+
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(len(pool), size=min(count, len(pool)), replace=False)
+    return np.vstack([pool[i] for i in chosen])
+
+
+def describe_collection(store: QdrantStore) -> dict:
+    """Storage settings of the collection"""
+    config = store.client.get_collection(store.collection_name).config
+    vectors = config.params.vectors
+    return {
+        "quantization": type(config.quantization_config).__name__ if config.quantization_config else "none",
+        "on_disk": bool(getattr(vectors, "on_disk", False)),
+        "hnsw_m": config.hnsw_config.m,
+        "hnsw_ef_construct": config.hnsw_config.ef_construct
+    }
+
+
+def benchmark_search_accuracy(
+    store: QdrantStore,
+    queries: np.ndarray,
+    top_k: int,
+    ef_values: list,
+    oversampling_values: list,
+    rescore_values: list
+) -> list:
+    """
+    Compare approximate search settings against exact search.
+
+    Args:
+        store: Qdrant store
+        queries: Query vectors
+        top_k: k for recall@k
+        ef_values: hnsw_ef values to test
+        oversampling_values: Quantization oversampling factors to test
+        rescore_values: Rescore on/off values to test
+
+    Returns:
+        One result dict per setting
+    """
+    print(f"Computing exact ground truth for {len(queries)} queries...")
+    truth = [
+        {r["id"] for r in store.search(query, top_k=top_k, exact=True)}
+        for query in queries
+    ]
+
+    results = []
+    for hnsw_ef, oversampling, rescore in itertools.product(ef_values, oversampling_values, rescore_values):
+        latencies = []
+        recalls = []
+
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found = store.search(
+                query,
+                top_k=top_k,
+                hnsw_ef=hnsw_ef,
+                rescore=rescore,
+                oversampling=oversampling
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            if expected:
+                recalls.append(len({r["id"] for r in found} & expected) / len(expected))
+
+        results.append({
+            "hnsw_ef": hnsw_ef,
+            "oversampling": oversampling,
+            "rescore": rescore,
+            "recall_at_k": round(float(np.mean(recalls)) if recalls else 0.0, 4),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2)
+        })
+        print(f"  ef={hnsw_ef} oversampling={oversampling} rescore={rescore}: "
+              f"recall {results[-1]['recall_at_k']:.3f}, p50 {results[-1]['p50_ms']} ms")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure recall loss of HNSW/quantization settings vs exact search")
+
+    parser.add_argument(
+        "--collection",
+        help="Collection to measure (default: QDRANT_COLLECTION_NAME)"
+    )
+
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=100,
+        help="Number of stored vectors sampled as queries (default: 100)"
+    )
+
+    parser.add_argument(
+        "--queries-file",
+        help="Text file with one query per line, embedded with the configured embedder"
+    )
+
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=10,
+        help="k for recall@k (default: 10)"
+    )
+
+    parser.add_argument(
+        "--ef-values",
+        type=int,
+        nargs="+",
+        default=[16, 32, 64, 128, 256],
+        help="hnsw_ef values to test (default: 16 32 64 128 256)"
+    )
+
+    parser.add_argument(
+        "--oversampling",
+        type=float,
+        nargs="+",
+        default=[1.0, 2.0],
+        help="Quantization oversampling factors to test (default: 1.0 2.0)"
+    )
+
+    parser.add_argument(
+        "--output",
+        help="Write results as JSON to this file"
+    )
+
+    args = parser.parse_args()
+
+    store = QdrantStore(collection_name=args.collection)
+    store.embedding_dim = store.get_vector_size() or store.embedding_dim
+    collection = describe_collection(store)
+
+    if args.queries_file:
+        with open(args.queries_file) as f:
+            texts = [line.strip() for line in f if line.strip()]
+        queries = create_embedder().embed_texts(texts)
+    else:
+        queries = sample_query_vectors(store, args.queries)
+
+    # Rescoring only matters for quantized collections
+    quantized = collection["quantization"] != "none"
+    rescore_values = [False, True] if quantized else [True]
+    oversampling_values = args.oversampling if quantized else [None]
+
+    results = benchmark_search_accuracy(
+        store,
+        queries,
+        top_k=args.top_k,
+        ef_values=args.ef_values,
+        oversampling_values=oversampling_values,
+        rescore_values=rescore_values
+    )
+
+    print("\n" + "="*60)
+    print(f"SEARCH ACCURACY ({store.collection_name}, recall@{args.top_k} vs exact)")
+    print(f"Quantization: {collection['quantization']}, on_disk: {collection['on_disk']}, "
+          f"HNSW m={collection['hnsw_m']} ef_construct={collection['hnsw_ef_construct']}")
+    print("="*60)
+    print(f"{'ef':>5} {'oversample':>10} {'rescore':>8} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for r in results:
+        print(f"{r['hnsw_ef']:>5} {str(r['oversampling']):>10} {str(r['rescore']):>8} "
+              f"{r['recall_at_k']:>8.3f} {r['p50_ms']:>8} {r['p95_ms']:>8}")
+    print("="*60)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"collection": store.collection_name, "config": collection, "results": results}, f, indent=2)
+        print(f"✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
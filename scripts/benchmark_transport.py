@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Qdrant Transport Benchmark
+
+Compare the REST and gRPC transports of QdrantStore on the same workload:
+1. Bulk upsert of random unit vectors into a scratch collection
+2. Query set with and without a payload filter
+3. Report upsert throughput and query p50/p95/p99 latency per transport
+
+The scratch collection is deleted afterwards; the production collection
+is not touched.
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag_pipeline.vector_store import QdrantStore
+from dotenv import load_dotenv
+
+load_dotenv()
+
+APPLIANCE_TYPES = ["refrigerator", "washer", "dryer", "microwave", "dishwasher"]
+
+
+def random_unit_vectors(n: int, dim: int, seed: int) -> np.ndarray:
+    """Random float32 unit vectors"""
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def percentiles(latencies_ms: list) -> dict:
+    """p50/p95/p99 and mean of a latency sample"""
+    values = np.asarray(latencies_ms)
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "mean_ms": round(float(values.mean()), 2)
+    }
+
+
+def benchmark_transport(
+    prefer_grpc: bool,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    batch_size: int,
+    top_k: int
+) -> dict:
+    """
+    Run the upsert + query workload over one transport.
+
+    Args:
+        prefer_grpc: Use gRPC instead of REST
+        vectors: Corpus vectors to upsert
+        queries: Query vectors
+        batch_size: Points per upsert call
+        top_k: Results per query
+
+    Returns:
+        Dictionary with upsert throughput and query latency percentiles
+    """
+    transport = "grpc" if prefer_grpc else "rest"
+    store = QdrantStore(
+        collection_name=f"transport_benchmark_{transport}",
+        embedding_dim=vectors.shape[1],
+        prefer_grpc=prefer_grpc
+    )
+    store.create_collection(force_recreate=True)
+
+    documents = [
+        {
+            "id": i,
+            "text": f"benchmark chunk {i}",
+            "embedding": vectors[i],
+            "metadata": {"appliance_type": APPLIANCE_TYPES[i % len(APPLIANCE_TYPES)]}
+        }
+        for i in range(len(vectors))
+    ]
+
+    try:
+        print(f"\n[{transport}] Upserting {len(documents)} points...")
+        start = time.perf_counter()
+        store.add_documents(documents, batch_size=batch_size)
+        upsert_seconds = time.perf_counter() - start
+
+        # One untimed query so connection setup is not counted
+        store.search(queries[0], top_k=top_k)
+
+        results = {}
+        for label, filters in (("unfiltered", None), ("filtered", {"appliance_type": "refrigerator"})):
+            print(f"[{transport}] Running {len(queries)} {label} queries...")
+            latencies = []
+            start = time.perf_counter()
+            for query in queries:
+                query_start = time.perf_counter()
+                store.search(query, top_k=top_k, filters=filters)
+                latencies.append((time.perf_counter() - query_start) * 1000)
+            elapsed = time.perf_counter() - start
+
+            results[label] = {
+                **percentiles(latencies),
+                "qps": round(len(queries) / elapsed, 1)
+            }
+
+        return {
+            "transport": transport,
+            "upsert": {
+                "points": len(documents),
+                "seconds": round(upsert_seconds, 2),
+                "points_per_second": round(len(documents) / upsert_seconds, 1),
+                "mb_per_second": round(vectors.nbytes / 1e6 / upsert_seconds, 2)
+            },
+            "search": results
+        }
+    finally:
+        store.delete_collection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Qdrant REST vs gRPC transport")
+
+    parser.add_argument(
+        "--points",
+        type=int,
+        default=20000,
+        help="Points to upsert (default: 20000)"
+    )
+
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=500,
+        help="Queries per run (default: 500)"
+    )
+
+    parser.add_argument(
+        "--dim",
+        type=int,
+        default=1536,
+        help="Vector dimension (default: 1536)"
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=256,
+        help="Points per upsert call (default: 256)"
+    )
+
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=15,
+        help="Results per query (default: 15, what search_samsung_manuals_rag requests)"
+    )
+
+    parser.add_argument(
+        "--output",
+        help="Write results as JSON to this file"
+    )
+
+    args = parser.parse_args()
+
+    vectors = random_unit_vectors(args.points, args.dim, seed=0)
+    queries = random_unit_vectors(args.queries, args.dim, seed=1)
+
+    report = [
+        benchmark_transport(prefer_grpc, vectors, queries, args.batch_size, args.top_k)
+        for prefer_grpc in (False, True)
+    ]
+
+    print("\n" + "="*60)
+    print(f"TRANSPORT BENCHMARK ({args.points} points x {args.dim} dims, {args.queries} queries)")
+    print("="*60)
+    for r in report:
+        upsert = r["upsert"]
+        print(f"{r['transport'].upper()}")
+        print(f"  Upsert: {upsert['points_per_second']} points/s ({upsert['mb_per_second']} MB/s)")
+        for label, s in r["search"].items():
+            print(f"  Search ({label}): p50 {s['p50_ms']} ms, p95 {s['p95_ms']} ms, "
+                  f"p99 {s['p99_ms']} ms, {s['qps']} qps")
+    print("="*60)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,14 @@ Manual Ingestion Script
 Process PDF manuals from GCS and ingest into RAG system:
 1. Extract text using Docling (local, open-source)
 2. Chunk using LlamaIndex
-3. Embed using OpenAI
+3. Embed using OpenAI (or a local backend, see EMBEDDING_BACKEND)
 4. Store in Qdrant
 """
 
 import os
 import sys
 import argparse
+from itertools import islice
 from pathlib import Path
 
 # Add parent directory to path
@@ -19,18 +20,152 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from rag_pipeline.document_processor import DocumentProcessor
 from rag_pipeline.chunking import LlamaIndexChunker
-from rag_pipeline.embedding import OpenAIEmbedder
-from rag_pipeline.vector_store import QdrantStore
+from rag_pipeline.embedding import create_embedder
+from rag_pipeline.vector_store import create_vector_store
+from rag_pipeline.bm25_index import BM25Index
+from rag_pipeline.catalog import ManualCatalog
+from rag_pipeline.result_cache import bump_generation
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+def extract_document(doc_processor: DocumentProcessor, gcs_uri: str) -> dict:
+    """
+    Extract text and filename-derived metadata from one manual.
+
+    Args:
+        doc_processor: Document processor
+        gcs_uri: GCS URI of the PDF
+
+    Returns:
+        Document dict with text, metadata and gcs_uri
+    """
+    # Extract text
+    result = doc_processor.process_gcs_document(gcs_uri)
+
+    # Extract metadata from URI
+    filename = gcs_uri.split("/")[-1].replace(".pdf", "")
+    parts = filename.split("_")
+
+    metadata = {
+        "source": gcs_uri,
+        "filename": filename,
+        # Stable document identity for deterministic chunk IDs
+        "file_hash": result["metadata"]["file_hash"],
+        "pages": result["pages"],
+        "brand": parts[0] if len(parts) > 0 else "Unknown",
+        # Same keys as the search filters and payload indexes (PAYLOAD_INDEXES)
+        "appliance_type": parts[2].lower() if len(parts) > 2 else "appliance",
+        "model_number": parts[1] if len(parts) > 1 else "Unknown"
+    }
+
+    print(f"  ✓ Extracted {len(result['text'])} characters, {result['pages']} pages")
+
+    return {
+        "text": result["text"],
+        "metadata": metadata,
+        "gcs_uri": gcs_uri
+    }
+
+
+def iter_documents(doc_processor: DocumentProcessor, gcs_uris: list[str], counts: dict, manuals: dict):
+    """Extract manuals one at a time (streaming mode), counting successes and recording their file hashes"""
+    for i, gcs_uri in enumerate(gcs_uris, 1):
+        print(f"\nProcessing {i}/{len(gcs_uris)}: {gcs_uri}")
+        try:
+            document = extract_document(doc_processor, gcs_uri)
+        except Exception as e:
+            print(f"  ✗ Failed: {e}")
+            continue
+        counts["documents"] += 1
+        manuals[document["metadata"]["source"]] = document["metadata"]["file_hash"]
+        yield document
+
+
+def count_chunks(chunks, counts: dict):
+    """Pass chunks through while counting them (streaming mode)"""
+    for chunk in chunks:
+        counts["chunks"] += 1
+        yield chunk
+
+
+def chunk_record(chunk) -> dict:
+    """BM25 index / catalog record of a chunk node"""
+    return {"id": chunk.node_id, "text": chunk.text, "metadata": chunk.metadata}
+
+
+def index_chunks(chunks, indexes: list):
+    """Pass chunks through while adding them to the BM25 index and catalog (streaming mode)"""
+    for chunk in chunks:
+        record = chunk_record(chunk)
+        for index in indexes:
+            index.add_documents([record])
+        yield chunk
+
+
+def delete_replaced_manuals(manuals: dict, vector_store, bm25_index=None) -> int:
+    """
+    Delete the chunks of earlier versions of the ingested manuals.
+
+    A replaced manual gets new chunk IDs (they derive from its file hash), so
+    its old chunks would otherwise stay searchable. Runs after the upload, so
+    a manual is never without content while it is re-ingested; the catalog
+    drops earlier versions itself as the new chunks are added.
+
+    Args:
+        manuals: Dict of source -> file hash of the version just ingested
+        vector_store: Vector store the chunks were uploaded to
+        bm25_index: Optional BM25 index to prune (saved by the caller)
+
+    Returns:
+        Number of points deleted from the vector store
+    """
+    deleted = 0
+    for source, file_hash in manuals.items():
+        count = vector_store.delete_stale_manual(source, file_hash)
+        if bm25_index is not None:
+            bm25_index.delete_stale_manual(source, file_hash)
+        if count:
+            print(f"  ✓ Deleted {count} chunks of the previous version of {source}")
+        deleted += count
+    return deleted
+
+
+def skip_existing_chunks(chunks, vector_store, counts: dict, window: int = 1000):
+    """
+    Drop chunks whose (deterministic) point ID is already stored.
+
+    Runs before embedding, so re-ingesting a manual, or resuming after a
+    partial failure, only pays for the missing chunks.
+    """
+    iterator = iter(chunks)
+    while True:
+        batch = list(islice(iterator, window))
+        if not batch:
+            return
+        existing = vector_store.existing_ids([chunk.node_id for chunk in batch])
+        counts["skipped"] = counts.get("skipped", 0) + len(existing)
+        for chunk in batch:
+            if chunk.node_id not in existing:
+                yield chunk
+
+
 def ingest_manuals_from_gcs(
     gcs_uris: list[str],
     chunk_size: int = 512,
     chunk_overlap: int = 50,
-    batch_size: int = 100
+    batch_size: int = 100,
+    concurrency: int = 8,
+    embed_max_items: int = 512,
+    embed_max_tokens: int = 100000,
+    embedding_backend: str = None,
+    dimensions: int = None,
+    upload_workers: int = None,
+    stream: bool = False,
+    skip_existing: bool = True,
+    lexical_index: bool = True,
+    catalog: bool = True
 ):
     """
     Ingest manuals from GCS into RAG system.
@@ -39,7 +174,23 @@ def ingest_manuals_from_gcs(
         gcs_uris: List of GCS URIs (gs://bucket/path/file.pdf)
         chunk_size: Chunk size for splitting
         chunk_overlap: Overlap between chunks
-        batch_size: Batch size for embedding/uploading
+        batch_size: Batch size for uploading
+        concurrency: Maximum embedding batches in flight
+        embed_max_items: Maximum texts per embedding request
+        embed_max_tokens: Token budget per embedding request
+        embedding_backend: Embedding backend (default: EMBEDDING_BACKEND or openai)
+        dimensions: Reduced OpenAI embedding dimension (default: OPENAI_EMBEDDING_DIMENSIONS or full size)
+        upload_workers: Parallel Qdrant upload workers (default: QDRANT_UPLOAD_WORKERS or 4)
+        stream: Extract, chunk, embed and upload manual by manual with bounded
+                memory instead of materializing every stage
+        skip_existing: Skip chunks whose point ID is already stored (IDs are
+                       derived from the file hash, chunk ordinal and chunking
+                       settings); disable to re-embed and overwrite everything,
+                       e.g. after switching to another embedding model
+        lexical_index: Add all chunks to the in-process BM25 index and save it
+                       next to the collection (LEXICAL_INDEX_PATH)
+        catalog: Add all chunks to the model-number / error-code catalog
+                 (CATALOG_PATH) used to resolve models without a search
     """
     print("="*60)
     print("MANUAL INGESTION PIPELINE")
@@ -48,14 +199,80 @@ def ingest_manuals_from_gcs(
     print(f"Chunk size: {chunk_size}")
     print(f"Chunk overlap: {chunk_overlap}")
     print(f"Batch size: {batch_size}")
+    print(f"Embedding concurrency: {concurrency}")
+    print(f"Embedding request budget: {embed_max_items} texts / {embed_max_tokens} tokens")
+    print(f"Mode: {'streaming' if stream else 'batch'}")
+    print(f"Skip existing chunks: {skip_existing}")
     print("="*60)
 
     # Step 1: Initialize components
     print("\n[1/5] Initializing components...")
     doc_processor = DocumentProcessor()
     chunker = LlamaIndexChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    embedder = OpenAIEmbedder(batch_size=batch_size)
-    vector_store = QdrantStore()
+    backend = (embedding_backend or os.getenv("EMBEDDING_BACKEND", "openai")).lower()
+    if backend == "openai":
+        embedder = create_embedder(
+            backend,
+            batch_size=embed_max_items,
+            max_batch_tokens=embed_max_tokens,
+            max_concurrency=concurrency,
+            dimensions=dimensions
+        )
+    else:
+        embedder = create_embedder(backend)
+    vector_store = create_vector_store(embedding_dim=embedder.embedding_dim)
+    print(f"Embedding model: {embedder.model} ({embedder.embedding_dim} dims)")
+
+    # Make sure the collection exists with a matching vector size
+    vector_store.create_collection()
+
+    # Existing index is loaded and updated, so earlier manuals stay searchable
+    bm25_index = BM25Index(collection_name=vector_store.collection_name) if lexical_index else None
+    manual_catalog = ManualCatalog(collection_name=vector_store.collection_name) if catalog else None
+    indexes = [index for index in (bm25_index, manual_catalog) if index is not None]
+
+    if stream:
+        # Steps 2-5 run as one pipeline: only the current manual, one embedding
+        # window and a few upload batches are held in memory at any time
+        print("\n[2-5/5] Streaming: extract -> chunk -> embed -> store...")
+        counts = {"documents": 0, "chunks": 0, "skipped": 0}
+        manuals = {}
+        chunks = count_chunks(chunker.iter_chunks(iter_documents(doc_processor, gcs_uris, counts, manuals)), counts)
+        if indexes:
+            # Before the skip filter: chunks already in Qdrant still belong in the indexes
+            chunks = index_chunks(chunks, indexes)
+        if skip_existing:
+            chunks = skip_existing_chunks(chunks, vector_store, counts)
+
+        num_stored = vector_store.add_documents(
+            embedder.iter_embed_nodes(chunks),
+            batch_size=batch_size,
+            max_workers=upload_workers
+        )
+        upload_stats = vector_store.last_upload_stats
+        if upload_stats["failed_batches"]:
+            # The new versions are incomplete; keep the old chunks until a re-run succeeds
+            print(f"⚠️  {len(upload_stats['failed_batches'])} batches failed, previous manual versions kept")
+        else:
+            counts["replaced"] = delete_replaced_manuals(manuals, vector_store, bm25_index)
+        for index in indexes:
+            index.save()
+        # Cached retrieval results may point at replaced chunks
+        bump_generation(vector_store.collection_name)
+
+        print("\n" + "="*60)
+        print("INGESTION COMPLETE")
+        print("="*60)
+        print(f"Documents processed: {counts['documents']}/{len(gcs_uris)}")
+        print(f"Chunks created: {counts['chunks']}")
+        print(f"Chunks already stored (skipped): {counts['skipped']}")
+        print(f"Chunks of replaced versions deleted: {counts.get('replaced', 0)}")
+        print(f"Vectors stored: {num_stored}")
+        print(f"Upload throughput: {upload_stats['points_per_second']:.0f} points/s")
+        if getattr(embedder, "last_failure_report", None):
+            print(f"Dropped chunks: {len(embedder.last_failures)} (see {embedder.last_failure_report})")
+        print("="*60)
+        return
 
     # Step 2: Extract text from PDFs
     print("\n[2/5] Extracting text from PDFs using Docling...")
@@ -65,30 +282,7 @@ def ingest_manuals_from_gcs(
         print(f"\nProcessing {i}/{len(gcs_uris)}: {gcs_uri}")
 
         try:
-            # Extract text
-            result = doc_processor.process_gcs_document(gcs_uri)
-
-            # Extract metadata from URI
-            filename = gcs_uri.split("/")[-1].replace(".pdf", "")
-            parts = filename.split("_")
-
-            metadata = {
-                "source": gcs_uri,
-                "filename": filename,
-                "pages": result["pages"],
-                "brand": parts[0] if len(parts) > 0 else "Unknown",
-                "product_type": parts[2].lower() if len(parts) > 2 else "appliance",
-                "model": parts[1] if len(parts) > 1 else "Unknown"
-            }
-
-            documents.append({
-                "text": result["text"],
-                "metadata": metadata,
-                "gcs_uri": gcs_uri
-            })
-
-            print(f"  ✓ Extracted {len(result['text'])} characters, {result['pages']} pages")
-
+            documents.append(extract_document(doc_processor, gcs_uri))
         except Exception as e:
             print(f"  ✗ Failed: {e}")
 
@@ -103,20 +297,57 @@ def ingest_manuals_from_gcs(
     print(f"  Avg length: {stats['avg_chunk_length']:.0f} characters")
     print(f"  Min/Max: {stats['min_chunk_length']}/{stats['max_chunk_length']}")
 
+    counts = {"skipped": 0}
+    new_chunks = all_chunks
+    if skip_existing:
+        new_chunks = list(skip_existing_chunks(all_chunks, vector_store, counts))
+        print(f"✓ {counts['skipped']} chunks already stored, {len(new_chunks)} to embed")
+
     # Step 4: Generate embeddings
-    print("\n[4/5] Generating embeddings with OpenAI...")
-    embedded_docs = embedder.embed_nodes(all_chunks)
+    print(f"\n[4/5] Generating embeddings with {embedder.model}...")
+    embedded_docs = embedder.embed_nodes(new_chunks)
 
     embed_stats = embedder.get_embedding_stats([d["embedding"] for d in embedded_docs])
     print(f"✓ Generated {embed_stats['valid']} embeddings")
     print(f"  Model: {embed_stats['model']}")
     print(f"  Dimension: {embed_stats['dimension']}")
+    print(f"  Vector memory: {embed_stats['bytes'] / 1e6:.1f} MB (float32)")
+    if getattr(embedder, "last_failure_report", None):
+        print(f"  Dropped chunks: {len(embedder.last_failures)} (see {embedder.last_failure_report})")
+    if embed_stats["cache"]:
+        print(f"  Cache hits: {embed_stats['cache']['hits']} "
+              f"(hit ratio {embed_stats['cache']['hit_ratio']:.1%})")
 
     # Step 5: Store in Qdrant
     print("\n[5/5] Storing vectors in Qdrant...")
-    num_stored = vector_store.add_documents(embedded_docs, batch_size=batch_size)
+    num_stored = vector_store.add_documents(
+        embedded_docs,
+        batch_size=batch_size,
+        max_workers=upload_workers
+    )
 
+    upload_stats = vector_store.last_upload_stats
     print(f"✓ Stored {num_stored} vectors in Qdrant")
+    print(f"  Throughput: {upload_stats['points_per_second']:.0f} points/s, "
+          f"{upload_stats['mb_per_second']:.1f} MB/s")
+    if upload_stats["failed_batches"]:
+        print(f"  Failed batches: {len(upload_stats['failed_batches'])}")
+
+    if upload_stats["failed_batches"]:
+        # The new versions are incomplete; keep the old chunks until a re-run succeeds
+        print("  ⚠️  Previous manual versions kept")
+    else:
+        manuals = {doc["metadata"]["source"]: doc["metadata"]["file_hash"] for doc in documents}
+        counts["replaced"] = delete_replaced_manuals(manuals, vector_store, bm25_index)
+
+    if indexes:
+        print("\nUpdating BM25 index and catalog...")
+        for index in indexes:
+            index.add_documents(chunk_record(chunk) for chunk in all_chunks)
+            index.save()
+
+    # Cached retrieval results may point at replaced chunks
+    bump_generation(vector_store.collection_name)
 
     # Final summary
     print("\n" + "="*60)
@@ -124,6 +355,8 @@ def ingest_manuals_from_gcs(
     print("="*60)
     print(f"Documents processed: {len(documents)}")
     print(f"Chunks created: {len(all_chunks)}")
+    print(f"Chunks already stored (skipped): {counts['skipped']}")
+    print(f"Chunks of replaced versions deleted: {counts.get('replaced', 0)}")
     print(f"Vectors stored: {num_stored}")
     print("="*60)
 
@@ -166,7 +399,70 @@ def main():
         "--batch-size",
         type=int,
         default=100,
-        help="Batch size for embedding/uploading (default: 100)"
+        help="Batch size for uploading to Qdrant (default: 100)"
+    )
+
+    parser.add_argument(
+        "--embed-max-items",
+        type=int,
+        default=512,
+        help="Maximum texts per embedding request (default: 512)"
+    )
+
+    parser.add_argument(
+        "--embed-max-tokens",
+        type=int,
+        default=100000,
+        help="Token budget per embedding request (default: 100000)"
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum embedding batches in flight; reduced automatically on rate limits (default: 8)"
+    )
+
+    parser.add_argument(
+        "--embedding-backend",
+        choices=["openai", "hashing", "sentence-transformers"],
+        help="Embedding backend (default: EMBEDDING_BACKEND or openai)"
+    )
+
+    parser.add_argument(
+        "--dimensions",
+        type=int,
+        help="Reduced embedding dimension for text-embedding-3 models (default: full size)"
+    )
+
+    parser.add_argument(
+        "--upload-workers",
+        type=int,
+        help="Parallel Qdrant upload workers (default: QDRANT_UPLOAD_WORKERS or 4)"
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream manuals through extract/chunk/embed/upload with bounded memory"
+    )
+
+    parser.add_argument(
+        "--reingest",
+        action="store_true",
+        help="Re-embed and overwrite chunks that are already stored (default: skip them)"
+    )
+
+    parser.add_argument(
+        "--no-lexical-index",
+        action="store_true",
+        help="Do not update the BM25 index used for fallback/fusion retrieval"
+    )
+
+    parser.add_argument(
+        "--no-catalog",
+        action="store_true",
+        help="Do not update the model-number / error-code catalog"
     )
 
     args = parser.parse_args()
@@ -201,7 +497,17 @@ def main():
         gcs_uris=gcs_uris,
         chunk_size=args.chunk_size,
         chunk_overlap=args.chunk_overlap,
-        batch_size=args.batch_size
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        embed_max_items=args.embed_max_items,
+        embed_max_tokens=args.embed_max_tokens,
+        embedding_backend=args.embedding_backend,
+        dimensions=args.dimensions,
+        upload_workers=args.upload_workers,
+        stream=args.stream,
+        skip_existing=not args.reingest,
+        lexical_index=not args.no_lexical_index,
+        catalog=not args.no_catalog
     )
 
 
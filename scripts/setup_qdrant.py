@@ -12,31 +12,73 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from rag_pipeline.vector_store import QdrantStore
+from rag_pipeline.embedding import create_embedder
+from rag_pipeline.result_cache import bump_generation
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-def setup_qdrant(force_recreate: bool = False):
+def setup_qdrant(
+    force_recreate: bool = False,
+    dimensions: int = None,
+    create_indexes: bool = False,
+    quantization: str = None,
+    on_disk: bool = None,
+    hnsw_m: int = None,
+    hnsw_ef_construct: int = None,
+    hybrid: bool = None
+):
     """
     Set up Qdrant collection.
 
     Args:
         force_recreate: If True, delete and recreate collection
+        dimensions: Reduced embedding dimension (default: OPENAI_EMBEDDING_DIMENSIONS or full size)
+        create_indexes: Add missing payload indexes to an existing collection (migration)
+        quantization: 'scalar', 'binary' or 'none' (default: QDRANT_QUANTIZATION)
+        on_disk: Keep original vectors on disk (default: QDRANT_ON_DISK)
+        hnsw_m: HNSW edges per node (default: QDRANT_HNSW_M or Qdrant's default)
+        hnsw_ef_construct: HNSW build-time neighbours (default: QDRANT_HNSW_EF_CONSTRUCT or Qdrant's default)
+        hybrid: Named dense + sparse vectors for hybrid search (default: QDRANT_HYBRID)
     """
     print("="*60)
     print("QDRANT SETUP")
     print("="*60)
 
-    # Initialize store
-    store = QdrantStore()
+    # Initialize store with the dimension of the configured embedding backend
+    embedder = create_embedder(**({"dimensions": dimensions} if dimensions else {}))
+    store = QdrantStore(embedding_dim=embedder.embedding_dim, hybrid=hybrid)
 
     print(f"\nQdrant URL: {store.url}")
     print(f"Collection name: {store.collection_name}")
+    print(f"Embedding model: {embedder.model}")
     print(f"Embedding dimension: {store.embedding_dim}")
-
-    # Create collection
-    store.create_collection(force_recreate=force_recreate)
+    print(f"Hybrid (dense + sparse): {store.hybrid}")
+
+    # Create collection (new collections get their payload indexes here)
+    store.create_collection(
+        force_recreate=force_recreate,
+        hnsw_m=hnsw_m,
+        hnsw_ef_construct=hnsw_ef_construct,
+        quantization=quantization,
+        on_disk=on_disk
+    )
+    if force_recreate:
+        # Cached retrieval results point at the dropped points
+        bump_generation(store.collection_name)
+
+    # Migrate collections created before payload indexes were declared
+    if create_indexes:
+        print("\nEnsuring payload indexes...")
+        created = store.ensure_payload_indexes()
+        if not created:
+            print("✓ All payload indexes already exist")
+        backfilled = store.backfill_payload_fields()
+        if backfilled:
+            print(f"✓ Copied model/product_type to the indexed fields on {backfilled} points")
+            # Filtered searches now match points they used to miss
+            bump_generation(store.collection_name)
 
     # Get collection info
     try:
@@ -51,6 +93,9 @@ def setup_qdrant(force_recreate: bool = False):
         print(f"Status: {info['status']}")
         print(f"Dimension: {info['config']['dimension']}")
         print(f"Distance: {info['config']['distance']}")
+        print(f"Hybrid: {info['hybrid']}")
+        indexes = ", ".join(f"{k} ({v})" for k, v in info["payload_indexes"].items())
+        print(f"Payload indexes: {indexes or 'none (run with --create-indexes)'}")
         print("="*60)
 
         print("\n✓ Qdrant setup complete!")
@@ -70,6 +115,60 @@ if __name__ == "__main__":
         help="Delete and recreate collection if it exists"
     )
 
+    parser.add_argument(
+        "--dimensions",
+        type=int,
+        help="Reduced embedding dimension for text-embedding-3 models (default: full size)"
+    )
+
+    parser.add_argument(
+        "--create-indexes",
+        action="store_true",
+        help="Add missing payload indexes (brand, appliance_type, model_number) to an existing collection "
+             "and fill those fields on points ingested with the older model/product_type keys"
+    )
+
+    parser.add_argument(
+        "--quantization",
+        choices=["scalar", "binary", "none"],
+        help="Vector quantization for a new collection (default: QDRANT_QUANTIZATION or none)"
+    )
+
+    parser.add_argument(
+        "--on-disk",
+        action="store_true",
+        default=None,
+        help="Store original vectors on disk for a new collection (default: QDRANT_ON_DISK)"
+    )
+
+    parser.add_argument(
+        "--hnsw-m",
+        type=int,
+        help="HNSW edges per node for a new collection"
+    )
+
+    parser.add_argument(
+        "--hnsw-ef-construct",
+        type=int,
+        help="HNSW build-time neighbours for a new collection"
+    )
+
+    parser.add_argument(
+        "--hybrid",
+        action="store_true",
+        default=None,
+        help="Create named dense + sparse vectors for hybrid search (default: QDRANT_HYBRID)"
+    )
+
     args = parser.parse_args()
 
-    setup_qdrant(force_recreate=args.force_recreate)
+    setup_qdrant(
+        force_recreate=args.force_recreate,
+        dimensions=args.dimensions,
+        create_indexes=args.create_indexes,
+        quantization=args.quantization,
+        on_disk=args.on_disk,
+        hnsw_m=args.hnsw_m,
+        hnsw_ef_construct=args.hnsw_ef_construct,
+        hybrid=args.hybrid
+    )
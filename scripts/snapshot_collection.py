@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Collection Snapshot Export/Import
+
+Bootstrap a new environment (or a replica) from an existing index instead
+of re-running extraction, chunking and embedding:
+
+    # On a machine with the populated collection
+    python scripts/snapshot_collection.py export ./snapshots/fridge_manuals
+
+    # On the new environment (Qdrant, or --backend local)
+    python scripts/snapshot_collection.py import ./snapshots/fridge_manuals
+
+A snapshot is a directory with:
+- manifest.json: collection name, point count, vector dimension, embedding model
+- vectors.f32: raw float32 row-major matrix (one row per point)
+- payloads.jsonl: one {"id", "text", "metadata"} record per row
+
+Import streams the snapshot through add_documents (parallel upload workers)
+with progress output; it makes no embedding calls.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag_pipeline.vector_store import create_vector_store
+from rag_pipeline.result_cache import bump_generation
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def configured_embedding_model() -> str:
+    """Embedding model name from config, recorded in the manifest"""
+    if os.getenv("EMBEDDING_BACKEND", "openai").lower() == "openai":
+        return os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+    return os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+
+def export_collection(
+    output_dir: str,
+    backend: str = None,
+    collection_name: str = None,
+    batch_size: int = 256
+) -> dict:
+    """
+    Export all points of a collection (vectors + payload) to a snapshot directory.
+
+    Args:
+        output_dir: Snapshot directory (created if missing)
+        backend: Source vector store backend (default: VECTOR_STORE_BACKEND)
+        collection_name: Source collection (default: QDRANT_COLLECTION_NAME)
+        batch_size: Points read per request
+
+    Returns:
+        Snapshot manifest
+    """
+    store = create_vector_store(backend, collection_name=collection_name)
+    embedding_dim = store.get_vector_size()
+    if not embedding_dim:
+        raise ValueError(f"Collection {store.collection_name} does not exist or has no vectors")
+    store.embedding_dim = embedding_dim
+
+    total = store.get_collection_info()["points_count"] or 0
+    os.makedirs(output_dir, exist_ok=True)
+    vectors_path = os.path.join(output_dir, "vectors.f32")
+    payloads_path = os.path.join(output_dir, "payloads.jsonl")
+
+    print(f"Exporting {total} points from {store.collection_name} ({embedding_dim} dims) to {output_dir}")
+
+    exported = 0
+    start = time.perf_counter()
+    with open(vectors_path, "wb") as vectors_file, open(payloads_path, "w") as payloads_file:
+        for point in store.iter_points(batch_size=batch_size):
+            vectors_file.write(np.asarray(point["embedding"], dtype=np.float32).tobytes())
+            payloads_file.write(json.dumps({
+                "id": point["id"],
+                "text": point["text"],
+                "metadata": point["metadata"]
+            }) + "\n")
+            exported += 1
+            if exported % 10000 == 0:
+                print(f"  Exported {exported}/{total} points")
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "collection": store.collection_name,
+        "points": exported,
+        "embedding_dim": embedding_dim,
+        "dtype": "float32",
+        "embedding_model": configured_embedding_model(),
+        "source": store.url,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    size_mb = (os.path.getsize(vectors_path) + os.path.getsize(payloads_path)) / 1e6
+    print(f"✓ Exported {exported} points ({size_mb:.1f} MB) in {elapsed:.1f}s")
+    return manifest
+
+
+def load_manifest(snapshot_dir: str) -> dict:
+    """
+    Read and validate a snapshot manifest.
+
+    Args:
+        snapshot_dir: Snapshot directory
+
+    Returns:
+        Snapshot manifest
+    """
+    with open(os.path.join(snapshot_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format_version')}")
+
+    expected_bytes = manifest["points"] * manifest["embedding_dim"] * 4
+    actual_bytes = os.path.getsize(os.path.join(snapshot_dir, "vectors.f32"))
+    if actual_bytes != expected_bytes:
+        raise ValueError(f"vectors.f32 is {actual_bytes} bytes, manifest expects {expected_bytes}")
+
+    return manifest
+
+
+def iter_snapshot(snapshot_dir: str, manifest: dict, progress_every: int = 5000):
+    """
+    Stream snapshot points as add_documents dicts, printing progress.
+
+    Vectors are memory-mapped, so only the batches being uploaded are in memory.
+    """
+    total = manifest["points"]
+    vectors = np.memmap(
+        os.path.join(snapshot_dir, "vectors.f32"),
+        dtype=np.float32,
+        mode="r",
+        shape=(total, manifest["embedding_dim"])
+    )
+
+    start = time.perf_counter()
+    with open(os.path.join(snapshot_dir, "payloads.jsonl")) as f:
+        for row, line in enumerate(f):
+            record = json.loads(line)
+            yield {
+                "id": record["id"],
+                "text": record["text"],
+                "embedding": np.array(vectors[row]),
+                "metadata": record["metadata"]
+            }
+
+            read = row + 1
+            if read % progress_every == 0 or read == total:
+                elapsed = max(time.perf_counter() - start, 1e-9)
+                print(f"  Progress: {read}/{total} points ({read / total:.0%}, {read / elapsed:.0f} points/s)")
+
+
+def import_collection(
+    snapshot_dir: str,
+    backend: str = None,
+    collection_name: str = None,
+    force_recreate: bool = False,
+    batch_size: int = 256,
+    upload_workers: int = None,
+    resume: bool = False,
+    quantization: str = None,
+    on_disk: bool = None
+) -> int:
+    """
+    Restore a snapshot into a Qdrant or local collection.
+
+    Args:
+        snapshot_dir: Snapshot directory written by export_collection
+        backend: Target vector store backend (default: VECTOR_STORE_BACKEND)
+        collection_name: Target collection (default: the snapshot's collection name)
+        force_recreate: Drop the target collection first
+        batch_size: Points per upload batch
+        upload_workers: Parallel upload workers (default: QDRANT_UPLOAD_WORKERS or 4)
+        resume: Skip points already in the target (continue an interrupted import)
+        quantization: Vector quantization for a new Qdrant collection
+        on_disk: Keep original vectors on disk for a new Qdrant collection
+
+    Returns:
+        Number of points restored
+    """
+    manifest = load_manifest(snapshot_dir)
+    store = create_vector_store(
+        backend,
+        collection_name=collection_name or manifest["collection"],
+        embedding_dim=manifest["embedding_dim"]
+    )
+
+    print(f"Importing {manifest['points']} points ({manifest['embedding_dim']} dims, "
+          f"{manifest['embedding_model']}) into {store.collection_name} at {store.url}")
+    if manifest["embedding_model"] != configured_embedding_model():
+        print(f"⚠️  Snapshot was built with {manifest['embedding_model']}, "
+              f"but the configured query model is {configured_embedding_model()}")
+
+    storage_options = {}
+    if quantization is not None:
+        storage_options["quantization"] = quantization
+    if on_disk is not None:
+        storage_options["on_disk"] = on_disk
+    store.create_collection(force_recreate=force_recreate, **storage_options)
+
+    start = time.perf_counter()
+    restored = store.add_documents(
+        iter_snapshot(snapshot_dir, manifest),
+        batch_size=batch_size,
+        max_workers=upload_workers,
+        skip_existing=resume
+    )
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    bump_generation(store.collection_name)
+
+    stats = store.last_upload_stats
+    print(f"✓ Restored {restored} points in {elapsed:.1f}s ({restored / elapsed:.0f} points/s)")
+    if stats.get("skipped_existing"):
+        print(f"  Already present (skipped): {stats['skipped_existing']}")
+    if stats.get("failed_batches"):
+        print(f"⚠️  {len(stats['failed_batches'])} batch(es) failed; re-run with --resume")
+    return restored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export/import a vector collection snapshot")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export a collection to a snapshot directory")
+    export_parser.add_argument("snapshot_dir", help="Snapshot directory to write")
+    export_parser.add_argument(
+        "--backend",
+        choices=["qdrant", "local"],
+        help="Source vector store backend (default: VECTOR_STORE_BACKEND or qdrant)"
+    )
+    export_parser.add_argument(
+        "--collection",
+        help="Source collection (default: QDRANT_COLLECTION_NAME)"
+    )
+    export_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=256,
+        help="Points read per request (default: 256)"
+    )
+
+    import_parser = subparsers.add_parser("import", help="Restore a snapshot directory into a collection")
+    import_parser.add_argument("snapshot_dir", help="Snapshot directory to read")
+    import_parser.add_argument(
+        "--backend",
+        choices=["qdrant", "local"],
+        help="Target vector store backend (default: VECTOR_STORE_BACKEND or qdrant)"
+    )
+    import_parser.add_argument(
+        "--collection",
+        help="Target collection (default: the snapshot's collection name)"
+    )
+    import_parser.add_argument(
+        "--force-recreate",
+        action="store_true",
+        help="Drop and recreate the target collection"
+    )
+    import_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip points already in the target (continue an interrupted import)"
+    )
+    import_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=256,
+        help="Points per upload batch (default: 256)"
+    )
+    import_parser.add_argument(
+        "--upload-workers",
+        type=int,
+        help="Parallel upload workers (default: QDRANT_UPLOAD_WORKERS or 4)"
+    )
+    import_parser.add_argument(
+        "--quantization",
+        choices=["none", "scalar", "binary"],
+        help="Vector quantization for a new Qdrant collection (default: QDRANT_QUANTIZATION or none)"
+    )
+    import_parser.add_argument(
+        "--on-disk",
+        action="store_true",
+        default=None,
+        help="Keep original vectors on disk for a new Qdrant collection"
+    )
+
+    args = parser.parse_args()
+
+    print("="*60)
+    print(f"COLLECTION SNAPSHOT {args.command.upper()}")
+    print("="*60)
+
+    if args.command == "export":
+        export_collection(
+            args.snapshot_dir,
+            backend=args.backend,
+            collection_name=args.collection,
+            batch_size=args.batch_size
+        )
+    else:
+        import_collection(
+            args.snapshot_dir,
+            backend=args.backend,
+            collection_name=args.collection,
+            force_recreate=args.force_recreate,
+            batch_size=args.batch_size,
+            upload_workers=args.upload_workers,
+            resume=args.resume,
+            quantization=args.quantization,
+            on_disk=args.on_disk
+        )
+
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
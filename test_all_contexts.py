@@ -9,7 +9,7 @@ import json
 import sys
 from pathlib import Path
 from typing import Dict, Any, List
-from tools import search_samsung_manuals_rag, calculate_accuracy_score
+from tools import search_samsung_manuals_rag, search_samsung_manuals_rag_batch, calculate_accuracy_score
 from rag_pipeline.retriever import search_manuals_rag
 
 
@@ -19,37 +19,41 @@ def load_user_context(context_file: str) -> Dict[str, Any]:
         return json.load(f)
 
 
-def test_single_context(context_file: str) -> Dict[str, Any]:
+def build_search(context: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Test a single context and return accuracy results.
+    Build the RAG search parameters for a context.
 
     Args:
-        context_file: Path to context JSON file
+        context: Loaded context dictionary
 
     Returns:
-        Dictionary with test results and accuracy score
+        Dictionary with query, user_model, user_brand and appliance_type
     """
-    # Load context
-    context = load_user_context(context_file)
-
-    # Extract context fields
-    brand = context['appliance']['brand']
-    model = context['appliance']['model']
     appliance_type = context['appliance']['type']
     problem_desc = context['problem']['description']
 
-    # Build query from problem description
-    query = f"{appliance_type} {problem_desc}"
+    return {
+        # Build query from problem description
+        "query": f"{appliance_type} {problem_desc}",
+        "user_model": context['appliance']['model'],
+        "user_brand": context['appliance']['brand'],
+        "appliance_type": appliance_type
+    }
 
-    # Run enhanced RAG search
-    result = search_samsung_manuals_rag(
-        query=query,
-        top_k=5,
-        user_model=model,
-        user_brand=brand,
-        appliance_type=appliance_type,
-        min_similarity=0.7
-    )
+
+def build_test_result(context_file: str, context: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the report entry for one context from its RAG search result.
+
+    Args:
+        context_file: Path to context JSON file
+        context: Loaded context dictionary
+        result: Result of search_samsung_manuals_rag for the context
+
+    Returns:
+        Dictionary with test results and accuracy score
+    """
+    search = build_search(context)
 
     # Extract accuracy score
     accuracy_score = result.get('accuracy_score', {})
@@ -58,12 +62,12 @@ def test_single_context(context_file: str) -> Dict[str, Any]:
     test_result = {
         "context_file": Path(context_file).name,
         "appliance": {
-            "brand": brand,
-            "model": model,
-            "type": appliance_type
+            "brand": search['user_brand'],
+            "model": search['user_model'],
+            "type": search['appliance_type']
         },
-        "problem": problem_desc,
-        "query": query,
+        "problem": context['problem']['description'],
+        "query": search['query'],
         "results": {
             "num_results": result.get('num_results', 0),
             "found_information": result.get('found_information', False),
@@ -95,10 +99,36 @@ def test_single_context(context_file: str) -> Dict[str, Any]:
     return test_result
 
 
+def test_single_context(context_file: str) -> Dict[str, Any]:
+    """
+    Test a single context and return accuracy results.
+
+    Args:
+        context_file: Path to context JSON file
+
+    Returns:
+        Dictionary with test results and accuracy score
+    """
+    # Load context
+    context = load_user_context(context_file)
+
+    # Run enhanced RAG search
+    result = search_samsung_manuals_rag(
+        **build_search(context),
+        top_k=5,
+        min_similarity=0.7
+    )
+
+    return build_test_result(context_file, context, result)
+
+
 def test_all_contexts(contexts_dir: str = "test_contexts") -> List[Dict[str, Any]]:
     """
     Test all context files in the directory.
 
+    All contexts are searched together in one batched RAG call
+    (one embeddings request, one Qdrant round trip).
+
     Args:
         contexts_dir: Directory containing context JSON files
 
@@ -108,15 +138,42 @@ def test_all_contexts(contexts_dir: str = "test_contexts") -> List[Dict[str, Any
     contexts_path = Path(contexts_dir)
     context_files = sorted(contexts_path.glob("user_context_*.json"))
 
-    results = []
-
     print(f"Found {len(context_files)} test contexts\n")
 
+    # Load all contexts first so they can be searched in one batch
+    loaded = {}
+    search_params = {}
+    errors = {}
+    for context_file in context_files:
+        try:
+            context = load_user_context(str(context_file))
+            search_params[context_file] = build_search(context)
+            loaded[context_file] = context
+        except Exception as e:
+            errors[context_file] = e
+
+    searches = {}
+    try:
+        batch_results = search_samsung_manuals_rag_batch(
+            list(search_params.values()),
+            top_k=5,
+            min_similarity=0.7
+        )
+        searches = dict(zip(search_params, batch_results))
+    except Exception as e:
+        for context_file in search_params:
+            errors[context_file] = e
+
+    results = []
+
     for i, context_file in enumerate(context_files, 1):
         print(f"[{i}/{len(context_files)}] Testing: {context_file.name}...", end=" ")
 
         try:
-            result = test_single_context(str(context_file))
+            if context_file in errors:
+                raise errors[context_file]
+
+            result = build_test_result(str(context_file), loaded[context_file], searches[context_file])
             results.append(result)
 
             accuracy = result['accuracy']['score']
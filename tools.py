@@ -4,6 +4,7 @@ Shared Tools for Samsung Refrigerator Troubleshooting Agents (RAG Version)
 
 import os
 import yaml
+import asyncio
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import uuid
@@ -14,7 +15,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # RAG pipeline import
-from rag_pipeline.retriever import search_manuals_rag
+from rag_pipeline.retriever import search_manuals_rag, asearch_manuals_rag, search_manuals_rag_batch
+from rag_pipeline.clients import get_catalog
 
 # Configuration
 SAFETY_POLICY_PATH = os.getenv("SAFETY_POLICY_PATH", "./config/policy_safety.yaml")
@@ -32,15 +34,22 @@ def _check_model_appliance_type(user_model: str, user_brand: Optional[str] = Non
     """
     Check what appliance type a model number belongs to by searching the database.
 
+    Uses the manual catalog built at ingestion (local trie lookup) when it
+    exists; otherwise falls back to a RAG search on the model number.
+
     Args:
         user_model: User's model number
-        user_brand: User's brand (optional, helps narrow search)
+        user_brand: User's brand (optional; with the catalog it is preferred when
+                    several manuals match the model, not used as a filter)
 
     Returns:
         Appliance type if found, None otherwise
     """
     try:
-        from rag_pipeline.retriever import search_manuals_rag
+        catalog = get_catalog()
+        if catalog is not None:
+            entry = catalog.lookup_model(user_model, brand=user_brand)
+            return entry["appliance_type"] if entry else None
 
         # Try multiple search strategies to find the model
         # Strategy 1: Search with just the model number (best for exact match)
@@ -51,58 +60,111 @@ def _check_model_appliance_type(user_model: str, user_brand: Optional[str] = Non
             product_type=None  # Don't filter by type, we want to find what type it is
         )
 
-        # Check if we found the model with high confidence
-        if result.get('results'):
-            # Clean user model: remove *, **, and whitespace
-            user_model_clean = user_model.upper().replace("**", "").replace("*", "").strip()
-
-            # First pass: Look for exact or very close matches with wildcard handling
-            for r in result['results']:
-                result_model_raw = r.get('metadata', {}).get('model_number', '').upper()
-                # Clean database model: remove *, **, and whitespace
-                result_model_clean = result_model_raw.replace("**", "").replace("*", "").strip()
-                result_score = r.get('score', 0)
-
-                # Exact match after removing wildcards
-                if user_model_clean == result_model_clean:
-                    return r.get('metadata', {}).get('appliance_type', '').lower()
-
-                # Check if they share a common prefix (for wildcard matches)
-                # E.g., WD53DBA900H and WD53DBA9H both start with WD53DBA9
-                if result_score > 0.5 and len(result_model_clean) >= 6:
-                    # Use the length of the shorter model as the prefix length
-                    min_len = min(len(user_model_clean), len(result_model_clean))
-                    # Check if they match for at least the shorter model's length
-                    if min_len >= 6:
-                        user_prefix = user_model_clean[:min_len]
-                        db_prefix = result_model_clean[:min_len]
-                        if user_prefix == db_prefix:
-                            return r.get('metadata', {}).get('appliance_type', '').lower()
-
-            # Second pass: Look for partial matches with high scores
-            for r in result['results']:
-                result_model_raw = r.get('metadata', {}).get('model_number', '').upper()
-                result_model_clean = result_model_raw.replace("**", "").replace("*", "").strip()
-                result_score = r.get('score', 0)
-
-                # If high similarity score and significant model number overlap
-                if result_score > 0.4 and len(result_model_clean) >= 6:
-                    # Check if they share at least 80% of characters in common prefix
-                    min_len = min(len(user_model_clean), len(result_model_clean))
-                    if min_len >= 6:
-                        # Count matching prefix characters
-                        matching_chars = 0
-                        for i in range(min_len):
-                            if user_model_clean[i] == result_model_clean[i]:
-                                matching_chars += 1
-                            else:
-                                break  # Stop at first mismatch
-
-                        # If at least 80% of the shorter model matches
-                        if matching_chars >= min_len * 0.8:
-                            return r.get('metadata', {}).get('appliance_type', '').lower()
-
+        return _appliance_type_from_results(user_model, result.get('results', []))
+    except Exception as e:
+        # Silent failure - if we can't check, we won't block the search
         return None
+
+
+def _with_duplicates(results: list) -> list:
+    """Results followed by the duplicate chunks merged into them (other model variants)"""
+    expanded = list(results)
+    for r in results:
+        expanded.extend(r.get("duplicates", []))
+    return expanded
+
+
+def _appliance_type_from_results(user_model: str, results: list) -> Optional[str]:
+    """
+    Find the appliance type of a model number among model-number search results.
+
+    Args:
+        user_model: User's model number
+        results: Results of a RAG search on the model number
+
+    Returns:
+        Appliance type if a matching model was found, None otherwise
+    """
+    # Variants whose identical chunks were merged still identify the model
+    results = _with_duplicates(results)
+    if results:
+        # Clean user model: remove *, **, and whitespace
+        user_model_clean = user_model.upper().replace("**", "").replace("*", "").strip()
+
+        # First pass: Look for exact or very close matches with wildcard handling
+        for r in results:
+            result_model_raw = r.get('metadata', {}).get('model_number', '').upper()
+            # Clean database model: remove *, **, and whitespace
+            result_model_clean = result_model_raw.replace("**", "").replace("*", "").strip()
+            result_score = r.get('score', 0)
+
+            # Exact match after removing wildcards
+            if user_model_clean == result_model_clean:
+                return r.get('metadata', {}).get('appliance_type', '').lower()
+
+            # Check if they share a common prefix (for wildcard matches)
+            # E.g., WD53DBA900H and WD53DBA9H both start with WD53DBA9
+            if result_score > 0.5 and len(result_model_clean) >= 6:
+                # Use the length of the shorter model as the prefix length
+                min_len = min(len(user_model_clean), len(result_model_clean))
+                # Check if they match for at least the shorter model's length
+                if min_len >= 6:
+                    user_prefix = user_model_clean[:min_len]
+                    db_prefix = result_model_clean[:min_len]
+                    if user_prefix == db_prefix:
+                        return r.get('metadata', {}).get('appliance_type', '').lower()
+
+        # Second pass: Look for partial matches with high scores
+        for r in results:
+            result_model_raw = r.get('metadata', {}).get('model_number', '').upper()
+            result_model_clean = result_model_raw.replace("**", "").replace("*", "").strip()
+            result_score = r.get('score', 0)
+
+            # If high similarity score and significant model number overlap
+            if result_score > 0.4 and len(result_model_clean) >= 6:
+                # Check if they share at least 80% of characters in common prefix
+                min_len = min(len(user_model_clean), len(result_model_clean))
+                if min_len >= 6:
+                    # Count matching prefix characters
+                    matching_chars = 0
+                    for i in range(min_len):
+                        if user_model_clean[i] == result_model_clean[i]:
+                            matching_chars += 1
+                        else:
+                            break  # Stop at first mismatch
+
+                    # If at least 80% of the shorter model matches
+                    if matching_chars >= min_len * 0.8:
+                        return r.get('metadata', {}).get('appliance_type', '').lower()
+
+    return None
+
+
+async def _acheck_model_appliance_type(user_model: str, user_brand: Optional[str] = None) -> Optional[str]:
+    """
+    Async version of _check_model_appliance_type (catalog lookup, else async RAG search).
+
+    Args:
+        user_model: User's model number
+        user_brand: User's brand (optional; with the catalog it is preferred when
+                    several manuals match the model, not used as a filter)
+
+    Returns:
+        Appliance type if found, None otherwise
+    """
+    try:
+        catalog = get_catalog()
+        if catalog is not None:
+            entry = catalog.lookup_model(user_model, brand=user_brand)
+            return entry["appliance_type"] if entry else None
+
+        result = await asearch_manuals_rag(
+            query=user_model,
+            top_k=10,
+            brand=user_brand,
+            product_type=None
+        )
+        return _appliance_type_from_results(user_model, result.get('results', []))
     except Exception as e:
         # Silent failure - if we can't check, we won't block the search
         return None
@@ -122,6 +184,50 @@ def calculate_accuracy_score(results: list, user_model: Optional[str] = None, us
         user_brand: User's appliance brand
         user_appliance_type: User's appliance type (refrigerator, microwave, etc.)
 
+    Returns:
+        Dictionary with accuracy score and breakdown
+    """
+    actual_type = None
+    if results and user_model and user_appliance_type:
+        # Check what appliance type the user's model actually belongs to
+        actual_type = _check_model_appliance_type(user_model, user_brand)
+
+    return _accuracy_score(results, user_model, user_brand, user_appliance_type, actual_type)
+
+
+async def acalculate_accuracy_score(results: list, user_model: Optional[str] = None, user_brand: Optional[str] = None,
+                                   user_appliance_type: Optional[str] = None) -> dict:
+    """
+    Async version of calculate_accuracy_score (the model type check does not block).
+
+    Args:
+        results: List of RAG search results with scores and metadata
+        user_model: User's appliance model number
+        user_brand: User's appliance brand
+        user_appliance_type: User's appliance type (refrigerator, microwave, etc.)
+
+    Returns:
+        Dictionary with accuracy score and breakdown
+    """
+    actual_type = None
+    if results and user_model and user_appliance_type:
+        actual_type = await _acheck_model_appliance_type(user_model, user_brand)
+
+    return _accuracy_score(results, user_model, user_brand, user_appliance_type, actual_type)
+
+
+def _accuracy_score(results: list, user_model: Optional[str], user_brand: Optional[str],
+                    user_appliance_type: Optional[str], actual_type: Optional[str]) -> dict:
+    """
+    Score results once the appliance type of the user's model is known.
+
+    Args:
+        results: List of RAG search results with scores and metadata
+        user_model: User's appliance model number
+        user_brand: User's appliance brand
+        user_appliance_type: User's appliance type
+        actual_type: Appliance type the model belongs to (None if unknown)
+
     Returns:
         Dictionary with accuracy score and breakdown
     """
@@ -136,9 +242,6 @@ def calculate_accuracy_score(results: list, user_model: Optional[str] = None, us
     if user_model and user_appliance_type:
         user_type_lower = user_appliance_type.lower()
 
-        # Check what appliance type the user's model actually belongs to
-        actual_type = _check_model_appliance_type(user_model, user_brand)
-
         if actual_type and actual_type != user_type_lower:
             # Wrong appliance type - model exists but for different appliance!
             return {
@@ -163,7 +266,8 @@ def calculate_accuracy_score(results: list, user_model: Optional[str] = None, us
         # Extract model series (first part before numbers/letters)
         user_series = ''.join(c for c in user_model_clean[:8] if c.isalnum())
 
-        for result in results:
+        # Include model variants whose identical chunks were merged as duplicates
+        for result in _with_duplicates(results):
             result_model = result.get("metadata", {}).get("model_number", "").upper()
             if result_model:
                 # Exact match or contains
@@ -258,9 +362,11 @@ def search_samsung_manuals_rag(
     This uses the custom RAG pipeline:
     1. Embeds the query using OpenAI
     2. Searches Qdrant vector store for relevant chunks
-    3. Filters by minimum similarity threshold (default 70%)
-    4. Returns high-confidence results only
-    5. Calculates confidence score for relevance to user's model
+    3. Merges near-duplicate chunks and orders the rest by maximal marginal
+       relevance, so the top_k results cover different content
+    4. Filters by minimum similarity threshold (default 70%)
+    5. Returns high-confidence results only
+    6. Calculates confidence score for relevance to user's model
 
     Args:
         query: Search query describing the problem or topic
@@ -283,11 +389,179 @@ def search_samsung_manuals_rag(
         product_type=appliance_type
     )
 
+    return _finalize_rag_result(result, top_k, user_model, user_brand, appliance_type, min_similarity)
+
+
+async def asearch_samsung_manuals_rag(
+    query: str,
+    top_k: int = 5,
+    user_model: Optional[str] = None,
+    user_brand: Optional[str] = None,
+    appliance_type: Optional[str] = None,
+    min_similarity: float = 0.7
+) -> dict:
+    """
+    Search appliance manuals using RAG system with confidence scoring and filtering.
+
+    Async version of search_samsung_manuals_rag for agents served on an event
+    loop: the embedding call and the Qdrant search are awaited on shared
+    connection pools, so concurrent sessions do not block each other.
+
+    Args:
+        query: Search query describing the problem or topic
+        top_k: Number of results to return (after filtering)
+        user_model: User's appliance model number (for confidence scoring)
+        user_brand: User's appliance brand (for confidence scoring)
+        appliance_type: Appliance type filter (refrigerator, microwave, washer, etc.)
+        min_similarity: Minimum similarity score threshold (0.0-1.0, default 0.7)
+
+    Returns:
+        Dictionary with search results, context, and confidence score
+    """
+    result = await asearch_manuals_rag(
+        query=query,
+        top_k=top_k * 3,  # Get 3x results for better filtering
+        brand=user_brand,
+        product_type=appliance_type
+    )
+
+    _apply_similarity_threshold(result, top_k, min_similarity)
+    result["accuracy_score"] = await acalculate_accuracy_score(
+        results=result["results"],
+        user_model=user_model,
+        user_brand=user_brand,
+        user_appliance_type=appliance_type
+    )
+    return result
+
+
+async def asearch_samsung_manuals_rag_batch(
+    searches: List[Dict[str, Any]],
+    top_k: int = 5,
+    min_similarity: float = 0.7
+) -> List[dict]:
+    """
+    Run several asearch_samsung_manuals_rag searches concurrently.
+
+    Args:
+        searches: One dict per search with 'query' and optional 'user_model',
+                  'user_brand' and 'appliance_type'
+        top_k: Number of results per search (after filtering)
+        min_similarity: Minimum similarity score threshold (0.0-1.0, default 0.7)
+
+    Returns:
+        List of result dicts, one per search, in the same order
+    """
+    return list(await asyncio.gather(*(
+        asearch_samsung_manuals_rag(
+            query=s["query"],
+            top_k=top_k,
+            user_model=s.get("user_model"),
+            user_brand=s.get("user_brand"),
+            appliance_type=s.get("appliance_type"),
+            min_similarity=min_similarity
+        )
+        for s in searches
+    )))
+
+
+def search_samsung_manuals_rag_batch(
+    searches: List[Dict[str, Any]],
+    top_k: int = 5,
+    min_similarity: float = 0.7
+) -> List[dict]:
+    """
+    Run several search_samsung_manuals_rag searches in one round trip.
+
+    All queries are embedded in one call and searched with one Qdrant batch
+    request; each result is then filtered and scored exactly like
+    search_samsung_manuals_rag. Use for multi-issue sessions and evaluation runs.
+
+    Args:
+        searches: One dict per search with 'query' and optional 'user_model',
+                  'user_brand' and 'appliance_type'
+        top_k: Number of results per search (after filtering)
+        min_similarity: Minimum similarity score threshold (0.0-1.0, default 0.7)
+
+    Returns:
+        List of result dicts, one per search, in the same order
+    """
+    results = search_manuals_rag_batch(
+        queries=[s["query"] for s in searches],
+        top_k=top_k * 3,  # Get 3x results for better filtering
+        brand=[s.get("user_brand") for s in searches],
+        product_type=[s.get("appliance_type") for s in searches]
+    )
+
+    return [
+        _finalize_rag_result(
+            result,
+            top_k,
+            s.get("user_model"),
+            s.get("user_brand"),
+            s.get("appliance_type"),
+            min_similarity
+        )
+        for s, result in zip(searches, results)
+    ]
+
+
+def _finalize_rag_result(
+    result: dict,
+    top_k: int,
+    user_model: Optional[str],
+    user_brand: Optional[str],
+    appliance_type: Optional[str],
+    min_similarity: float
+) -> dict:
+    """
+    Apply the similarity threshold, rebuild context and add the accuracy score.
+
+    Args:
+        result: Raw result from search_manuals_rag
+        top_k: Number of results to keep
+        user_model: User's appliance model number
+        user_brand: User's appliance brand
+        appliance_type: Appliance type filter
+        min_similarity: Minimum similarity score threshold
+
+    Returns:
+        The result dict, updated in place
+    """
+    _apply_similarity_threshold(result, top_k, min_similarity)
+
+    # Calculate accuracy score
+    accuracy = calculate_accuracy_score(
+        results=result["results"],
+        user_model=user_model,
+        user_brand=user_brand,
+        user_appliance_type=appliance_type
+    )
+
+    # Add accuracy to result
+    result["accuracy_score"] = accuracy
+
+    return result
+
+
+def _apply_similarity_threshold(result: dict, top_k: int, min_similarity: float) -> dict:
+    """
+    Apply the similarity threshold and rebuild the context of a search result.
+
+    Args:
+        result: Raw result from search_manuals_rag
+        top_k: Number of results to keep
+        min_similarity: Minimum similarity score threshold
+
+    Returns:
+        The result dict, updated in place
+    """
     # Filter results by minimum similarity score
     all_results = result.get("results", [])
+    # Exact model number / error code matches (hybrid search) are exempt
     filtered_results = [
         r for r in all_results
-        if r.get("score", 0) >= min_similarity
+        if r.get("score", 0) >= min_similarity or r.get("code_match")
     ]
 
     # If we have filtered results, use them; otherwise fall back to top results
@@ -299,7 +573,7 @@ def search_samsung_manuals_rag(
         fallback_threshold = max(0.5, min_similarity - 0.15)
         filtered_results = [
             r for r in all_results
-            if r.get("score", 0) >= fallback_threshold
+            if r.get("score", 0) >= fallback_threshold or r.get("code_match")
         ]
         final_results = filtered_results[:top_k] if filtered_results else all_results[:top_k]
 
@@ -320,17 +594,6 @@ def search_samsung_manuals_rag(
     result["min_similarity_threshold"] = min_similarity
     result["filtered_count"] = len(filtered_results)
 
-    # Calculate accuracy score
-    accuracy = calculate_accuracy_score(
-        results=final_results,
-        user_model=user_model,
-        user_brand=user_brand,
-        user_appliance_type=appliance_type
-    )
-
-    # Add accuracy to result
-    result["accuracy_score"] = accuracy
-
     return result
 
 